@@ -0,0 +1,65 @@
+"""Micro-benchmark of the cost of annotating AdjFloat operations.
+
+Compares the time per operation of plain float arithmetic, AdjFloat arithmetic with
+annotation turned off, and AdjFloat arithmetic with annotation on, which includes the
+creation of the blocks. The end-to-end cost of annotating and computing the gradient of
+the result with one adjoint sweep is reported as well.
+
+Usage:
+    python benchmarks/annotation_overhead.py [--operations N] [--max-ratio R]
+
+With --max-ratio, the exit status is 1 if annotating costs more than R times the
+non-annotated AdjFloat operation.
+"""
+import argparse
+import gc
+import sys
+import time
+
+from pyadjoint import AdjFloat, Control, Tape, compute_gradient, set_working_tape, stop_annotating
+
+
+def _time_per_operation(a, b, operations, gradient=False):
+    # As in timeit, the garbage collector is disabled while timing.
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        y = a
+        for _ in range(operations // 2):
+            y = a * b + y
+        if gradient:
+            compute_gradient(y, Control(a))
+        return (time.perf_counter() - start) / operations
+    finally:
+        gc.enable()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--max-ratio", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    set_working_tape(Tape())
+    plain = _time_per_operation(1.5, 0.5, args.operations)
+    a, b = AdjFloat(1.5), AdjFloat(0.5)
+    with stop_annotating():
+        off = _time_per_operation(a, b, args.operations)
+    on = _time_per_operation(a, b, args.operations)
+    set_working_tape(Tape())
+    end_to_end = _time_per_operation(a, b, args.operations, gradient=True)
+
+    ratio = on / off
+    print("%-36s %10.3f us" % ("float", plain * 1e6))
+    print("%-36s %10.3f us" % ("AdjFloat, annotation off", off * 1e6))
+    print("%-36s %10.3f us" % ("AdjFloat, annotation on", on * 1e6))
+    print("%-36s %10.3f us" % ("annotation and adjoint sweep", end_to_end * 1e6))
+    print("annotation overhead: %.2fx the non-annotated operation" % ratio)
+
+    if args.max_ratio is not None and ratio > args.max_ratio:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
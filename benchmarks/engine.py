@@ -0,0 +1,227 @@
+"""Benchmarks of the hot paths of the pyadjoint engine, on synthetic tapes of AdjFloat operations.
+
+The cases are:
+
+    annotate     Recording the tape, including the creation of the blocks.
+    adjoint      Tape.evaluate_adj, as in compute_gradient.
+    tlm          Tape.evaluate_tlm.
+    hessian      Tape.evaluate_hessian, after the adjoint and tlm sweeps.
+    recompute    ReducedFunctional.__call__, i.e. the forward replay of the tape.
+    marked       Tape.marked_nodes, the marking of the blocks that depend on the controls.
+    optimize     Tape.optimize_for_controls, on a copy of the tape.
+    slicing      Reading every entry of a numpy_adjoint array, and its adjoint sweep.
+
+Every case runs on tapes of the given sizes (the number of blocks, or of slices for
+"slicing") and shapes:
+
+    chain        A deep chain, y = y * x, in which every block depends on the previous one.
+    fanin        A wide and shallow tape, in which products x * c_i are summed pairwise, so
+                 the functional depends on half of the blocks through a tree of depth log2(n).
+
+The time is the best of --repeat runs, with the garbage collector disabled, and the peak
+memory is measured with tracemalloc in one extra run. The annotation overhead of a single
+operation is measured by benchmarks/annotation_overhead.py.
+
+Usage:
+    python benchmarks/engine.py [--cases C ...] [--shapes S ...] [--sizes N ...]
+                                [--repeat R] [--output FILE]
+
+With --output, the results are also written to FILE as JSON, so that runs can be compared.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+import numpy_adjoint  # noqa: F401
+from pyadjoint import AdjFloat, Control, ReducedFunctional, Tape, create_overloaded_object, set_working_tape
+from pyadjoint.tape import stop_annotating
+
+
+def _chain(x, size):
+    y = x
+    for _ in range(size):
+        y = y * x
+    return y
+
+
+def _reduce(terms, chain):
+    if chain:
+        y = terms[0]
+        for term in terms[1:]:
+            y = y + term
+        return y
+    while len(terms) > 1:
+        pairs = [a + b for a, b in zip(terms[::2], terms[1::2])]
+        terms = pairs + terms[2 * len(pairs):]
+    return terms[0]
+
+
+def _fanin(x, size):
+    return _reduce([x * (1. + i / size) for i in range((size + 1) // 2)], chain=False)
+
+
+_SHAPES = {"chain": _chain, "fanin": _fanin}
+
+
+class Model(object):
+    """A synthetic tape with one control and one functional."""
+    def __init__(self, shape, size):
+        self.tape = Tape()
+        set_working_tape(self.tape)
+        self.x = AdjFloat(1.0)
+        self.control = Control(self.x)
+        self.J = _SHAPES[shape](self.x, size)
+        self.tape.get_blocks()
+
+
+def _annotate(shape, size):
+    return None, lambda: Model(shape, size)
+
+
+def _adjoint(model):
+    def setup():
+        model.tape.reset_variables()
+        model.J.block_variable.adj_value = 1.0
+
+    def run():
+        with stop_annotating(), model.tape.marked_nodes([model.control]):
+            model.tape.evaluate_adj(markings=True)
+    return setup, run
+
+
+def _tlm(model):
+    def setup():
+        model.tape.reset_tlm_values()
+        model.control.tlm_value = AdjFloat(1.0)
+
+    def run():
+        with stop_annotating():
+            model.tape.evaluate_tlm()
+    return setup, run
+
+
+def _hessian(model):
+    def setup():
+        _run(*_adjoint(model))
+        _run(*_tlm(model))
+        model.tape.reset_hessian_values()
+        model.J.block_variable.hessian_value = 0.0
+
+    def run():
+        with stop_annotating(), model.tape.marked_nodes([model.control]):
+            model.tape.evaluate_hessian(markings=True)
+    return setup, run
+
+
+def _recompute(model):
+    rf = ReducedFunctional(model.J, model.control, tape=model.tape)
+    return None, lambda: rf(AdjFloat(1.0))
+
+
+def _marked(model):
+    def run():
+        with model.tape.marked_nodes([model.control]):
+            pass
+    return None, run
+
+
+def _optimize(model):
+    copies = []
+
+    def setup():
+        copies[:] = [model.tape.copy()]
+
+    return setup, lambda: copies[0].optimize_for_controls([model.control])
+
+
+def _slicing(shape, size):
+    def run():
+        tape = Tape()
+        set_working_tape(tape)
+        a = create_overloaded_object(numpy.linspace(0., 1., size))
+        J = _reduce([a[i] for i in range(size)], chain=shape == "chain")
+        tape.get_blocks()
+        J.block_variable.adj_value = 1.0
+        with stop_annotating():
+            tape.evaluate_adj()
+    return None, run
+
+
+# The cases that run on a prebuilt Model, and those that build their own tape.
+_MODEL_CASES = {"adjoint": _adjoint, "tlm": _tlm, "hessian": _hessian, "recompute": _recompute,
+                "marked": _marked, "optimize": _optimize}
+_CASES = {"annotate": _annotate, "slicing": _slicing}
+CASES = ["annotate", "adjoint", "tlm", "hessian", "recompute", "marked", "optimize", "slicing"]
+
+
+def _run(setup, run):
+    if setup is not None:
+        setup()
+    run()
+
+
+def _measure(setup, run, repeat):
+    """Returns the best time of `repeat` runs and the peak memory allocated by one run."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--shapes", nargs="+", choices=sorted(_SHAPES), default=sorted(_SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    print("%-10s %-6s %9s %12s %14s %12s" % ("case", "shape", "size", "time [s]", "per block [us]", "peak [MB]"))
+    for shape in args.shapes:
+        for size in args.sizes:
+            model = None
+            for case in args.cases:
+                if case in _MODEL_CASES:
+                    if model is None:
+                        model = Model(shape, size)
+                    setup, run = _MODEL_CASES[case](model)
+                else:
+                    setup, run = _CASES[case](shape, size)
+                elapsed, peak = _measure(setup, run, args.repeat)
+                results.append({"case": case, "shape": shape, "size": size, "time": elapsed, "peak_memory": peak})
+                print("%-10s %-6s %9d %12.4f %14.3f %12.2f" % (case, shape, size, elapsed, elapsed / size * 1e6,
+                                                               peak / 2 ** 20))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
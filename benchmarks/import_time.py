@@ -0,0 +1,84 @@
+"""Benchmark of the time it takes to import pyadjoint and the packages built on it.
+
+Every import is timed in a fresh interpreter, so that nothing is cached in sys.modules,
+and the start-up of the interpreter itself is not included. The benchmark also reports
+which of the heavy optional modules (scipy and the optimization backends) the import
+pulled in; they should only be imported when they are first used. pyadjoint should not
+import numpy either.
+
+By default, pyadjoint, numpy_adjoint, fenics_adjoint and firedrake_adjoint are timed.
+Modules whose backend is not installed are skipped.
+
+Usage:
+    python benchmarks/import_time.py [--modules M ...] [--repeat N] [--max-time T]
+
+With --max-time, the exit status is 1 if the median import time of any module exceeds
+T milliseconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_MODULES = ("pyadjoint", "numpy_adjoint", "fenics_adjoint", "firedrake_adjoint")
+_HEAVY_MODULES = ("numpy", "scipy", "pyadjoint.optimization.optimization",
+                  "pyadjoint.optimization.ipopt_solver", "pyadjoint.optimization.rol_solver",
+                  "pyadjoint.optimization.moola_problem")
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    import {module}
+except ImportError:
+    print(json.dumps(None))
+    sys.exit(0)
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def _time_import(module):
+    """Returns the import time and the heavy modules loaded, or None if the module can not be imported."""
+    # The child sees the same packages as this interpreter.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    output = subprocess.check_output([sys.executable, "-c", _CHILD.format(module=module, heavy=_HEAVY_MODULES)],
+                                     env=env)
+    return json.loads(output.decode().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=list(_MODULES))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-time", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for module in args.modules:
+        times = []
+        loaded = []
+        for _ in range(args.repeat):
+            result = _time_import(module)
+            if result is None:
+                break
+            elapsed, loaded = result
+            times.append(elapsed)
+        if len(times) <= 0:
+            print("import %s: skipped, the module can not be imported" % module)
+            continue
+
+        median = statistics.median(times)
+        print("%-40s %10.1f ms" % ("import %s (median)" % module, median * 1e3))
+        print("%-40s %10.1f ms" % ("import %s (min)" % module, min(times) * 1e3))
+        print("heavy modules imported: %s" % (", ".join(loaded) if loaded else "none"))
+
+        if args.max_time is not None and median * 1e3 > args.max_time:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
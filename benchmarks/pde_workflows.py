@@ -0,0 +1,444 @@
+"""Benchmarks of complete PDE-constrained workflows, with the time split by phase and by kind of work.
+
+The models follow the examples (poisson-mother, heat-equation, burgers, time-distributed-control,
+stokes-topology) and the migration tests (burgers_newton, stokes), with the mesh size and
+the number of timesteps as parameters. Expressions and boundary conditions are written in UFL
+and with the sides of the unit square, so that the models run on both FEniCS and Firedrake.
+
+Every configuration runs in a fresh process, first once to fill the form compiler caches and then
+once measured. The measured run is split into the phases
+
+    annotation   Running the model with annotation.
+    recompute    ReducedFunctional.__call__, the forward replay of the tape.
+    adjoint      ReducedFunctional.derivative.
+    tlm          Tape.evaluate_tlm, in the direction of a constant perturbation of every control.
+    hessian      Tape.evaluate_hessian, the second-order adjoint sweep of the Hessian action.
+
+and the time of every phase is split into form manipulation (derivative, action, adjoint,
+replace, lhs/rhs and expand_derivatives), assembly (assemble and assemble_system) and linear
+or nonlinear solves of the backend. Nested calls count for the outermost one, e.g. the assembly
+inside a nonlinear solve counts as solve. The rest of the time, e.g. in pyadjoint itself, is
+reported as "other". The peak memory is the high-water mark of the resident set size of the
+process at the end of the phase.
+
+Usage:
+    python benchmarks/pde_workflows.py [--backend fenics|firedrake] [--models M ...]
+                                       [--sizes N ...] [--timesteps T ...] [--output FILE]
+
+The stationary models run once per mesh size. With --output, the results are also written
+to FILE as JSON, so that runs can be compared.
+"""
+import argparse
+import functools
+import importlib
+import json
+import math
+import resource
+import subprocess
+import sys
+import time
+import types
+from contextlib import contextmanager, nullcontext
+
+CATEGORIES = ("form", "assembly", "solve")
+PHASES = ("annotation", "recompute", "adjoint", "tlm", "hessian")
+
+# The backend functions and methods whose time is attributed to each category.
+_INSTRUMENTED = {
+    "form": ["derivative", "action", "adjoint", "replace", "lhs", "rhs", "system",
+             "ufl.replace", "ufl.algorithms.expand_derivatives"],
+    "assembly": ["assemble", "assemble_system"],
+    "solve": ["solve", "LUSolver.solve", "KrylovSolver.solve", "PETScLUSolver.solve", "PETScKrylovSolver.solve",
+              "LinearSolver.solve", "LinearVariationalSolver.solve", "NonlinearVariationalSolver.solve",
+              "NewtonSolver.solve"],
+}
+
+
+class PhaseProfiler(object):
+    """Attributes the time spent in backend calls to the current phase and a category.
+
+    Args:
+        backend (module): The backend, fenics or firedrake.
+
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.results = {}
+        self._phase = None
+        self._depth = 0
+        self._originals = []
+
+    def _resolve(self, path):
+        if path.startswith("ufl."):
+            owner = importlib.import_module(path.rsplit(".", 1)[0])
+            return owner, path.rsplit(".", 1)[1]
+        owner = self.backend
+        *classes, name = path.split(".")
+        for cls in classes:
+            owner = getattr(owner, cls, None)
+        return owner, name
+
+    def _wrap(self, function, category):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self._depth > 0 or self._phase is None:
+                return function(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                self.results[self._phase][category] += time.perf_counter() - start
+        return wrapper
+
+    def install(self):
+        for category, paths in _INSTRUMENTED.items():
+            for path in paths:
+                owner, name = self._resolve(path)
+                function = getattr(owner, name, None)
+                if function is None:
+                    continue
+                try:
+                    setattr(owner, name, self._wrap(function, category))
+                except (AttributeError, TypeError):
+                    # Some extension types do not allow their methods to be replaced.
+                    continue
+                self._originals.append((owner, name, function))
+
+    def uninstall(self):
+        for owner, name, function in reversed(self._originals):
+            setattr(owner, name, function)
+        self._originals = []
+
+    @contextmanager
+    def phase(self, name):
+        self.results[name] = dict.fromkeys(CATEGORIES, 0.)
+        self._phase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phase = None
+            result = self.results[name]
+            result["total"] = time.perf_counter() - start
+            result["other"] = result["total"] - sum(result[c] for c in CATEGORIES)
+            # ru_maxrss is in kilobytes on Linux.
+            result["peak_memory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _namespace(backend_name):
+    """Returns the names of the backend, overridden by the annotated names of its adjoint package,
+    as `from fenics import *; from fenics_adjoint import *` would."""
+    backend = importlib.import_module(backend_name)
+    adjoint = importlib.import_module(backend_name + "_adjoint")
+    names = {k: v for k, v in vars(backend).items() if not k.startswith("_")}
+    names.update((k, getattr(adjoint, k)) for k in adjoint.__all__)
+    names.update(name=backend_name, backend=sys.modules["backend"])
+    return types.SimpleNamespace(**names)
+
+
+# The sides of the unit square, as FEniCS subdomains and as Firedrake boundary ids.
+_SIDES = {"boundary": ("on_boundary", "on_boundary"),
+          "left": ("near(x[0], 0.0)", 1), "right": ("near(x[0], 1.0)", 2),
+          "bottom": ("near(x[1], 0.0)", 3), "top": ("near(x[1], 1.0)", 4)}
+
+
+def _bc(fe, V, value, side="boundary"):
+    subdomain, boundary_id = _SIDES[side]
+    return fe.DirichletBC(V, value, boundary_id if fe.name == "firedrake" else subdomain)
+
+
+def poisson_mother(fe, n, timesteps):
+    mesh = fe.UnitSquareMesh(n, n)
+    V = fe.FunctionSpace(mesh, "CG", 1)
+    W = fe.FunctionSpace(mesh, "DG", 0)
+    x = fe.SpatialCoordinate(mesh)
+
+    f = fe.project(x[0] + x[1], W)
+    u = fe.Function(V, name="State")
+    v = fe.TestFunction(V)
+    F = (fe.inner(fe.grad(u), fe.grad(v)) - f * v) * fe.dx
+    fe.solve(F == 0, u, _bc(fe, V, 0.0))
+
+    d = 1 / (2 * math.pi ** 2) * fe.sin(math.pi * x[0]) * fe.sin(math.pi * x[1])
+    alpha = fe.Constant(1e-6)
+    J = fe.assemble((0.5 * fe.inner(u - d, u - d)) * fe.dx + alpha / 2 * f ** 2 * fe.dx)
+    return J, [fe.Control(f)]
+
+
+def heat_equation(fe, n, timesteps):
+    mesh = fe.UnitSquareMesh(n, n)
+    V = fe.FunctionSpace(mesh, "CG", 1)
+    x = fe.SpatialCoordinate(mesh)
+    ic = fe.project(15 * x[0] * (1 - x[0]) * x[1] * (1 - x[1]), V)
+
+    u_prev = fe.Function(V)
+    u_prev.assign(ic)
+    u_next = fe.Function(V)
+    u_next.assign(ic)
+    u_mid = fe.Constant(0.5) * u_prev + fe.Constant(0.5) * u_next
+    v = fe.TestFunction(V)
+    dt = fe.Constant(0.001)
+    F = fe.inner((u_next - u_prev) / dt, v) * fe.dx + fe.inner(fe.grad(u_mid), fe.grad(v)) * fe.dx
+    for _ in range(timesteps):
+        fe.solve(F == 0, u_next, J=fe.derivative(F, u_next))
+        u_prev.assign(u_next)
+
+    alpha = fe.Constant(1.0e-7)
+    J = fe.assemble(fe.inner(u_prev, u_prev) * fe.dx + alpha * fe.inner(fe.grad(ic), fe.grad(ic)) * fe.dx)
+    return J, [fe.Control(ic)]
+
+
+def burgers(fe, n, timesteps):
+    mesh = fe.UnitIntervalMesh(n)
+    V = fe.FunctionSpace(mesh, "CG", 2)
+    x = fe.SpatialCoordinate(mesh)
+    u_ = fe.project(fe.sin(2 * math.pi * x[0]), V)
+    control = fe.Control(u_)
+
+    u = fe.Function(V)
+    v = fe.TestFunction(V)
+    nu = fe.Constant(0.0001)
+    a = fe.Constant(0.4)
+    dt = fe.Constant(0.05)
+    F = ((u - u_) / dt * v + a * u * u.dx(0) * v + nu * u.dx(0) * v.dx(0)) * fe.dx
+    bc = _bc(fe, V, 0.0)
+
+    J = 0
+    for _ in range(timesteps):
+        fe.solve(F == 0, u, bc)
+        u_.assign(u)
+        J += 0.05 * fe.assemble(u_ * u_ * fe.dx)
+    return J, [control]
+
+
+def time_distributed_control(fe, n, timesteps):
+    mesh = fe.UnitSquareMesh(n, n)
+    V = fe.FunctionSpace(mesh, "CG", 1)
+    x = fe.SpatialCoordinate(mesh)
+    nu = fe.Constant(1e-5)
+    dt = 0.1
+    ctrls = [fe.Function(V) for _ in range(timesteps)]
+
+    u = fe.TrialFunction(V)
+    v = fe.TestFunction(V)
+    f = fe.Function(V, name="source")
+    u_0 = fe.Function(V, name="solution")
+    F = ((u - u_0) / fe.Constant(dt) * v + nu * fe.inner(fe.grad(u), fe.grad(v)) - f * v) * fe.dx
+    a, L = fe.lhs(F), fe.rhs(F)
+    bc = _bc(fe, V, 0.0)
+
+    j = 0
+    for i, ctrl in enumerate(ctrls):
+        t = (i + 1) * dt
+        f.assign(ctrl)
+        d = fe.project(16 * x[0] * (x[0] - 1) * x[1] * (x[1] - 1) * math.sin(math.pi * t), V)
+        fe.solve(a == L, u_0, bc)
+        weight = 0.5 if i == len(ctrls) - 1 else 1.
+        j += weight * dt * fe.assemble((u_0 - d) ** 2 * fe.dx)
+
+    alpha = fe.Constant(1e-1)
+    regularisation = alpha / 2 * sum([1 / dt * (fb - fa) ** 2 * fe.dx for fb, fa in zip(ctrls[1:], ctrls[:-1])])
+    J = j + fe.assemble(regularisation) if len(ctrls) > 1 else j
+    return J, [fe.Control(c) for c in ctrls]
+
+
+def stokes_topology(fe, n, timesteps):
+    # Driven by a body force with a traction-free top, instead of the parabolic inflow of the example.
+    mu = fe.Constant(1.0)
+    alphaunderbar = 2.5 * mu / (100 ** 2)
+    alphabar = 2.5 * mu / (0.01 ** 2)
+    q = fe.Constant(0.01)
+
+    def alpha(rho):
+        return alphabar + (alphaunderbar - alphabar) * rho * (1 + q) / (rho + q)
+
+    mesh = fe.UnitSquareMesh(n, n)
+    A = fe.FunctionSpace(mesh, "CG", 1)
+    element = fe.VectorElement("CG", mesh.ufl_cell(), 2) * fe.FiniteElement("CG", mesh.ufl_cell(), 1)
+    W = fe.FunctionSpace(mesh, element)
+    rho = fe.interpolate(fe.Constant(1.0 / 3), A)
+
+    w = fe.Function(W)
+    (u, p) = fe.TrialFunctions(W)
+    (v, q_) = fe.TestFunctions(W)
+    force = fe.as_vector((1.0, 0.0))
+    F = (alpha(rho) * fe.inner(u, v) * fe.dx + fe.inner(fe.grad(u), fe.grad(v)) * fe.dx
+         + fe.inner(fe.grad(p), v) * fe.dx + fe.inner(fe.div(u), q_) * fe.dx - fe.inner(force, v) * fe.dx)
+    bcs = [_bc(fe, W.sub(0), fe.Constant((0.0, 0.0)), side) for side in ("left", "right", "bottom")]
+    fe.solve(fe.lhs(F) == fe.rhs(F), w, bcs=bcs)
+
+    (u, p) = fe.split(w)
+    J = fe.assemble(0.5 * fe.inner(alpha(rho) * u, u) * fe.dx + mu * fe.inner(fe.grad(u), fe.grad(u)) * fe.dx)
+    return J, [fe.Control(rho)]
+
+
+def migration_burgers_newton(fe, n, timesteps):
+    mesh = fe.UnitIntervalMesh(n)
+    V = fe.FunctionSpace(mesh, "CG", 1)
+    x = fe.SpatialCoordinate(mesh)
+    ic = fe.project(fe.sin(2 * math.pi * x[0]), V)
+
+    u_ = fe.Function(V)
+    u_.assign(ic)
+    u = fe.Function(V)
+    v = fe.TestFunction(V)
+    nu = fe.Constant(0.0001)
+    dt = fe.Constant(1.0 / n)
+    F = ((u - u_) / dt * v + u * u.dx(0) * v + nu * u.dx(0) * v.dx(0)) * fe.dx
+    bc = _bc(fe, V, 0.0)
+    for _ in range(timesteps):
+        fe.solve(F == 0, u, bc)
+        u_.assign(u)
+
+    J = fe.assemble(u_ * u_ * fe.dx + ic * ic * fe.dx)
+    return J, [fe.Control(ic)]
+
+
+def migration_stokes(fe, n, timesteps):
+    mesh = fe.UnitSquareMesh(n, n)
+    X = fe.FunctionSpace(mesh, "CG", 1)
+    element = fe.VectorElement("CG", mesh.ufl_cell(), 2) * fe.FiniteElement("CG", mesh.ufl_cell(), 1)
+    W = fe.FunctionSpace(mesh, element)
+    x = fe.SpatialCoordinate(mesh)
+    ic = fe.project(0.5 * (1.0 - x[1] * x[1]) + 0.01 * fe.cos(math.pi * x[0]) * fe.sin(math.pi * x[1]), X)
+
+    flow_bcs = [_bc(fe, W.sub(0), fe.Constant((0.0, 0.0)), "bottom"),
+                _bc(fe, W.sub(0), fe.Constant((0.0, 0.0)), "top"),
+                _bc(fe, W.sub(0).sub(0), 0.0, "left"),
+                _bc(fe, W.sub(0).sub(0), 0.0, "right")]
+    temp_bcs = [_bc(fe, X, 0.0, "top")]
+
+    T_ = fe.Function(X)
+    T_.assign(ic)
+    T = fe.Function(X)
+    T.assign(ic)
+    w = fe.Function(W)
+    (u, p) = fe.split(w)
+    Ra = fe.Constant(1.e4)
+    nu = fe.Constant(1.0)
+    kappa = fe.Constant(1.0)
+    k = 0.1
+
+    (u_t, p_t) = fe.TrialFunctions(W)
+    (v, q) = fe.TestFunctions(W)
+    flow_a = (nu * fe.inner(fe.grad(u_t), fe.grad(v)) + p_t * fe.div(v) + q * fe.div(u_t)) * fe.dx
+    flow_L = fe.inner(fe.as_vector((Ra * T_, 0)), v) * fe.dx
+
+    t = fe.TrialFunction(X)
+    s = fe.TestFunction(X)
+    F = ((t - T_) / k * s + fe.inner(kappa * fe.grad(t), fe.grad(s)) + fe.dot(u, fe.grad(t)) * s) * fe.dx - s * fe.dx
+    temp_a, temp_L = fe.lhs(F), fe.rhs(F)
+
+    for _ in range(timesteps):
+        fe.solve(flow_a == flow_L, w, flow_bcs)
+        fe.solve(temp_a == temp_L, T, temp_bcs)
+        T_.assign(T)
+
+    J = fe.assemble(T_ * T_ * fe.dx)
+    return J, [fe.Control(ic)]
+
+
+# The models, and whether they are time dependent.
+MODELS = {
+    "poisson-mother": (poisson_mother, False),
+    "heat-equation": (heat_equation, True),
+    "burgers": (burgers, True),
+    "time-distributed-control": (time_distributed_control, True),
+    "stokes-topology": (stokes_topology, False),
+    "migration-burgers-newton": (migration_burgers_newton, True),
+    "migration-stokes": (migration_stokes, True),
+}
+
+
+def _direction(fe, control):
+    """A constant perturbation of the control."""
+    value = control.data()
+    if isinstance(value, fe.Function):
+        return fe.interpolate(fe.Constant(1.0), value.function_space())
+    return value._ad_copy()
+
+
+def run_workflow(fe, model, n, timesteps, profiler=None):
+    """Runs the phases of the workflow of `model`, within the phases of `profiler` if given."""
+    phase = profiler.phase if profiler is not None else (lambda name: nullcontext())
+
+    tape = fe.Tape()
+    fe.set_working_tape(tape)
+    with phase("annotation"):
+        J, controls = MODELS[model][0](fe, n, timesteps)
+    rf = fe.ReducedFunctional(J, controls, tape=tape)
+
+    with phase("recompute"):
+        rf([c.data() for c in controls])
+    with phase("adjoint"):
+        rf.derivative()
+
+    with fe.stop_annotating():
+        directions = [_direction(fe, c) for c in controls]
+        with phase("tlm"):
+            tape.reset_tlm_values()
+            for control, direction in zip(controls, directions):
+                control.tlm_value = direction
+            tape.evaluate_tlm()
+        with phase("hessian"):
+            tape.reset_hessian_values()
+            J.block_variable.hessian_value = 0.0
+            with tape.marked_nodes(controls):
+                tape.evaluate_hessian(markings=True)
+
+
+def _run_single(backend_name, model, n, timesteps):
+    fe = _namespace(backend_name)
+    # Fill the form compiler caches.
+    run_workflow(fe, model, n, timesteps)
+
+    profiler = PhaseProfiler(fe.backend)
+    profiler.install()
+    try:
+        run_workflow(fe, model, n, timesteps, profiler)
+    finally:
+        profiler.uninstall()
+    return profiler.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["fenics", "firedrake"], default="fenics")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=sorted(MODELS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[16, 32, 64])
+    parser.add_argument("--timesteps", nargs="+", type=int, default=[10, 20])
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--single", nargs=3, metavar=("MODEL", "SIZE", "TIMESTEPS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single is not None:
+        model, n, timesteps = args.single
+        print(json.dumps(_run_single(args.backend, model, int(n), int(timesteps))))
+        return 0
+
+    results = []
+    print("%-26s %5s %5s %-10s %9s %9s %9s %9s %9s %10s"
+          % ("model", "size", "steps", "phase", "total [s]", "form", "assembly", "solve", "other", "peak [MB]"))
+    for model in args.models:
+        for n in args.sizes:
+            for timesteps in (args.timesteps if MODELS[model][1] else [1]):
+                output = subprocess.check_output([sys.executable, __file__, "--backend", args.backend,
+                                                  "--single", model, str(n), str(timesteps)])
+                phases = json.loads(output.decode().splitlines()[-1])
+                for name in PHASES:
+                    result = phases[name]
+                    results.append(dict(result, model=model, size=n, timesteps=timesteps, phase=name))
+                    print("%-26s %5d %5d %-10s %9.3f %9.3f %9.3f %9.3f %9.3f %10.1f"
+                          % (model, n, timesteps, name, result["total"], result["form"], result["assembly"],
+                             result["solve"], result["other"], result["peak_memory"] / 2 ** 20))
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ class AssembleBlock(Block):
     def __init__(self, form):
         super(AssembleBlock, self).__init__()
         self.form = form
+        # Mixed spaces used to assemble the derivatives of several dependencies together.
+        self._fused_spaces = {}
         if self.backend.__name__ != "firedrake":
             mesh = self.form.ufl_domain().ufl_cargo()
         else:
@@ -17,7 +19,7 @@ class AssembleBlock(Block):
     def __str__(self):
         return str(self.form)
 
-    def prepare_evaluate_adj(self, inputs, adj_inputs, relevant_dependencies):
+    def _replace_form(self):
         replaced_coeffs = {}
         for block_variable in self.get_dependencies():
             coeff = block_variable.output
@@ -28,9 +30,43 @@ class AssembleBlock(Block):
         form = ufl.replace(self.form, replaced_coeffs)
         return form
 
+    def _assemble_fused(self, form, forms):
+        """Assembles the linear forms of several Function dependencies in one pass over the cells.
+
+        Args:
+            form (ufl.Form): The form of the block, with coefficients replaced by checkpoints.
+            forms (dict): Maps dependency indices to a linear form with the test function
+                in the function space of the dependency.
+
+        Returns:
+            dict: Maps the dependency indices to the assembled vectors. It is empty
+                if there are too few forms to gain anything from assembling them together.
+
+        """
+        forms = {idx: ufl.algorithms.expand_derivatives(dform) for idx, dform in forms.items()
+                 if isinstance(self.get_dependencies()[idx].output, self.backend.Function)
+                 and self.get_dependencies()[idx].output.ufl_domain() == form.ufl_domain()}
+        forms = {idx: dform for idx, dform in forms.items() if not dform.empty()}
+        if len(forms) < 2:
+            return {}
+        indices = list(forms)
+        spaces = [self.get_dependencies()[idx].output.function_space() for idx in indices]
+        vectors = self.compat.assemble_fused([forms[idx] for idx in indices], spaces, cache=self._fused_spaces)
+        return dict(zip(indices, vectors))
+
+    def prepare_evaluate_adj(self, inputs, adj_inputs, relevant_dependencies):
+        form = self._replace_form()
+        # The derivatives of the Function dependencies are assembled together, and scaled afterwards.
+        fused = self._assemble_fused(form, {
+            idx: self.backend.derivative(form, bv.saved_output, self.backend.TestFunction(bv.output.function_space()))
+            for idx, bv in relevant_dependencies if isinstance(bv.output, self.backend.Function)})
+        return form, fused
+
     def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
-        form = prepared
+        form, fused = prepared
         adj_input = adj_inputs[0]
+        if idx in fused:
+            return adj_input * fused[idx]
         c = block_variable.output
         c_rep = block_variable.saved_output
 
@@ -59,7 +95,7 @@ class AssembleBlock(Block):
         return adj_input * output
 
     def prepare_evaluate_tlm(self, inputs, tlm_inputs, relevant_outputs):
-        return self.prepare_evaluate_adj(inputs, tlm_inputs, self.get_dependencies())
+        return self._replace_form()
 
     def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
         form = prepared
@@ -81,11 +117,53 @@ class AssembleBlock(Block):
         return dform
 
     def prepare_evaluate_hessian(self, inputs, hessian_inputs, adj_inputs, relevant_dependencies):
-        return self.prepare_evaluate_adj(inputs, adj_inputs, relevant_dependencies)
+        form = self._replace_form()
+        hessian_input = hessian_inputs[0]
+        adj_input = adj_inputs[0]
+        # The hessian and adjoint inputs are scalars, so the component of a Function dependency
+        # can be assembled from one form, and these forms can be assembled together.
+        forms = {}
+        for idx, bv in relevant_dependencies:
+            if isinstance(bv.output, self.backend.Function):
+                dc = self.backend.TestFunction(bv.output.function_space())
+                dform, ddform = self._hessian_forms(form, bv.saved_output, dc, relevant_dependencies)
+                forms[idx] = float(hessian_input) * dform
+                if ddform is not None:
+                    forms[idx] += float(adj_input) * ddform
+        return form, self._assemble_fused(form, forms)
+
+    def _hessian_forms(self, form, c_rep, dc, relevant_dependencies):
+        """Returns the derivative of `form` with respect to `c_rep` in the direction `dc`,
+        and the derivative of that with respect to the dependencies in their tlm directions.
+
+        The second form is None if none of the dependencies has a tlm value.
+        """
+        dform = self.backend.derivative(form, c_rep, dc)
+        dform = ufl.algorithms.expand_derivatives(dform)
+
+        ddform = 0
+        for other_idx, bv in relevant_dependencies:
+            c2_rep = bv.saved_output
+            tlm_input = bv.tlm_value
+
+            if tlm_input is None:
+                continue
+
+            if isinstance(c2_rep, self.compat.MeshType):
+                X = self.backend.SpatialCoordinate(c2_rep)
+                ddform += self.backend.derivative(dform, X, tlm_input)
+            else:
+                ddform += self.backend.derivative(dform, c2_rep, tlm_input)
+
+        if isinstance(ddform, int):
+            return dform, None
+        return dform, ufl.algorithms.expand_derivatives(ddform)
 
     def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
                                    relevant_dependencies, prepared=None):
-        form = prepared
+        form, fused = prepared
+        if idx in fused:
+            return fused[idx]
         hessian_input = hessian_inputs[0]
         adj_input = adj_inputs[0]
 
@@ -107,28 +185,11 @@ class AssembleBlock(Block):
         else:
             return None
 
-        dform = self.backend.derivative(form, c1_rep, dc)
-        dform = ufl.algorithms.expand_derivatives(dform)
+        dform, ddform = self._hessian_forms(form, c1_rep, dc, relevant_dependencies)
         hessian_outputs = hessian_input * self.compat.assemble_adjoint_value(dform)
 
-        ddform = 0
-        for other_idx, bv in relevant_dependencies:
-            c2_rep = bv.saved_output
-            tlm_input = bv.tlm_value
-
-            if tlm_input is None:
-                continue
-
-            if isinstance(c2_rep, self.compat.MeshType):
-                X = self.backend.SpatialCoordinate(c2_rep)
-                ddform += self.backend.derivative(dform, X, tlm_input)
-            else:
-                ddform += self.backend.derivative(dform, c2_rep, tlm_input)
-
-        if not isinstance(ddform, float):
-            ddform = ufl.algorithms.expand_derivatives(ddform)
-            if not ddform.empty():
-                hessian_outputs += adj_input * self.compat.assemble_adjoint_value(ddform)
+        if ddform is not None and not ddform.empty():
+            hessian_outputs += adj_input * self.compat.assemble_adjoint_value(ddform)
 
         if isinstance(c1, self.compat.ExpressionType):
             return [(hessian_outputs, W)]
@@ -136,7 +197,7 @@ class AssembleBlock(Block):
             return hessian_outputs
 
     def prepare_recompute_component(self, inputs, relevant_outputs):
-        return self.prepare_evaluate_adj(inputs, None, None)
+        return self._replace_form()
 
     def recompute_component(self, inputs, block_variable, idx, prepared):
         form = prepared
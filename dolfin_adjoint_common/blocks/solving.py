@@ -1,13 +1,22 @@
 import numpy
 import ufl
 
-from pyadjoint import Block
+from pyadjoint import Block, get_derivative_tolerance
 from pyadjoint.enlisting import Enlist
+from pyadjoint.stacking import StackedValues, is_stacked, seed_value
+from pyadjoint.timeline import trace_event
 
 
 class GenericSolveBlock(Block):
     pop_kwargs_keys = ["adj_cb", "adj_bdy_cb", "adj2_cb", "adj2_bdy_cb",
-                       "forward_args", "forward_kwargs", "adj_args", "adj_kwargs"]
+                       "forward_args", "forward_kwargs", "adj_args", "adj_kwargs",
+                       "matrix_free", "matrix_free_pc"]
+    # Stacked adjoint and tlm inputs share one assembly of dF/du and one solver setup.
+    stacked_modes = ("adj", "tlm")
+    # The loosest relative tolerance used for inexact adjoint and tlm solves,
+    # and the relative tolerance assumed for Krylov solvers that do not set one (PETSc's default).
+    max_inexact_relative_tolerance = 1e-1
+    default_relative_tolerance = 1e-5
 
     def __init__(self, lhs, rhs, func, bcs, *args, **kwargs):
         super().__init__()
@@ -15,7 +24,13 @@ class GenericSolveBlock(Block):
         self.adj_bdy_cb = kwargs.pop("adj_bdy_cb", None)
         self.adj2_cb = kwargs.pop("adj2_cb", None)
         self.adj2_bdy_cb = kwargs.pop("adj2_bdy_cb", None)
+        # Solve the adjoint and tlm equations with Krylov solvers that only apply
+        # the action of dF/du, optionally preconditioned by an assembled form.
+        self.matrix_free = kwargs.pop("matrix_free", False)
+        self.matrix_free_pc = kwargs.pop("matrix_free_pc", None)
         self.adj_sol = None
+        # Mixed spaces used to assemble the derivatives of several dependencies together.
+        self._fused_spaces = {}
 
         self.forward_args = []
         self.forward_kwargs = {}
@@ -140,35 +155,176 @@ class GenericSolveBlock(Block):
                                        fwd_block_variable.saved_output,
                                        self.backend.TrialFunction(u.function_space()))
         dFdu_form = self.backend.adjoint(dFdu)
-        dJdu = dJdu.copy()
+        if is_stacked(dJdu):
+            dJdu = StackedValues(None if b is None else b.copy() for b in dJdu)
+        else:
+            dJdu = dJdu.copy()
 
         compute_bdy = self._should_compute_boundary_adjoint(relevant_dependencies)
         adj_sol, adj_sol_bdy = self._assemble_and_solve_adj_eq(dFdu_form, dJdu, compute_bdy)
         self.adj_sol = adj_sol
-        if self.adj_cb is not None:
-            self.adj_cb(adj_sol)
-        if self.adj_bdy_cb is not None and compute_bdy:
-            self.adj_bdy_cb(adj_sol_bdy)
+        adj_sols = adj_sol if is_stacked(adj_sol) else [adj_sol]
+        adj_sol_bdys = adj_sol_bdy if is_stacked(adj_sol_bdy) else [adj_sol_bdy]
+        for sol, sol_bdy in zip(adj_sols, adj_sol_bdys):
+            if sol is None:
+                continue
+            if self.adj_cb is not None:
+                self.adj_cb(sol)
+            if self.adj_bdy_cb is not None and compute_bdy:
+                self.adj_bdy_cb(sol_bdy)
 
         r = {}
         r["form"] = F_form
         r["adj_sol"] = adj_sol
         r["adj_sol_bdy"] = adj_sol_bdy
+        if is_stacked(adj_sol):
+            r["fused"] = [None if sol is None else self._fused_adj_components(F_form, sol, relevant_dependencies)
+                          for sol in adj_sol]
+        else:
+            r["fused"] = self._fused_adj_components(F_form, adj_sol, relevant_dependencies)
         return r
 
+    def _fusable_dependencies(self, F_form, relevant_dependencies):
+        """Returns the relevant dependencies whose derivatives can be assembled in one pass.
+
+        These are the Function coefficients on the mesh of the equation,
+        except the initial guess of a nonlinear equation.
+        """
+        fusable = []
+        for idx, block_variable in relevant_dependencies:
+            c = block_variable.output
+            if not isinstance(c, self.backend.Function):
+                continue
+            if c == self.func and not self.linear:
+                continue
+            if c.ufl_domain() != F_form.ufl_domain():
+                continue
+            fusable.append((idx, block_variable))
+        return fusable
+
+    def _assemble_fused(self, forms):
+        """Assembles the linear forms of several dependencies in one pass over the cells.
+
+        Args:
+            forms (dict): Maps dependency indices to a linear form with the test function
+                in the function space of the dependency.
+
+        Returns:
+            dict: Maps the dependency indices to the assembled vectors. It is empty
+                if there are too few forms to gain anything from assembling them together.
+
+        """
+        forms = {idx: ufl.algorithms.expand_derivatives(form) for idx, form in forms.items()}
+        forms = {idx: form for idx, form in forms.items() if not form.empty()}
+        if len(forms) < 2:
+            return {}
+        indices = list(forms)
+        spaces = [self.get_dependencies()[idx].output.function_space() for idx in indices]
+        with trace_event("assemble", "backend", {"forms": len(indices)}):
+            vectors = self.compat.assemble_fused([forms[idx] for idx in indices], spaces, cache=self._fused_spaces)
+        return dict(zip(indices, vectors))
+
+    def _fused_adj_components(self, F_form, adj_sol, relevant_dependencies):
+        """Assembles the adjoint components of all fusable dependencies in one pass.
+
+        The component of a dependency m is -dF/dm^* adj_sol, that is the derivative of
+        -F(u, m; adj_sol) with respect to m.
+        """
+        form_adj = self.backend.action(F_form, adj_sol)
+        forms = {}
+        for idx, block_variable in self._fusable_dependencies(F_form, relevant_dependencies):
+            dc = self.backend.TestFunction(block_variable.output.function_space())
+            forms[idx] = -self.backend.derivative(form_adj, block_variable.saved_output, dc)
+        return self._assemble_fused(forms)
+
     def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy):
-        dJdu_copy = dJdu.copy()
+        """Assembles the adjoint operator and solves the adjoint equation.
+
+        If `dJdu` is a :class:`StackedValues`, the operator is assembled once
+        and the solver is reused for every right-hand side.
+        Then the adjoint solutions are returned as :class:`StackedValues` as well.
+        """
         kwargs = self.assemble_kwargs.copy()
         # Homogenize and apply boundary conditions on adj_dFdu and dJdu.
         bcs = self._homogenize_bcs()
+        if self.matrix_free:
+            solver = self._create_matrix_free_solver(dFdu_adj_form, bcs, adjoint=True)
+            return self._solve_adj_eq(solver.solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
+
         kwargs["bcs"] = bcs
-        dFdu = self.compat.assemble_adjoint_value(dFdu_adj_form, **kwargs)
+        with trace_event("assemble", "backend"):
+            dFdu = self.compat.assemble_adjoint_value(dFdu_adj_form, **kwargs)
+
+        solver = self.compat.create_linear_solver(dFdu, *self.adj_args,
+                                                  relative_tolerance=self._inexact_relative_tolerance(),
+                                                  **self.adj_kwargs)
+        return self._solve_adj_eq(solver.solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
+
+    def _inexact_relative_tolerance(self, rtol=None):
+        """Returns the relative tolerance of an iterative adjoint or tlm solve.
+
+        `rtol` is the relative tolerance the solver is configured with. If it is None, the relative
+        tolerance of the adjoint solver parameters is used, or `default_relative_tolerance` if they
+        do not set one.
+        If the derivative is computed with an accuracy target (see :class:`pyadjoint.derivative_tolerance`),
+        the tolerance is loosened to the target, but not beyond `max_inexact_relative_tolerance`,
+        and it is never tightened. Otherwise `rtol` is returned unchanged.
+        """
+        tol = get_derivative_tolerance()
+        if tol is None:
+            return rtol
+        if rtol is None:
+            rtol = self._configured_relative_tolerance()
+        return max(rtol, min(tol, self.max_inexact_relative_tolerance))
+
+    def _configured_relative_tolerance(self):
+        # dolfin sets the Krylov parameters in "krylov_solver", firedrake in the PETSc options.
+        rtol = (self.adj_kwargs.get("krylov_solver") or {}).get("relative_tolerance")
+        if rtol is None:
+            rtol = (self.adj_kwargs.get("solver_parameters") or {}).get("ksp_rtol")
+        return self.default_relative_tolerance if rtol is None else rtol
+
+    def _create_matrix_free_solver(self, form, bcs, adjoint=False):
+        """Creates a Krylov solver that applies the operator of the bilinear form `form`
+        by assembling its action, without assembling the matrix.
+
+        If the block has a preconditioner form (`matrix_free_pc`), it is assembled with
+        the checkpointed coefficients and used as preconditioner matrix.
+        The adjoint of the preconditioner form is used if `adjoint` is True.
+        """
+        P = None
+        if self.matrix_free_pc is not None:
+            P_form = self._replace_form(self.matrix_free_pc)
+            if adjoint:
+                P_form = self.backend.adjoint(P_form)
+            P = self.compat.assemble_adjoint_value(P_form, bcs=bcs, **self.assemble_kwargs)
+        return self.compat.create_matrix_free_solver(form, bcs, P, *self.adj_args,
+                                                     relative_tolerance=self._inexact_relative_tolerance(),
+                                                     **self.adj_kwargs)
+
+    def _solve_adj_eq(self, solve, dFdu_adj_form, dJdu, bcs, compute_bdy):
+        """Solves the adjoint equation for one or several (stacked) right-hand sides.
+
+        Args:
+            solve (function): Applies the inverse of the assembled adjoint operator, `solve(x, b)`.
+            dFdu_adj_form (ufl.Form): The adjoint form of dF/du.
+            dJdu: The right-hand side. Modified in-place by applying `bcs`.
+            bcs (list): The homogenized boundary conditions.
+            compute_bdy (bool): If True, compute the adjoint solution on the boundary.
+
+        """
+        if is_stacked(dJdu):
+            solutions = [(None, None) if b is None else self._solve_adj_eq(solve, dFdu_adj_form, b, bcs, compute_bdy)
+                         for b in dJdu]
+            return StackedValues(sol for sol, _ in solutions), StackedValues(bdy for _, bdy in solutions)
 
+        dJdu_copy = dJdu.copy()
         for bc in bcs:
             bc.apply(dJdu)
 
         adj_sol = self.compat.create_function(self.function_space)
-        self.compat.linalg_solve(dFdu, adj_sol.vector(), dJdu, *self.adj_args, **self.adj_kwargs)
+        with trace_event("solve", "backend"):
+            solve(adj_sol.vector(), dJdu)
 
         adj_sol_bdy = None
         if compute_bdy:
@@ -185,6 +341,16 @@ class GenericSolveBlock(Block):
         F_form = prepared["form"]
         adj_sol = prepared["adj_sol"]
         adj_sol_bdy = prepared["adj_sol_bdy"]
+        if is_stacked(adj_sol):
+            return StackedValues(
+                None if sol is None else fused[idx] if idx in fused
+                else self._adj_component(F_form, sol, sol_bdy, block_variable)
+                for sol, sol_bdy, fused in zip(adj_sol, adj_sol_bdy, prepared["fused"]))
+        if idx in prepared["fused"]:
+            return prepared["fused"][idx]
+        return self._adj_component(F_form, adj_sol, adj_sol_bdy, block_variable)
+
+    def _adj_component(self, F_form, adj_sol, adj_sol_bdy, block_variable):
         c = block_variable.output
         c_rep = block_variable.saved_output
 
@@ -213,7 +379,8 @@ class GenericSolveBlock(Block):
         dFdm = -self.backend.derivative(F_form, c_rep, trial_function)
         dFdm = self.backend.adjoint(dFdm)
         dFdm = dFdm * adj_sol
-        dFdm = self.compat.assemble_adjoint_value(dFdm, **self.assemble_kwargs)
+        with trace_event("assemble", "backend"):
+            dFdm = self.compat.assemble_adjoint_value(dFdm, **self.assemble_kwargs)
         if isinstance(c, self.compat.ExpressionType):
             return [[dFdm, c_fs]]
         else:
@@ -240,10 +407,51 @@ class GenericSolveBlock(Block):
         dFdu = prepared["dFdu"]
         V = self.get_outputs()[idx].output.function_space()
 
+        stacked = [t for t in tlm_inputs if is_stacked(t)]
+        if len(stacked) <= 0:
+            dFdm, bcs = self._assemble_tlm_rhs(F_form, dFdu, tlm_inputs)
+            dudm = self.backend.Function(V)
+            A, solver = self._create_tlm_solver(dFdu, bcs)
+            return self._assemble_and_solve_tlm_eq(A, dFdm, dudm, bcs, solver=solver)
+
+        dFdms = StackedValues()
+        bcs = StackedValues()
+        dudms = StackedValues()
+        for seed in range(len(stacked[0])):
+            seed_inputs = [seed_value(t, seed) for t in tlm_inputs]
+            if all(t is None for t in seed_inputs):
+                dFdms.append(None)
+                bcs.append(None)
+                dudms.append(None)
+                continue
+            dFdm, seed_bcs = self._assemble_tlm_rhs(F_form, dFdu, seed_inputs)
+            dFdms.append(dFdm)
+            bcs.append(seed_bcs)
+            dudms.append(self.backend.Function(V))
+
+        # The boundary values do not affect the assembled operator.
+        A, solver = self._create_tlm_solver(dFdu, self._homogenize_bcs())
+        return self._assemble_and_solve_tlm_eq(A, dFdms, dudms, bcs, solver=solver)
+
+    def _create_tlm_solver(self, dFdu, bcs):
+        """Returns the assembled tlm operator and a solver for it.
+
+        Either may be None: the operator is not assembled by matrix-free solves,
+        and the solver is created by :meth:`_assemble_and_solve_tlm_eq` if it is None.
+        """
+        if self.matrix_free:
+            return None, self._create_matrix_free_solver(dFdu, self._homogenize_bcs())
+        with trace_event("assemble", "backend"):
+            return self.compat.assemble_adjoint_value(dFdu, bcs=bcs, **self.assemble_kwargs), None
+
+    def _assemble_tlm_rhs(self, F_form, dFdu, tlm_inputs):
+        """Assembles the right-hand side of the tlm equation for the given tlm inputs.
+
+        Returns the assembled right-hand side and the boundary conditions of the tlm solution.
+        """
         bcs = []
         dFdm = 0.
-        for block_variable in self.get_dependencies():
-            tlm_value = block_variable.tlm_value
+        for block_variable, tlm_value in zip(self.get_dependencies(), tlm_inputs):
             c = block_variable.output
             c_rep = block_variable.saved_output
 
@@ -270,13 +478,23 @@ class GenericSolveBlock(Block):
             dFdm = self.backend.inner(self.backend.Constant(numpy.zeros(v.ufl_shape)), v) * self.backend.dx
 
         dFdm = ufl.algorithms.expand_derivatives(dFdm)
-        dFdm = self.compat.assemble_adjoint_value(dFdm)
-        dudm = self.backend.Function(V)
-        return self._assemble_and_solve_tlm_eq(
-            self.compat.assemble_adjoint_value(dFdu, bcs=bcs, **self.assemble_kwargs), dFdm, dudm, bcs)
+        with trace_event("assemble", "backend"):
+            dFdm = self.compat.assemble_adjoint_value(dFdm)
+        return dFdm, bcs
 
-    def _assemble_and_solve_tlm_eq(self, dFdu, dFdm, dudm, bcs):
-        return self._assembled_solve(dFdu, dFdm, dudm, bcs)
+    def _assemble_and_solve_tlm_eq(self, dFdu, dFdm, dudm, bcs, solver=None):
+        """Solves the tlm equation with the assembled operator `dFdu`, or with `solver` if given.
+
+        If `dFdm`, `dudm` and `bcs` are :class:`StackedValues`, one solver is set up
+        and reused for every right-hand side.
+        """
+        if is_stacked(dFdm):
+            if solver is None:
+                solver = self.compat.create_linear_solver(dFdu)
+            return StackedValues(
+                None if rhs is None else self._assembled_solve(dFdu, rhs, func, seed_bcs, solver=solver)
+                for rhs, func, seed_bcs in zip(dFdm, dudm, bcs))
+        return self._assembled_solve(dFdu, dFdm, dudm, bcs, solver=solver)
 
     def _assemble_soa_eq_rhs(self, dFdu_form, adj_sol, hessian_input, d2Fdu2):
         # Start piecing together the rhs of the soa equation
@@ -307,7 +525,8 @@ class GenericSolveBlock(Block):
 
         b_form = ufl.algorithms.expand_derivatives(b_form)
         if len(b_form.integrals()) > 0:
-            b -= self.compat.assemble_adjoint_value(b_form)
+            with trace_event("assemble", "backend"):
+                b -= self.compat.assemble_adjoint_value(b_form)
 
         return b
 
@@ -343,6 +562,9 @@ class GenericSolveBlock(Block):
         adj_sol = self.adj_sol
         if adj_sol is None:
             raise RuntimeError("Hessian computation was run before adjoint.")
+        if is_stacked(adj_sol):
+            raise NotImplementedError("Hessian computation after an adjoint sweep with several seeds "
+                                      "is not supported.")
         bdy = self._should_compute_boundary_adjoint(relevant_dependencies)
         adj_sol2, adj_sol2_bdy = self._assemble_and_solve_soa_eq(dFdu_form, adj_sol, hessian_input, d2Fdu2, bdy)
 
@@ -351,6 +573,9 @@ class GenericSolveBlock(Block):
         r["adj_sol2_bdy"] = adj_sol2_bdy
         r["form"] = F_form
         r["adj_sol"] = adj_sol
+        r["fused"] = self._assemble_fused({
+            idx: -self._hessian_form(F_form, adj_sol, adj_sol2, block_variable, relevant_dependencies)[0]
+            for idx, block_variable in self._fusable_dependencies(F_form, relevant_dependencies)})
         return r
 
     def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
@@ -359,14 +584,13 @@ class GenericSolveBlock(Block):
         if c == self.func and not self.linear:
             return None
 
+        if idx in prepared["fused"]:
+            return prepared["fused"][idx]
+
         adj_sol2 = prepared["adj_sol2"]
         adj_sol2_bdy = prepared["adj_sol2_bdy"]
         F_form = prepared["form"]
         adj_sol = prepared["adj_sol"]
-        fwd_block_variable = self.get_outputs()[0]
-        tlm_output = fwd_block_variable.tlm_value
-
-        c_rep = block_variable.saved_output
 
         # If m = DirichletBC then d^2F(u,m)/dm^2 = 0 and d^2F(u,m)/dudm = 0,
         # so we only have the term dF(u,m)/dm * adj_sol2
@@ -374,6 +598,27 @@ class GenericSolveBlock(Block):
             tmp_bc = self.compat.create_bc(c, value=self.compat.extract_subfunction(adj_sol2_bdy, c.function_space()))
             return [tmp_bc]
 
+        hessian_form, W = self._hessian_form(F_form, adj_sol, adj_sol2, block_variable, relevant_dependencies)
+        hessian_output = 0
+        if not hessian_form.empty():
+            hessian_output -= self.compat.assemble_adjoint_value(hessian_form)
+
+        if isinstance(c, self.compat.ExpressionType):
+            return [(hessian_output, W)]
+        else:
+            return hessian_output
+
+    def _hessian_form(self, F_form, adj_sol, adj_sol2, block_variable, relevant_dependencies):
+        """Returns the form of the Hessian component of the dependency `block_variable`,
+        and the function space W of its test function.
+
+        The Hessian component is minus the assembled form.
+        """
+        c = block_variable.output
+        c_rep = block_variable.saved_output
+        fwd_block_variable = self.get_outputs()[0]
+        tlm_output = fwd_block_variable.tlm_value
+
         if isinstance(c_rep, self.backend.Constant):
             mesh = self.compat.extract_mesh_from_form(F_form)
             W = c._ad_function_space(mesh)
@@ -425,15 +670,7 @@ class GenericSolveBlock(Block):
             else:
                 d2Fdm2 += ufl.algorithms.expand_derivatives(self.backend.derivative(dFdm_adj, c2_rep, tlm_input))
 
-        hessian_form = ufl.algorithms.expand_derivatives(d2Fdm2 + dFdm_adj2 + d2Fdudm)
-        hessian_output = 0
-        if not hessian_form.empty():
-            hessian_output -= self.compat.assemble_adjoint_value(hessian_form)
-
-        if isinstance(c, self.compat.ExpressionType):
-            return [(hessian_output, W)]
-        else:
-            return hessian_output
+        return ufl.algorithms.expand_derivatives(d2Fdm2 + dFdm_adj2 + d2Fdudm), W
 
     def prepare_recompute_component(self, inputs, relevant_outputs):
         return self._replace_recompute_form()
@@ -450,13 +687,18 @@ class GenericSolveBlock(Block):
         return lhs, rhs, func, bcs
 
     def _forward_solve(self, lhs, rhs, func, bcs):
-        self.backend.solve(lhs == rhs, func, bcs, *self.forward_args, **self.forward_kwargs)
+        with trace_event("solve", "backend"):
+            self.backend.solve(lhs == rhs, func, bcs, *self.forward_args, **self.forward_kwargs)
         return func
 
-    def _assembled_solve(self, lhs, rhs, func, bcs, **kwargs):
+    def _assembled_solve(self, lhs, rhs, func, bcs, solver=None, **kwargs):
         for bc in bcs:
             bc.apply(rhs)
-        self.backend.solve(lhs, func.vector(), rhs, **kwargs)
+        with trace_event("solve", "backend"):
+            if solver is None:
+                self.backend.solve(lhs, func.vector(), rhs, **kwargs)
+            else:
+                solver.solve(func.vector(), rhs)
         return func
 
     def recompute_component(self, inputs, block_variable, idx, prepared):
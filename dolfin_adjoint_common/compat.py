@@ -1,9 +1,38 @@
+import weakref
+
+import numpy
+import ufl
+
 
 class Compat:
     # A bag class to act as a namespace for compat.
     pass
 
 
+def _cached_fused(cache, spaces, build):
+    """Returns the objects `build()` creates for fusing the assembly over `spaces`, cached in `cache`.
+
+    Dolfin creates a new python FunctionSpace every time a Function returns its function space,
+    so the entries are keyed by the wrapped (C++) objects, and are dropped when any of these
+    is garbage collected, before its id can be reused.
+    """
+    if cache is None:
+        return build()
+    owners = [getattr(V, "_cpp_object", V) for V in spaces]
+    key = tuple(id(owner) for owner in owners)
+    fused = cache.get(key)
+    if fused is None:
+        fused = build()
+        try:
+            for owner in owners:
+                weakref.finalize(owner, cache.pop, key, None)
+        except TypeError:
+            # The function spaces can not be weakly referenced, so the objects can not be cached.
+            return fused
+        cache[key] = fused
+    return fused
+
+
 def compat(backend):
     compat = Compat()
 
@@ -133,6 +162,79 @@ def compat(backend):
 
         compat.linalg_solve = backend.solve
 
+        def _loosen_rtol(solver_parameters, relative_tolerance):
+            solver_parameters = dict(solver_parameters)
+            if relative_tolerance is not None:
+                rtol = solver_parameters.get("ksp_rtol", relative_tolerance)
+                solver_parameters["ksp_rtol"] = max(rtol, relative_tolerance)
+            return solver_parameters
+
+        def create_linear_solver(A, *args, relative_tolerance=None, **kwargs):
+            """Create a solver for the assembled operator A that can be reused
+            for several right-hand sides, without setting up the solver
+            (e.g. computing a factorization) more than once.
+
+            Takes the same arguments as linalg_solve. If `relative_tolerance` is given,
+            the relative tolerance of the Krylov solver is loosened to at least this value.
+            Returns an object with a `solve(x, b)` method.
+            """
+            solver_kwargs = {}
+            for key in ("P", "solver_parameters", "nullspace", "transpose_nullspace",
+                        "near_nullspace", "options_prefix"):
+                if key in kwargs:
+                    solver_kwargs[key] = kwargs[key]
+            if relative_tolerance is not None:
+                solver_kwargs["solver_parameters"] = _loosen_rtol(kwargs.get("solver_parameters", {}),
+                                                                  relative_tolerance)
+            return backend.LinearSolver(A, **solver_kwargs)
+        compat.create_linear_solver = create_linear_solver
+
+        def create_matrix_free_solver(form, bcs, P, *args, relative_tolerance=None, **kwargs):
+            """Create a Krylov solver for the bilinear form `form` that never
+            assembles the operator matrix. The operator is applied by assembling
+            the action of `form` on the current Krylov vector.
+
+            `P` is an assembled preconditioner matrix, or None. If None, the solver
+            is unpreconditioned unless the solver parameters choose a preconditioner
+            (e.g. a python preconditioner that only needs the action).
+            Takes the same arguments as create_linear_solver. Returns an object
+            with a `solve(x, b)` method.
+            """
+            solver_parameters = _loosen_rtol(kwargs.get("solver_parameters", {}), relative_tolerance)
+            solver_parameters.pop("mat_type", None)
+            solver_parameters.setdefault("ksp_type", "gmres")
+            if P is None:
+                solver_parameters.setdefault("pc_type", "none")
+            A = backend.assemble(form, bcs=bcs, mat_type="matfree")
+            solver_kwargs = {"P": P, "solver_parameters": solver_parameters}
+            for key in ("nullspace", "transpose_nullspace", "near_nullspace", "options_prefix"):
+                if key in kwargs:
+                    solver_kwargs[key] = kwargs[key]
+            return backend.LinearSolver(A, **solver_kwargs)
+        compat.create_matrix_free_solver = create_matrix_free_solver
+
+        def assemble_fused(forms, spaces, cache=None):
+            """Assembles several linear forms over the same mesh in one pass over the cells.
+
+            The test function of `forms[i]` must be in `spaces[i]`. The forms are combined
+            into one form on the mixed space of `spaces`, and the assembled vector is split
+            into one vector per form. If `cache` (a dict) is given, the mixed space is stored
+            in it and reused for later calls with the same spaces.
+
+            Returns a list with the assembled vector of each form.
+            """
+            W = _cached_fused(cache, spaces, lambda: backend.MixedFunctionSpace(spaces))
+            tests = backend.TestFunctions(W)
+            fused_form = sum(ufl.replace(form, {form.arguments()[0]: v}) for form, v in zip(forms, tests))
+            w = backend.assemble(fused_form)
+            outputs = []
+            for V, sub in zip(spaces, w.split()):
+                output = backend.Function(V)
+                output.dat.data[:] = sub.dat.data_ro
+                outputs.append(output.vector())
+            return outputs
+        compat.assemble_fused = assemble_fused
+
         class Expression(object):
             pass
         compat.Expression = Expression
@@ -318,6 +420,111 @@ def compat(backend):
             return backend.solve(A, x, b, *args)
         compat.linalg_solve = linalg_solve
 
+        def create_linear_solver(A, *args, relative_tolerance=None, **kwargs):
+            """Create a solver for the assembled operator A that can be reused
+            for several right-hand sides, without setting up the solver
+            (e.g. computing a factorization) more than once.
+
+            Takes the same arguments as linalg_solve, and throws away kwargs.
+            If `relative_tolerance` is given, it is used as the relative tolerance of a Krylov solver.
+            Returns an object with a `solve(x, b)` method.
+            """
+            method = args[0] if len(args) >= 1 else "default"
+            if method == "lu":
+                method = "default"
+            if method in backend.lu_solver_methods():
+                return backend.LUSolver(A, method)
+            solver = backend.KrylovSolver(A, *args)
+            if relative_tolerance is not None:
+                solver.parameters["relative_tolerance"] = relative_tolerance
+            return solver
+        compat.create_linear_solver = create_linear_solver
+
+        class MatrixFreeOperator(backend.LinearOperator):
+            """Applies the operator of a bilinear form by assembling its action,
+            without assembling the matrix.
+
+            The rows of the Dirichlet boundary dofs act as the identity,
+            as they do after applying homogeneous `bcs` to the assembled matrix.
+            """
+            def __init__(self, form, bcs):
+                self.u = backend.Function(form.arguments()[1].function_space())
+                self.action = backend.action(form, self.u)
+                size = self.u.vector().local_size()
+                dofs = set()
+                for bc in bcs:
+                    dofs.update(dof for dof in bc.get_boundary_values() if dof < size)
+                self.bc_dofs = numpy.array(sorted(dofs), dtype=numpy.intc)
+                backend.LinearOperator.__init__(self, self.u.vector(), self.u.vector())
+
+            def size(self, dim):
+                return self.u.function_space().dim()
+
+            def mult(self, x, y):
+                self.u.vector().set_local(x.get_local())
+                self.u.vector().apply("insert")
+                backend.assemble(self.action, tensor=y)
+                if len(self.bc_dofs) > 0:
+                    values = y.get_local()
+                    values[self.bc_dofs] = x.get_local()[self.bc_dofs]
+                    y.set_local(values)
+                    y.apply("insert")
+
+        def create_matrix_free_solver(form, bcs, P, *args, relative_tolerance=None, **kwargs):
+            """Create a Krylov solver for the bilinear form `form` that never
+            assembles the operator matrix. The operator is applied by assembling
+            the action of `form` on the current Krylov vector.
+
+            `P` is an assembled preconditioner matrix, or None for an unpreconditioned solver.
+            Takes the same arguments as linalg_solve. Direct solver methods are replaced
+            by GMRES, and the `krylov_solver` parameters in kwargs are applied.
+            If `relative_tolerance` is given, the relative tolerance is loosened to at least this value.
+            Returns an object with a `solve(x, b)` method.
+            """
+            method = args[0] if len(args) >= 1 else "gmres"
+            if method == "lu" or method in backend.lu_solver_methods():
+                method = "gmres"
+            A = MatrixFreeOperator(form, bcs)
+            if P is None:
+                solver = backend.PETScKrylovSolver(method, "none")
+                solver.set_operator(A)
+            else:
+                preconditioner = args[1] if len(args) >= 2 else "default"
+                solver = backend.PETScKrylovSolver(method, preconditioner)
+                solver.set_operators(A, P)
+            krylov_parameters = kwargs.get("krylov_solver", {})
+            solver.parameters.update(krylov_parameters)
+            if relative_tolerance is not None:
+                rtol = krylov_parameters.get("relative_tolerance", relative_tolerance)
+                solver.parameters["relative_tolerance"] = max(rtol, relative_tolerance)
+            return solver
+        compat.create_matrix_free_solver = create_matrix_free_solver
+
+        def assemble_fused(forms, spaces, cache=None):
+            """Assembles several linear forms over the same mesh in one pass over the cells.
+
+            The test function of `forms[i]` must be in `spaces[i]`. The forms are combined
+            into one form on the mixed space of `spaces`, and the assembled vector is split
+            into one vector per form. If `cache` (a dict) is given, the mixed space and the
+            function assigner that splits the vector are stored in it and reused for later
+            calls with the same spaces.
+
+            Returns a list with the assembled vector of each form.
+            """
+            def build():
+                element = backend.MixedElement([V.ufl_element() for V in spaces])
+                W = backend.FunctionSpace(spaces[0].mesh(), element)
+                return W, backend.FunctionAssigner(list(spaces), W)
+
+            W, assigner = _cached_fused(cache, spaces, build)
+            tests = backend.TestFunctions(W)
+            fused_form = sum(ufl.replace(form, {form.arguments()[0]: v}) for form, v in zip(forms, tests))
+            w = backend.Function(W, backend.assemble(fused_form))
+            outputs = [backend.Function(V) for V in spaces]
+            assigner.assign(outputs, w)
+            return [output.vector() for output in outputs]
+        compat.assemble_fused = assemble_fused
+
         def type_cast_function(obj, cls):
             """Type casts Function object `obj` to an instance of `cls`.
 
@@ -53,10 +53,20 @@ from pyadjoint import (Tape, set_working_tape, get_working_tape,
                        ReducedFunctional,
                        taylor_test, taylor_to_dict,
                        compute_gradient, compute_hessian,
-                       AdjFloat, Control, minimize, maximize, MinimizationProblem,
-                       IPOPTSolver, ROLSolver, InequalityConstraint, EqualityConstraint,
-                       MoolaOptimizationProblem, print_optimization_methods,
+                       AdjFloat, Control, InequalityConstraint, EqualityConstraint,
                        stop_annotating)
 
+# The optimization backends are imported on first use, see pyadjoint.__getattr__.
+_optimization_names = ("minimize", "maximize", "MinimizationProblem", "IPOPTSolver", "ROLSolver",
+                       "MoolaOptimizationProblem", "print_optimization_methods")
+
+
+def __getattr__(name):
+    if name not in _optimization_names:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    return getattr(pyadjoint, name)
+
 
 set_working_tape(Tape())
+
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_optimization_names)
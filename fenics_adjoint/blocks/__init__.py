@@ -9,3 +9,4 @@ from .lu_solver import LUSolveBlock, LUSolveBlockHelper
 from .function_assigner import FunctionAssignerBlock
 from fenics_adjoint.blocks.function import FunctionEvalBlock, FunctionSplitBlock, FunctionMergeBlock
 from .petsc_krylov_solver import PETScKrylovSolveBlock, PETScKrylovSolveBlockHelper
+from .interpolation import InterpolateBlock
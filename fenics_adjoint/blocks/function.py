@@ -1,39 +1,129 @@
 import backend
 from pyadjoint import Block
 import numpy
+from ..riesz import _mesh_state
+
+
+def observation_matrix(V, points):
+    """Returns the sparse matrix that evaluates functions in `V` at `points`, on this process.
+
+    The cells containing the points are located with the bounding box tree of the local mesh.
+    Each point is evaluated by the process of lowest rank whose mesh contains it, so that every
+    point is counted once. The columns of the matrix correspond to `dofs`, the global indices
+    of the dofs of the cells that contain the points evaluated on this process.
+    Row ``i * value_size + j`` holds component j of the basis functions at ``points[i]``,
+    so that the point values of a Function u are the sum over all processes of
+    ``M.dot(u.vector().gather(dofs))``.
+
+    Args:
+        V (FunctionSpace): The function space.
+        points (numpy.ndarray): An array of shape (number of points, geometric dimension).
+
+    Returns:
+        tuple: The observation matrix M (scipy.sparse.csr_matrix) and the array `dofs`.
+
+    """
+    # scipy is imported here, and not at the top of the module, to keep it out of the import of fenics_adjoint.
+    import scipy.sparse
+    mesh = V.mesh()
+    comm = mesh.mpi_comm()
+    tree = mesh.bounding_box_tree()
+    element = V.element()
+    dofmap = V.dofmap()
+    local_to_global = dofmap.tabulate_local_to_global_dofs()
+    value_size = V.ufl_element().value_size()
+    space_dimension = element.space_dimension()
+
+    points = [numpy.asarray(point, dtype=float) for point in points]
+    cells = numpy.array([tree.compute_first_entity_collision(backend.Point(point)) for point in points], dtype=int)
+    found = numpy.stack(comm.allgather(cells < mesh.num_cells())) if len(points) > 0 else None
+
+    rows = []
+    cols = []
+    values = []
+    for i, (point, cell_idx) in enumerate(zip(points, cells.tolist())):
+        if not found[:, i].any():
+            raise ValueError("The point {} is not inside the mesh.".format(point))
+        if numpy.argmax(found[:, i]) != comm.rank:
+            continue
+        cell = backend.Cell(mesh, cell_idx)
+        basis = element.evaluate_basis_all(point, cell.get_coordinate_dofs(), cell.orientation())
+        basis = basis.reshape(space_dimension, value_size)
+        for j in range(value_size):
+            rows.append(numpy.full(space_dimension, i * value_size + j))
+            cols.append(local_to_global[dofmap.cell_dofs(cell_idx)])
+            values.append(basis[:, j])
+
+    if len(rows) <= 0:
+        return scipy.sparse.csr_matrix((len(points) * value_size, 0)), numpy.zeros(0, dtype=numpy.uintc)
+    dofs, cols = numpy.unique(numpy.concatenate(cols), return_inverse=True)
+    matrix = scipy.sparse.csr_matrix((numpy.concatenate(values), (numpy.concatenate(rows), cols)),
+                                     shape=(len(points) * value_size, len(dofs)))
+    return matrix, dofs.astype(numpy.uintc)
 
 
 class FunctionEvalBlock(Block):
+    """Evaluates a Function at a point, or at each point of an array of points.
+
+    The evaluation is linear, and is computed as a product with a sparse observation matrix
+    (see :func:`observation_matrix`), summed over the processes. The matrix is reused for the
+    recomputations, and the adjoint, tlm and hessian evaluations, until the mesh is moved.
+    """
     def __init__(self, func, coords):
         super().__init__()
         self.add_dependency(func)
         self.coords = coords
+        self._observation = None
+
+    def observation_matrix(self, V):
+        """Returns the observation matrix of the points of the block, and its global dof indices."""
+        mesh_state = _mesh_state(V)
+        if self._observation is None or self._observation[0] != mesh_state:
+            points = numpy.reshape(self.coords, (-1, V.mesh().geometry().dim()))
+            self._observation = (mesh_state, observation_matrix(V, points))
+        return self._observation[1]
+
+    def evaluate(self, func):
+        """Returns the values of `func` at the points of the block."""
+        V = func.function_space()
+        matrix, dofs = self.observation_matrix(V)
+        values = V.mesh().mpi_comm().allreduce(matrix.dot(func.vector().gather(dofs)))
+        value_shape = V.ufl_element().value_shape()
+        if numpy.ndim(self.coords) > 1:
+            return values.reshape((len(self.coords),) + value_shape)
+        if len(value_shape) <= 0:
+            return float(values[0])
+        return values.reshape(value_shape)
+
+    def _adjoint_action(self, V, adj_input):
+        matrix, dofs = self.observation_matrix(V)
+        comm = V.mesh().mpi_comm()
+        # The contributions to dofs owned by other processes are sent to them.
+        start, end = V.dofmap().ownership_range()
+        values = numpy.zeros(end - start)
+        for all_dofs, contributions in zip(comm.allgather(dofs),
+                                           comm.allgather(matrix.T.dot(numpy.ravel(adj_input)))):
+            owned = (all_dofs >= start) & (all_dofs < end)
+            numpy.add.at(values, all_dofs[owned].astype(int) - start, contributions[owned])
+        adj_vec = backend.Function(V).vector()
+        adj_vec.set_local(values)
+        adj_vec.apply("insert")
+        return adj_vec
 
     def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
-        p = backend.Point(numpy.array(self.coords))
-        V = inputs[0].function_space()
-        dofs = V.dofmap()
-        mesh = V.mesh()
-        element = V.element()
-        visited = []
-        adj_vec = backend.Function(V).vector()
+        return self._adjoint_action(inputs[0].function_space(), adj_inputs[0])
 
-        for cell_idx in range(len(mesh.cells())):
-            cell = backend.Cell(mesh, cell_idx)
-            if cell.contains(p):
-                for ref_dof, dof in enumerate(dofs.cell_dofs(cell_idx)):
-                    if dof in visited:
-                        continue
-                    visited.append(dof)
-                    basis = element.evaluate_basis(ref_dof,
-                                                   p.array(),
-                                                   cell.get_coordinate_dofs(),
-                                                   cell.orientation())
-                    adj_vec[dof] = basis.dot(adj_inputs[idx])
-        return adj_vec
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        if tlm_inputs[0] is None:
+            return None
+        return self.evaluate(tlm_inputs[0])
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        return self._adjoint_action(inputs[0].function_space(), hessian_inputs[0])
 
     def recompute_component(self, inputs, block_variable, idx, prepared):
-        return inputs[0](self.coords)
+        return self.evaluate(inputs[0])
 
 
 class FunctionSplitBlock(Block):
@@ -0,0 +1,149 @@
+import weakref
+
+import backend
+import numpy
+from pyadjoint import Block
+from ..riesz import _mesh_state
+
+
+# Elements whose degrees of freedom are point evaluations, for which interpolation
+# can be written as evaluating the basis functions of the source space at the dof coordinates.
+point_evaluation_families = ("Lagrange", "Discontinuous Lagrange", "Q", "DQ")
+
+# Interpolation matrices, with the states of the meshes they were built for,
+# keyed by the ids of the (C++) source and target function space objects.
+_interpolation_matrices = {}
+
+
+def interpolation_matrix(V_from, V_to):
+    """Returns the sparse matrix I that interpolates functions in `V_from` into `V_to`.
+
+    The dofs of `V_to` must be point evaluations, see `point_evaluation_families`.
+    If the spaces are on the same mesh, the basis functions of `V_from` are evaluated
+    cell by cell, otherwise the cells containing the dof coordinates of `V_to` are
+    located with the bounding box tree of the source mesh.
+    The matrix is built with the global dimensions and dof indices of the spaces, so it is only
+    valid in serial runs. The interpolant of u has the dof values ``I.dot(u.vector().get_local())``.
+    The matrices are cached and reused for later interpolations between the same spaces.
+    They are rebuilt if either mesh has been moved since, and are dropped when either
+    function space is garbage collected.
+
+    Args:
+        V_from (FunctionSpace): The function space to interpolate from.
+        V_to (FunctionSpace): The function space to interpolate into.
+
+    Returns:
+        scipy.sparse.csr_matrix: The interpolation matrix.
+
+    """
+    # A new python FunctionSpace is created every time a dolfin Function returns its function space,
+    # but the wrapped C++ object stays the same.
+    owners = [getattr(V, "_cpp_object", V) for V in (V_from, V_to)]
+    key = tuple(id(owner) for owner in owners)
+    mesh_state = (_mesh_state(V_from), _mesh_state(V_to))
+    cached = _interpolation_matrices.get(key)
+    if cached is None:
+        try:
+            for owner in owners:
+                weakref.finalize(owner, _interpolation_matrices.pop, key, None)
+        except TypeError:
+            # The function spaces can not be weakly referenced, so the matrix can not be cached.
+            return _build_interpolation_matrix(V_from, V_to)
+    if cached is None or cached[0] != mesh_state:
+        cached = (mesh_state, _build_interpolation_matrix(V_from, V_to))
+        _interpolation_matrices[key] = cached
+    return cached[1]
+
+
+def _build_interpolation_matrix(V_from, V_to):
+    # scipy is imported here, and not at the top of the module, to keep it out of the import of fenics_adjoint.
+    import scipy.sparse
+    mesh_from = V_from.mesh()
+    mesh_to = V_to.mesh()
+    same_mesh = mesh_from.id() == mesh_to.id()
+    tree = None if same_mesh else mesh_from.bounding_box_tree()
+    element_from = V_from.element()
+    element_to = V_to.element()
+    dofmap_from = V_from.dofmap()
+    dofmap_to = V_to.dofmap()
+    value_size = V_from.ufl_element().value_size()
+    space_dimension = element_from.space_dimension()
+
+    # The value component that each dof of V_to evaluates.
+    component = numpy.zeros(V_to.dim(), dtype=int)
+    for i in range(V_to.num_sub_spaces()):
+        component[V_to.sub(i).dofmap().dofs()] = i
+
+    visited = numpy.zeros(V_to.dim(), dtype=bool)
+    rows = []
+    cols = []
+    values = []
+    for cell in backend.cells(mesh_to):
+        coordinates = element_to.tabulate_dof_coordinates(cell)
+        for x, dof in zip(coordinates, dofmap_to.cell_dofs(cell.index())):
+            if visited[dof]:
+                continue
+            visited[dof] = True
+            if same_mesh:
+                cell_from = cell
+            else:
+                cell_idx = tree.compute_first_entity_collision(backend.Point(x))
+                if cell_idx >= mesh_from.num_cells():
+                    raise ValueError("The point {} is not inside the mesh of the source space.".format(x))
+                cell_from = backend.Cell(mesh_from, cell_idx)
+            basis = element_from.evaluate_basis_all(x, cell_from.get_coordinate_dofs(), cell_from.orientation())
+            rows.append(numpy.full(space_dimension, dof))
+            cols.append(dofmap_from.cell_dofs(cell_from.index()))
+            values.append(basis.reshape(space_dimension, value_size)[:, component[dof]])
+
+    shape = (V_to.dim(), V_from.dim())
+    if len(rows) <= 0:
+        return scipy.sparse.csr_matrix(shape)
+    return scipy.sparse.csr_matrix((numpy.concatenate(values), (numpy.concatenate(rows), numpy.concatenate(cols))),
+                                   shape=shape)
+
+
+class InterpolateBlock(Block):
+    """Interpolates a Function into a function space.
+
+    Interpolation is linear, and is applied as a product with the sparse interpolation
+    matrix I of the two spaces (see :func:`interpolation_matrix`):
+    the recomputation is y = I x, the tlm is I dx and the adjoint is I^T lambda.
+    The matrix is looked up at every evaluation, so that it follows the movement of the meshes.
+    """
+    def __init__(self, func, V):
+        super().__init__()
+        self.add_dependency(func)
+        self.V = V
+
+    def __str__(self):
+        return "interpolate({}, {})".format(self.get_dependencies()[0], self.V)
+
+    def apply(self, func):
+        """Returns the interpolant of `func` in the function space of the block."""
+        output = backend.Function(self.V)
+        matrix = interpolation_matrix(func.function_space(), self.V)
+        output.vector().set_local(matrix.dot(func.vector().get_local()))
+        output.vector().apply("insert")
+        return output
+
+    def _apply_transpose(self, V, vector):
+        output = backend.Function(V).vector()
+        output.set_local(interpolation_matrix(V, self.V).T.dot(vector.get_local()))
+        output.apply("insert")
+        return output
+
+    def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
+        return self._apply_transpose(inputs[0].function_space(), adj_inputs[0])
+
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        if tlm_inputs[0] is None:
+            return None
+        return self.apply(tlm_inputs[0])
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        return self._apply_transpose(inputs[0].function_space(), hessian_inputs[0])
+
+    def recompute_component(self, inputs, block_variable, idx, prepared):
+        return self.apply(inputs[0])
@@ -22,7 +22,6 @@ class LUSolveBlock(SolveLinearSystemBlock):
         self.method = kwargs.pop("lu_solver_method")
 
     def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy):
-        dJdu_copy = dJdu.copy()
         bcs = self._homogenize_bcs()
 
         solver = self.block_helper.adjoint_solver
@@ -40,17 +39,7 @@ class LUSolveBlock(SolveLinearSystemBlock):
             self.block_helper.adjoint_solver = solver
 
         solver.parameters.update(self.lu_solver_parameters)
-        [bc.apply(dJdu) for bc in bcs]
-
-        adj_sol = backend.Function(self.function_space)
-        solver.solve(adj_sol.vector(), dJdu)
-
-        adj_sol_bdy = None
-        if compute_bdy:
-            adj_sol_bdy = compat.function_from_vector(self.function_space, dJdu_copy - compat.assemble_adjoint_value(
-                backend.action(dFdu_adj_form, adj_sol)))
-
-        return adj_sol, adj_sol_bdy
+        return self._solve_adj_eq(solver.solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
 
     def _forward_solve(self, lhs, rhs, func, bcs, **kwargs):
         solver = self.block_helper.forward_solver
@@ -48,7 +48,6 @@ class PETScKrylovSolveBlock(SolveLinearSystemBlock):
         return r
 
     def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy):
-        dJdu_copy = dJdu.copy()
         bcs = self._homogenize_bcs()
 
         solver = self.block_helper.adjoint_solver
@@ -89,21 +88,19 @@ class PETScKrylovSolveBlock(SolveLinearSystemBlock):
             self.block_helper.adjoint_solver = solver
 
         solver.parameters.update(self.krylov_solver_parameters)
-        [bc.apply(dJdu) for bc in bcs]
-
-        if self._ad_nullspace is not None:
-            if self._ad_nullspace._ad_orthogonalized:
-                self._ad_nullspace.orthogonalize(dJdu)
-
-        adj_sol = backend.Function(self.function_space)
-        solver.solve(adj_sol.vector(), dJdu)
-
-        adj_sol_bdy = None
-        if compute_bdy:
-            adj_sol_bdy = compat.function_from_vector(self.function_space, dJdu_copy - compat.assemble_adjoint_value(
-                backend.action(dFdu_adj_form, adj_sol)))
-
-        return adj_sol, adj_sol_bdy
+        # The adjoint solver is reused, so the relative tolerance is always set
+        # to avoid keeping a tolerance loosened for an earlier inexact solve.
+        rtol = self.krylov_solver_parameters["relative_tolerance"]
+        solver.parameters["relative_tolerance"] = self._inexact_relative_tolerance(
+            self.default_relative_tolerance if rtol is None else rtol)
+
+        def solve(x, b):
+            if self._ad_nullspace is not None:
+                if self._ad_nullspace._ad_orthogonalized:
+                    self._ad_nullspace.orthogonalize(b)
+            solver.solve(x, b)
+
+        return self._solve_adj_eq(solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
 
     def _forward_solve(self, lhs, rhs, func, bcs, **kwargs):
         solver = self.block_helper.forward_solver
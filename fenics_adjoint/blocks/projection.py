@@ -1,9 +1,13 @@
 from . import SolveVarFormBlock
+from ..riesz import riesz_map
 
 
 class ProjectBlock(SolveVarFormBlock):
     def __init__(self, v, V, output, bcs=[], *args, **kwargs):
         mesh = kwargs.pop("mesh", None)
+        # Without boundary conditions or solver options, the projection solves with the
+        # cached mass matrix of V, see :func:`fenics_adjoint.riesz.riesz_map`.
+        self.use_riesz_map = mesh is None and len(bcs) <= 0 and len(args) <= 0 and len(kwargs) <= 0
         if mesh is None:
             mesh = V.mesh()
         dx = self.backend.dx(mesh)
@@ -13,3 +17,20 @@ class ProjectBlock(SolveVarFormBlock):
         L = self.backend.inner(w, v) * dx
 
         super(ProjectBlock, self).__init__(a == L, output, bcs, *args, **kwargs)
+
+    def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy=True):
+        if not self.use_riesz_map:
+            return super()._assemble_and_solve_adj_eq(dFdu_adj_form, dJdu, compute_bdy)
+        # The mass matrix is symmetric, so it is its own adjoint.
+        return self._solve_adj_eq(riesz_map(self.function_space).solve, dFdu_adj_form, dJdu, [], compute_bdy)
+
+    def _create_tlm_solver(self, dFdu, bcs):
+        if not self.use_riesz_map:
+            return super()._create_tlm_solver(dFdu, bcs)
+        return None, riesz_map(self.function_space)
+
+    def _forward_solve(self, lhs, rhs, func, bcs, **kwargs):
+        if not self.use_riesz_map:
+            return super()._forward_solve(lhs, rhs, func, bcs, **kwargs)
+        riesz_map(self.function_space).solve(func.vector(), self.backend.assemble(rhs))
+        return func
@@ -23,7 +23,8 @@ class SolveLinearSystemBlock(GenericSolveBlock):
             self.adj_args = self.forward_args
 
     def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy):
-        dJdu_copy = dJdu.copy()
+        if self.matrix_free:
+            return super()._assemble_and_solve_adj_eq(dFdu_adj_form, dJdu, compute_bdy)
         bcs = self._homogenize_bcs()
         if self.assemble_system:
             rhs_bcs_form = self.backend.inner(self.backend.Function(self.function_space),
@@ -35,18 +36,11 @@ class SolveLinearSystemBlock(GenericSolveBlock):
             A = self.compat.assemble_adjoint_value(dFdu_adj_form, **kwargs)
         if self.ident_zeros_tol is not None:
             A.ident_zeros(self.ident_zeros_tol)
-        [bc.apply(dJdu) for bc in bcs]
 
-        adj_sol = self.compat.create_function(self.function_space)
-        self.compat.linalg_solve(A, adj_sol.vector(), dJdu, *self.adj_args, **self.adj_kwargs)
-
-        adj_sol_bdy = None
-        if compute_bdy:
-            adj_sol_bdy = self.compat.function_from_vector(self.function_space,
-                                                           dJdu_copy - self.compat.assemble_adjoint_value(
-                                                               self.backend.action(dFdu_adj_form, adj_sol)))
-
-        return adj_sol, adj_sol_bdy
+        solver = self.compat.create_linear_solver(A, *self.adj_args,
+                                                  relative_tolerance=self._inexact_relative_tolerance(),
+                                                  **self.adj_kwargs)
+        return self._solve_adj_eq(solver.solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
 
     def _forward_solve(self, lhs, rhs, func, bcs, **kwargs):
         if self.assemble_system:
@@ -98,19 +92,21 @@ class SolveVarFormBlock(GenericSolveBlock):
                         adj_args.append(solver_parameters["newton_solver"]["preconditioner"])
                     self.adj_args = tuple(adj_args)
             self.adj_kwargs = solver_parameters
+            if "newton_solver" in solver_parameters:
+                # The adjoint and tlm equations are solved like the linear systems of the Newton solver.
+                self.adj_kwargs = dict(solver_parameters)
+                for key in ("krylov_solver", "lu_solver"):
+                    if key in solver_parameters["newton_solver"]:
+                        self.adj_kwargs.setdefault(key, solver_parameters["newton_solver"][key])
 
     def _assemble_and_solve_adj_eq(self, dFdu_adj_form, dJdu, compute_bdy=True):
-        dJdu_copy = dJdu.copy()
+        if self.matrix_free:
+            return super()._assemble_and_solve_adj_eq(dFdu_adj_form, dJdu, compute_bdy)
         bcs = self._homogenize_bcs()
         kwargs = self.assemble_kwargs.copy()
         kwargs["bcs"] = bcs
         dFdu = self.compat.assemble_adjoint_value(dFdu_adj_form, **kwargs)
 
-        # Apply boundary conditions on adj_dFdu and dJdu.
-        for bc in bcs:
-            bc.apply(dJdu)
-
-        adj_sol = self.compat.create_function(self.function_space)
         lu_solver_methods = self.backend.lu_solver_methods()
         solver_method = self.adj_args[0] if len(self.adj_args) >= 1 else "default"
         solver_method = "default" if solver_method == "lu" else solver_method
@@ -120,14 +116,10 @@ class SolveVarFormBlock(GenericSolveBlock):
             solver_parameters = self.adj_kwargs.get("lu_solver", {})
         else:
             solver = self.backend.KrylovSolver(*self.adj_args)
-            solver_parameters = self.adj_kwargs.get("krylov_solver", {})
+            solver_parameters = dict(self.adj_kwargs.get("krylov_solver", {}))
+            rtol = self._inexact_relative_tolerance(solver_parameters.get("relative_tolerance"))
+            if rtol is not None:
+                solver_parameters["relative_tolerance"] = rtol
         solver.parameters.update(solver_parameters)
-        solver.solve(dFdu, adj_sol.vector(), dJdu)
-
-        adj_sol_bdy = None
-        if compute_bdy:
-            adj_sol_bdy = self.compat.function_from_vector(self.function_space,
-                                                           dJdu_copy - self.compat.assemble_adjoint_value(
-                                                               self.backend.action(dFdu_adj_form, adj_sol)))
-
-        return adj_sol, adj_sol_bdy
+        solver.set_operator(dFdu)
+        return self._solve_adj_eq(solver.solve, dFdu_adj_form, dJdu, bcs, compute_bdy)
@@ -1,11 +1,46 @@
 import backend
+from pyadjoint.tape import get_working_tape, annotate_tape, stop_annotating
 from pyadjoint.overloaded_type import create_overloaded_object
+from .blocks import InterpolateBlock
+from .blocks.interpolation import point_evaluation_families
 
 
 def interpolate(*args, **kwargs):
     """Interpolation is overloaded to ensure that the returned Function object is overloaded.
-    We are not able to annotate the interpolation call at the moment.
+
+    In serial, interpolating a Function into a function space whose dofs are point evaluations
+    (Lagrange and discontinuous Lagrange spaces) is annotated, and is computed with a sparse
+    interpolation matrix that is cached for the pair of function spaces.
+    Other interpolations, such as interpolating expressions, interpolations in parallel runs,
+    and all interpolations while annotation is off, are computed by the backend and are not annotated.
+
+    To disable the annotation of this function, just pass :py:data:`annotate=False`.
 
     """
-    output = backend.interpolate(*args, **kwargs)
-    return create_overloaded_object(output)
+    annotate = annotate_tape(kwargs)
+    v, V = args[0], args[1]
+    if not annotate or not _is_annotatable(v, V):
+        output = backend.interpolate(*args, **kwargs)
+        return create_overloaded_object(output)
+
+    block = InterpolateBlock(v, V)
+    with stop_annotating():
+        output = block.apply(v)
+    output = create_overloaded_object(output)
+
+    tape = get_working_tape()
+    tape.add_block(block)
+    block.add_output(output.create_block_variable())
+
+    return output
+
+
+def _is_annotatable(v, V):
+    if not isinstance(v, backend.Function) or not isinstance(V, backend.FunctionSpace):
+        return False
+    # The interpolation matrices are built with the dofmaps of serial runs.
+    if backend.MPI.size(V.mesh().mpi_comm()) > 1:
+        return False
+    elements = [V.ufl_element()]
+    elements.extend(getattr(elements[0], "sub_elements", lambda: [])())
+    return all(element.family() in point_evaluation_families for element in elements)
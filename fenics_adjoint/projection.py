@@ -2,6 +2,7 @@ import backend
 from pyadjoint.tape import get_working_tape, annotate_tape, stop_annotating
 from pyadjoint.overloaded_type import create_overloaded_object
 from .blocks import ProjectBlock
+from .riesz import riesz_map
 
 
 def project(*args, **kwargs):
@@ -15,7 +16,14 @@ def project(*args, **kwargs):
 
     annotate = annotate_tape(kwargs)
     with stop_annotating():
-        output = backend.project(*args, **kwargs)
+        if len(args) == 2 and len(kwargs) <= 0 and isinstance(args[1], backend.FunctionSpace):
+            # Solve with the cached mass matrix of the target space.
+            V = args[1]
+            output = backend.Function(V)
+            rhs = backend.assemble(backend.inner(backend.TestFunction(V), args[0]) * backend.dx(V.mesh()))
+            riesz_map(V).solve(output.vector(), rhs)
+        else:
+            output = backend.project(*args, **kwargs)
     output = create_overloaded_object(output)
 
     if annotate:
@@ -0,0 +1,112 @@
+import weakref
+
+import backend
+from dolfin_adjoint_common import compat
+
+compat = compat.compat(backend)
+
+# Cached Riesz maps, keyed by the id of the (C++) function space object.
+_riesz_maps = {}
+
+# The number of times each mesh has been moved, keyed by the id of the mesh.
+_mesh_moves = {}
+
+
+def _l2_inner_product(u, v):
+    return backend.inner(u, v) * backend.dx
+
+
+def _h1_inner_product(u, v):
+    return (backend.inner(u, v) + backend.inner(backend.grad(u), backend.grad(v))) * backend.dx
+
+
+inner_products = {
+    "L2": _l2_inner_product,
+    "H1": _h1_inner_product,
+}
+
+
+class RieszMap(object):
+    """The assembled operator of an inner product on a function space, together with a solver.
+
+    The solver is set up once (for the default LU solver, the matrix is factorized once),
+    so that every application of the inverse Riesz map is a back-substitution.
+
+    Args:
+        V (FunctionSpace): The function space.
+        inner_product (function): Returns the bilinear form of the inner product of its two arguments.
+
+    """
+    def __init__(self, V, inner_product):
+        u = backend.TrialFunction(V)
+        v = backend.TestFunction(V)
+        self.matrix = backend.assemble(inner_product(u, v))
+        self.solver = compat.create_linear_solver(self.matrix)
+        self.mesh_state = _mesh_state(V)
+
+    def solve(self, x, b):
+        """Solves M x = b, where M is the operator of the inner product."""
+        if not isinstance(b, backend.GenericVector):
+            b = b.vector()
+        self.solver.solve(x, b)
+
+    def inner(self, x, y):
+        """Returns the inner product x^T M y of the two vectors."""
+        return x.inner(self.matrix * y)
+
+
+def _mesh_state(V):
+    # The operators are only valid as long as the mesh is not moved.
+    mesh = V.mesh()
+    return id(mesh), _mesh_moves.get(id(mesh), 0)
+
+
+def _mesh_moved(mesh):
+    # Called whenever the coordinates of a mesh are changed, see fenics_adjoint.types.mesh.
+    key = id(mesh)
+    if key not in _mesh_moves:
+        try:
+            weakref.finalize(mesh, _mesh_moves.pop, key, None)
+        except TypeError:
+            pass
+    _mesh_moves[key] = _mesh_moves.get(key, 0) + 1
+
+
+def riesz_map(V, representation="L2"):
+    """Returns the cached :class:`RieszMap` of `representation` on the function space V.
+
+    The operators are assembled the first time they are requested, and are reassembled
+    if the mesh has been moved since with ``ALE.move``. They are dropped when the function space is
+    garbage collected.
+
+    Args:
+        V (FunctionSpace): The function space.
+        representation (str or function): Either "L2", "H1", or a function that returns
+            the bilinear form of an inner product of its two arguments.
+
+    Returns:
+        RieszMap: The assembled inner product.
+
+    """
+    inner_product = inner_products.get(representation, representation)
+    if not callable(inner_product):
+        raise NotImplementedError("Unknown Riesz representation %s" % representation)
+
+    # A new python FunctionSpace is created every time a dolfin Function returns its function space,
+    # but the wrapped C++ object stays the same.
+    owner = getattr(V, "_cpp_object", V)
+    key = id(owner)
+    if key not in _riesz_maps:
+        try:
+            weakref.finalize(owner, _riesz_maps.pop, key, None)
+        except TypeError:
+            # The function space can not be weakly referenced, so the operators can not be cached.
+            return RieszMap(V, inner_product)
+        _riesz_maps[key] = {}
+
+    maps = _riesz_maps[key]
+    cached = maps.get(representation)
+    if cached is None or cached.mesh_state != _mesh_state(V):
+        cached = RieszMap(V, inner_product)
+        maps[representation] = cached
+    return cached
@@ -31,6 +31,12 @@ def solve(*args, **kwargs):
             The boundary values are zero.
         adj2_bdy_cb (function, optional): callback function supplying the second-order adjoint solution on
             the boundary. The interior values are not guaranteed to be zero.
+        matrix_free (bool, optional): if True, the adjoint and tangent linear equations are solved with a
+            Krylov method that only assembles the action of the adjoint (or tangent linear) operator,
+            never the matrix. Direct solver methods are replaced by GMRES. Defaults to False.
+        matrix_free_pc (ufl.Form, optional): a bilinear form approximating the linearised operator,
+            assembled to precondition the matrix-free solves. Its adjoint is used for the adjoint equation.
+            If not given, the matrix-free solves are unpreconditioned.
 
     """
     annotate = annotate_tape(kwargs)
@@ -45,6 +51,10 @@ def solve(*args, **kwargs):
         sb_kwargs.update(kwargs)
         block = solve_block_type(*args, **sb_kwargs)
         tape.add_block(block)
+    else:
+        # Options of the adjoint and tlm solves, which the backend does not accept.
+        kwargs.pop("matrix_free", None)
+        kwargs.pop("matrix_free_pc", None)
 
     with stop_annotating():
         output = backend.solve(*args, **kwargs)
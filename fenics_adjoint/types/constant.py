@@ -3,6 +3,7 @@ from dolfin_adjoint_common import compat
 from pyadjoint.tape import get_working_tape, stop_annotating
 from pyadjoint.overloaded_type import OverloadedType, create_overloaded_object, register_overloaded_type
 from pyadjoint.reduced_functional_numpy import gather
+from pyadjoint import elementwise
 
 from dolfin_adjoint_common.blocks.constant import constant_from_values
 
@@ -98,25 +99,13 @@ class Constant(OverloadedType, backend.Constant):
         self.assign(constant_from_values(self, self.values() + other.values()))
 
     def _reduce(self, r, r0):
-        npdata = self.values()
-        for i in range(len(npdata)):
-            r0 = r(npdata[i], r0)
-        return r0
+        return elementwise.reduction(r)(self.values(), r0)
 
     def _applyUnary(self, f):
-        npdata = self.values()
-        npdatacopy = npdata.copy()
-        for i in range(len(npdata)):
-            npdatacopy[i] = f(npdata[i])
-        self.assign(constant_from_values(self, npdatacopy))
+        self.assign(constant_from_values(self, elementwise.unary(f)(self.values())))
 
     def _applyBinary(self, f, y):
-        npdata = self.values()
-        npdatacopy = self.values().copy()
-        npdatay = y.values()
-        for i in range(len(npdata)):
-            npdatacopy[i] = f(npdata[i], npdatay[i])
-        self.assign(constant_from_values(self, npdatacopy))
+        self.assign(constant_from_values(self, elementwise.binary(f)(self.values(), y.values())))
 
     def __deepcopy__(self, memodict={}):
         return constant_from_values(self)
@@ -1,3 +1,5 @@
+import hashlib
+
 import backend
 import ufl
 
@@ -10,10 +12,12 @@ from pyadjoint.tape import get_working_tape, annotate_tape, stop_annotating, \
 
 from dolfin_adjoint_common import compat
 
+from pyadjoint import elementwise
 from pyadjoint.enlisting import Enlist
 import numpy
 from fenics_adjoint.blocks import (FunctionEvalBlock, FunctionMergeBlock,
                                    FunctionSplitBlock, FunctionAssignBlock)
+from fenics_adjoint.riesz import riesz_map
 
 compat = compat.compat(backend)
 
@@ -127,7 +131,12 @@ class Function(FloatingType, backend.Function):
             tape.add_block(block)
 
         with stop_annotating():
-            out = backend.Function.__call__(self, *args, **kwargs)
+            if annotate:
+                out = block.evaluate(self)
+            elif len(args) == 1 and isinstance(args[0], numpy.ndarray) and args[0].ndim > 1:
+                out = numpy.array([backend.Function.__call__(self, point, **kwargs) for point in args[0]])
+            else:
+                out = backend.Function.__call__(self, *args, **kwargs)
 
         if annotate:
             out = create_overloaded_object(out)
@@ -149,21 +158,9 @@ class Function(FloatingType, backend.Function):
             return create_overloaded_object(
                 compat.function_from_vector(self.function_space(), value, cls=backend.Function)
             )
-        elif riesz_representation == "L2":
+        elif riesz_representation in ("L2", "H1"):
             ret = compat.create_function(self.function_space())
-            u = backend.TrialFunction(self.function_space())
-            v = backend.TestFunction(self.function_space())
-            M = backend.assemble(backend.inner(u, v) * backend.dx)
-            compat.linalg_solve(M, ret.vector(), value)
-            return ret
-        elif riesz_representation == "H1":
-            ret = compat.create_function(self.function_space())
-            u = backend.TrialFunction(self.function_space())
-            v = backend.TestFunction(self.function_space())
-            M = backend.assemble(
-                backend.inner(u, v) * backend.dx + backend.inner(
-                    backend.grad(u), backend.grad(v)) * backend.dx)
-            compat.linalg_solve(M, ret.vector(), value)
+            riesz_map(self.function_space(), riesz_representation).solve(ret.vector(), value)
             return ret
         elif callable(riesz_representation):
             return riesz_representation(value)
@@ -205,13 +202,8 @@ class Function(FloatingType, backend.Function):
         riesz_representation = options.get("riesz_representation", "l2")
         if riesz_representation == "l2":
             return self.vector().inner(other.vector())
-        elif riesz_representation == "L2":
-            return backend.assemble(backend.inner(self, other) * backend.dx)
-        elif riesz_representation == "H1":
-            return backend.assemble(
-                (backend.inner(self, other) + backend.inner(backend.grad(self),
-                                                            backend.grad(
-                                                                other))) * backend.dx)
+        elif riesz_representation in ("L2", "H1"):
+            return riesz_map(self.function_space(), riesz_representation).inner(self.vector(), other.vector())
         else:
             raise NotImplementedError(
                 "Unknown Riesz representation %s" % riesz_representation)
@@ -235,6 +227,12 @@ class Function(FloatingType, backend.Function):
 
         return m_a.tolist()
 
+    def _ad_fingerprint(self):
+        # Hash the local values and combine the per-process digests, rather than gathering the vector.
+        digest = hashlib.sha1(self.vector().get_local().tobytes()).digest()
+        comm = self.function_space().mesh().mpi_comm()
+        return hashlib.sha1(b"".join(comm.allgather(digest))).hexdigest()
+
     def _ad_copy(self):
         r = get_overloaded_class(backend.Function)(self.function_space())
         backend.Function.assign(r, self)
@@ -254,26 +252,16 @@ class Function(FloatingType, backend.Function):
         vec += other.vector().copy()
 
     def _reduce(self, r, r0):
-        vec = self.vector().get_local()
-        for i in range(len(vec)):
-            r0 = r(vec[i], r0)
-        return r0
+        return elementwise.reduction(r)(self.vector().get_local(), r0)
 
     def _applyUnary(self, f):
         vec = self.vector()
-        npdata = vec.get_local()
-        for i in range(len(npdata)):
-            npdata[i] = f(npdata[i])
-        vec.set_local(npdata)
+        vec.set_local(elementwise.unary(f)(vec.get_local()))
         vec.apply("insert")
 
     def _applyBinary(self, f, y):
         vec = self.vector()
-        npdata = vec.get_local()
-        npdatay = y.vector().get_local()
-        for i in range(len(npdata)):
-            npdata[i] = f(npdata[i], npdatay[i])
-        vec.set_local(npdata)
+        vec.set_local(elementwise.binary(f)(vec.get_local(), y.vector().get_local()))
         vec.apply("insert")
 
     def __deepcopy__(self, memodict={}):
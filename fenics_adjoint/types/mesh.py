@@ -1,9 +1,11 @@
 import backend
+import numpy
 import sys
 from pyadjoint.tape import get_working_tape, annotate_tape, stop_annotating, no_annotations
 from pyadjoint.block import Block
 from pyadjoint.overloaded_type import OverloadedType, FloatingType, register_overloaded_type
 from ..shapead_transformations import vector_boundary_to_mesh, vector_mesh_to_boundary
+from ..riesz import _mesh_moved
 
 
 overloaded_meshes = ['IntervalMesh', 'UnitIntervalMesh', 'RectangleMesh',
@@ -11,6 +13,15 @@ overloaded_meshes = ['IntervalMesh', 'UnitIntervalMesh', 'RectangleMesh',
 __all__ = ['Mesh', 'BoundaryMesh', 'SubMesh'] + overloaded_meshes
 
 
+def _restore_coordinates(mesh, checkpoint):
+    # Only a change of the coordinates invalidates the operators cached for the mesh.
+    coordinates = mesh.coordinates()
+    if not numpy.array_equal(coordinates, checkpoint):
+        coordinates[:] = checkpoint
+        _mesh_moved(mesh)
+    return mesh
+
+
 @register_overloaded_type
 class Mesh(OverloadedType, backend.Mesh):
     def __init__(self, *args, **kwargs):
@@ -30,8 +41,7 @@ class Mesh(OverloadedType, backend.Mesh):
         return self.coordinates().copy()
 
     def _ad_restore_at_checkpoint(self, checkpoint):
-        self.coordinates()[:] = checkpoint
-        return self
+        return _restore_coordinates(self, checkpoint)
 
     def _ad_function_space(self):
         if self._ad_coordinate_space is None:
@@ -56,8 +66,7 @@ class BoundaryMesh(FloatingType, backend.BoundaryMesh):
         return self.coordinates().copy()
 
     def _ad_restore_at_checkpoint(self, checkpoint):
-        self.coordinates()[:] = checkpoint
-        return self
+        return _restore_coordinates(self, checkpoint)
 
     def _ad_function_space(self):
         if self._ad_coordinate_space is None:
@@ -79,8 +88,7 @@ def overloaded_mesh(mesh_class):
             return self.coordinates().copy()
 
         def _ad_restore_at_checkpoint(self, checkpoint):
-            self.coordinates()[:] = checkpoint
-            return self
+            return _restore_coordinates(self, checkpoint)
 
         def _ad_function_space(self):
             if self._ad_coordinate_space is None:
@@ -138,6 +146,7 @@ def move(mesh, vector, **kwargs):
 
     with stop_annotating():
         output = __backend_ALE_move(mesh, vector)
+    _mesh_moved(mesh)
     if annotate:
         block.add_output(mesh.create_block_variable())
     return output
@@ -18,8 +18,20 @@ from pyadjoint.verification import taylor_test, taylor_to_dict
 from pyadjoint.drivers import compute_gradient, compute_hessian
 from pyadjoint.adjfloat import AdjFloat
 from pyadjoint.control import Control
-from pyadjoint import IPOPTSolver, ROLSolver, MinimizationProblem, InequalityConstraint, minimize
+from pyadjoint import InequalityConstraint
 import numpy_adjoint
 
+# The optimization backends are imported on first use, see pyadjoint.__getattr__.
+_optimization_names = ("IPOPTSolver", "ROLSolver", "MinimizationProblem", "minimize")
+
+
+def __getattr__(name):
+    if name not in _optimization_names:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    return getattr(pyadjoint, name)
+
+
 continue_annotation()
 set_working_tape(Tape())
+
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_optimization_names)
@@ -28,6 +28,8 @@ def _init_params(self, args, kwargs, varform):
 
     if "solver_parameters" in kwargs and "mat_type" in kwargs["solver_parameters"]:
         self.assemble_kwargs["mat_type"] = kwargs["solver_parameters"]["mat_type"]
+        if self.assemble_kwargs["mat_type"] == "matfree":
+            self.matrix_free = True
 
     if varform:
         if "appctx" in kwargs:
@@ -10,6 +10,7 @@ __email__ = 'sebastkm@simula.no'
 
 
 from .array import ndarray
+from . import linalg
 
 # Use pyadjoint AdjFloat for numpy.float64.
 import numpy
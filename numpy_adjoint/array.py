@@ -1,17 +1,27 @@
+import weakref
+
 import numpy
 from pyadjoint.overloaded_type import OverloadedType, register_overloaded_type, create_overloaded_object
 from pyadjoint.tape import get_working_tape, stop_annotating, annotate_tape
 from pyadjoint.block import Block
+from pyadjoint.stacking import StackedValues, is_stacked, seed_value, unstack
+from .blocks import ufunc_block, array_function_blocks, NumpyReshapeBlock, _plain
 
 
 @register_overloaded_type
 class ndarray(OverloadedType, numpy.ndarray):
+    """An overloaded NumPy array.
+
+    Elementwise ufuncs (add, multiply, exp, sin, ...), sums, matrix products, norms and reshapes
+    of whole arrays are each annotated as one block (see :mod:`numpy_adjoint.blocks`).
+    Other NumPy operations are computed without annotation.
+    """
     def __init__(self, *args, **kwargs):
         pass
 
     @classmethod
     def _ad_init_object(cls, obj):
-        return cls(obj.shape, numpy.float_, buffer=obj)
+        return cls(obj.shape, numpy.float64, buffer=numpy.ascontiguousarray(obj, dtype=numpy.float64))
 
     def _ad_create_checkpoint(self):
         return self.copy()
@@ -40,20 +50,141 @@ class ndarray(OverloadedType, numpy.ndarray):
     def _ad_convert_type(self, value, options={}):
         return value
 
+    def _ad_dim(self):
+        return self.size
+
+    def _ad_mul(self, other):
+        return numpy.multiply(_plain(self), _plain(other)).view(ndarray)
+
+    def _ad_add(self, other):
+        return numpy.add(_plain(self), _plain(other)).view(ndarray)
+
+    def _ad_dot(self, other, options=None):
+        return float(numpy.vdot(_plain(self), _plain(other)))
+
+    def _ad_copy(self):
+        return numpy.array(_plain(self)).view(ndarray)
+
     def __array_finalize__(self, obj):
         OverloadedType.__init__(self)
 
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        out = kwargs.get("out")
+        block = None
+        if annotate_tape() and out is None:
+            block = ufunc_block(ufunc, method, inputs, kwargs)
+        if block is not None:
+            return block.record()
+
+        if out is not None:
+            kwargs["out"] = tuple(_plain(o) for o in out)
+        with stop_annotating():
+            result = getattr(ufunc, method)(*(_plain(x) for x in inputs), **kwargs)
+        if out is not None:
+            return out[0] if len(out) == 1 else out
+        if isinstance(result, tuple):
+            return tuple(r.view(ndarray) if isinstance(r, numpy.ndarray) else r for r in result)
+        return result.view(ndarray) if isinstance(result, numpy.ndarray) else result
+
+    def __array_function__(self, func, types, args, kwargs):
+        block = None
+        if annotate_tape() and func in array_function_blocks:
+            block = array_function_blocks[func](*args, **kwargs)
+        if block is not None:
+            return block.record()
+        return super().__array_function__(func, types, args, kwargs)
+
+    def reshape(self, *shape, order="C"):
+        shape = shape[0] if len(shape) == 1 else shape
+        if annotate_tape():
+            return NumpyReshapeBlock(self, shape, order=order).record()
+        return numpy.ndarray.reshape(self, shape, order=order)
+
+    def dot(self, other):
+        return numpy.dot(self, other)
+
+
+# Weak references to the buffers (and stacks of buffers) that slice blocks scatter-add adjoint and
+# Hessian values into, by the block variable of the sliced array and the kind of value.
+# Only these buffers are updated in place, as other values may be shared.
+_scatter_buffers = weakref.WeakKeyDictionary()
+
+
+def _is_basic_index(item):
+    items = item if isinstance(item, tuple) else (item,)
+    return all(i is None or i is Ellipsis or isinstance(i, (int, numpy.integer, slice)) for i in items)
+
+
+def _owns(owned, value):
+    return value is not None and any(ref() is value for ref in owned)
+
+
+def _own(owned, value):
+    owned[:] = [ref for ref in owned if ref() is not None]
+    owned.append(weakref.ref(value))
+    return value
+
+
+def _dense(owned, buffer, shape):
+    """Returns `buffer` if it is owned, and otherwise a new owned dense buffer with its values."""
+    if _owns(owned, buffer):
+        return buffer
+    return _own(owned, numpy.zeros(shape) if buffer is None else numpy.array(buffer, dtype=float))
+
+
+def _add_at(buffer, item, value):
+    if _is_basic_index(item):
+        buffer[item] += value
+    else:
+        # Repeated indices are accumulated.
+        numpy.add.at(buffer, item, value)
+
+
+def _scatter_add(block_variable, kind, shape, item, value):
+    """Adds `value` to the entries `item` of the "adj_value" or "hessian_value" (`kind`) of `block_variable`.
+
+    The first slice of an array in a sweep allocates a dense buffer, and all other slices add their
+    entries to it in place, so reading all n entries of an array costs O(n) instead of O(n^2).
+    If the values are stacked, there is one buffer per seed, which is shared by all slices.
+    """
+    owned = _scatter_buffers.setdefault(block_variable, {}).setdefault(kind, [])
+    current = getattr(block_variable, kind)
+    if not is_stacked(value) and not is_stacked(current):
+        buffer = _dense(owned, current, shape)
+        setattr(block_variable, kind, buffer)
+        _add_at(buffer, item, value)
+        return
+
+    num_seeds = len(value) if is_stacked(value) else len(current)
+    if not is_stacked(current) or not _owns(owned, current):
+        current = _own(owned, StackedValues(unstack(current, num_seeds)))
+        setattr(block_variable, kind, current)
+    for seed in range(num_seeds):
+        seed_input = seed_value(value, seed)
+        if seed_input is None:
+            continue
+        current[seed] = _dense(owned, current[seed], shape)
+        _add_at(current[seed], item, seed_input)
+
 
 class NumpyArraySliceBlock(Block):
+    # The adjoint and Hessian values of all seeds are scattered into one buffer per seed.
+    stacked_modes = ("adj", "hessian")
+
     def __init__(self, array, item):
         super().__init__()
         self.add_dependency(array)
         self.item = item
 
     def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
-        adj_output = numpy.zeros(inputs[0].shape)
-        adj_output[self.item] = adj_inputs[0]
-        return adj_output
+        _scatter_add(block_variable, "adj_value", inputs[0].shape, self.item, adj_inputs[0])
+
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        return numpy.ndarray.__getitem__(tlm_inputs[0], self.item)
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        _scatter_add(block_variable, "hessian_value", inputs[0].shape, self.item, hessian_inputs[0])
 
     def recompute_component(self, inputs, block_variable, idx, prepared):
         return inputs[0][self.item]
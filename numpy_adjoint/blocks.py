@@ -0,0 +1,406 @@
+import numpy
+
+from pyadjoint.block import Block
+from pyadjoint.overloaded_type import OverloadedType, create_overloaded_object
+from pyadjoint.tape import get_working_tape, stop_annotating
+
+
+def _plain(value):
+    """Returns `value` as a plain NumPy array or Python float."""
+    if isinstance(value, numpy.ndarray):
+        return value.view(numpy.ndarray)
+    if isinstance(value, float):
+        return float(value)
+    return value
+
+
+def _unbroadcast(value, shape):
+    """Sums `value` over the axes along which an array of `shape` was broadcast."""
+    value = numpy.asarray(value)
+    while value.ndim > len(shape):
+        value = value.sum(axis=0)
+    for axis, n in enumerate(shape):
+        if n == 1 and value.shape[axis] != 1:
+            value = value.sum(axis=axis, keepdims=True)
+    return numpy.broadcast_to(value, shape)
+
+
+def _like(value, reference):
+    """Returns `value` with the type and shape of `reference` (an array or a float)."""
+    value = _unbroadcast(value, numpy.shape(reference))
+    if isinstance(reference, numpy.ndarray):
+        return numpy.array(value)
+    return float(value)
+
+
+class NumpyBlock(Block):
+    """Base class of the blocks of vectorised NumPy operations.
+
+    The operands are given in `args`. The overloaded operands are the dependencies of the
+    block, and the other operands are stored as constants. Subclasses implement `forward`,
+    the action of the Jacobian on the tangent linear values (`tangent`), the action of the
+    transposed Jacobian (`adjoint`) and the second order term of the Hessian (`second_order`)
+    on plain NumPy arrays and floats.
+    """
+    def __init__(self, args):
+        super(NumpyBlock, self).__init__()
+        self.args = []
+        self.positions = []
+        for i, arg in enumerate(args):
+            if isinstance(arg, OverloadedType):
+                self.add_dependency(arg)
+                self.positions.append(i)
+                self.args.append(None)
+            else:
+                self.args.append(numpy.array(arg) if isinstance(arg, numpy.ndarray) else arg)
+
+    def _args(self, inputs):
+        args = list(self.args)
+        for pos, value in zip(self.positions, inputs):
+            args[pos] = _plain(value)
+        return args
+
+    def _tlms(self):
+        tlms = [None] * len(self.args)
+        for pos, dep in zip(self.positions, self.get_dependencies()):
+            if dep.tlm_value is not None:
+                tlms[pos] = _plain(dep.tlm_value)
+        return tlms
+
+    def record(self):
+        """Computes the output, adds the block to the tape and returns the (overloaded) output."""
+        with stop_annotating():
+            value = self.forward(*self._args([dep.saved_output for dep in self.get_dependencies()]))
+        output = create_overloaded_object(value)
+        get_working_tape().add_block(self)
+        self.add_output(output.create_block_variable())
+        return output
+
+    def forward(self, *args):
+        raise NotImplementedError
+
+    def adjoint(self, args, output, adj_input, pos):
+        raise NotImplementedError
+
+    def tangent(self, args, output, tlms):
+        raise NotImplementedError
+
+    def second_order(self, args, output, adj_input, tlms, pos):
+        """Returns the term of the Hessian that involves the second derivatives, or None if they are zero."""
+        return None
+
+    def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
+        args = self._args(inputs)
+        output = _plain(self.get_outputs()[0].saved_output)
+        adj_output = self.adjoint(args, output, numpy.asarray(adj_inputs[0]), self.positions[idx])
+        return _like(adj_output, inputs[idx])
+
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        args = self._args(inputs)
+        output = block_variable.saved_output
+        return _like(self.tangent(args, _plain(output), self._tlms()), output)
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        args = self._args(inputs)
+        output = _plain(self.get_outputs()[0].saved_output)
+        pos = self.positions[idx]
+        hessian_output = self.adjoint(args, output, numpy.asarray(hessian_inputs[0]), pos)
+        if adj_inputs[0] is not None:
+            second_order = self.second_order(args, output, numpy.asarray(adj_inputs[0]), self._tlms(), pos)
+            if second_order is not None:
+                hessian_output = hessian_output + second_order
+        return _like(hessian_output, inputs[idx])
+
+    def recompute_component(self, inputs, block_variable, idx, prepared):
+        value = self.forward(*self._args(inputs))
+        return numpy.array(value) if isinstance(block_variable.output, numpy.ndarray) else float(value)
+
+
+# The first derivatives of the elementwise ufuncs with respect to each operand, and the nonzero
+# second derivatives, as functions of the operands and the output.
+_elementwise_derivatives = {
+    numpy.add: ((lambda x, y, z: 1., lambda x, y, z: 1.), {}),
+    numpy.subtract: ((lambda x, y, z: 1., lambda x, y, z: -1.), {}),
+    numpy.multiply: ((lambda x, y, z: y, lambda x, y, z: x),
+                     {(0, 1): lambda x, y, z: 1.}),
+    numpy.true_divide: ((lambda x, y, z: 1. / y, lambda x, y, z: -z / y),
+                        {(0, 1): lambda x, y, z: -1. / y ** 2,
+                         (1, 1): lambda x, y, z: 2. * z / y ** 2}),
+    numpy.power: ((lambda x, y, z: y * x ** (y - 1), lambda x, y, z: z * numpy.log(x)),
+                  {(0, 0): lambda x, y, z: y * (y - 1) * x ** (y - 2),
+                   (0, 1): lambda x, y, z: x ** (y - 1) * (1 + y * numpy.log(x)),
+                   (1, 1): lambda x, y, z: z * numpy.log(x) ** 2}),
+    numpy.negative: ((lambda x, z: -1.,), {}),
+    numpy.positive: ((lambda x, z: 1.,), {}),
+    numpy.square: ((lambda x, z: 2. * x,), {(0, 0): lambda x, z: 2.}),
+    numpy.sqrt: ((lambda x, z: 0.5 / z,), {(0, 0): lambda x, z: -0.25 / (z * x)}),
+    numpy.exp: ((lambda x, z: z,), {(0, 0): lambda x, z: z}),
+    numpy.log: ((lambda x, z: 1. / x,), {(0, 0): lambda x, z: -1. / x ** 2}),
+    numpy.sin: ((lambda x, z: numpy.cos(x),), {(0, 0): lambda x, z: -z}),
+    numpy.cos: ((lambda x, z: -numpy.sin(x),), {(0, 0): lambda x, z: -z}),
+    numpy.tan: ((lambda x, z: 1. + z ** 2,), {(0, 0): lambda x, z: 2. * z * (1. + z ** 2)}),
+    numpy.tanh: ((lambda x, z: 1. - z ** 2,), {(0, 0): lambda x, z: -2. * z * (1. - z ** 2)}),
+    numpy.absolute: ((lambda x, z: numpy.sign(x),), {}),
+}
+
+
+class NumpyElementwiseBlock(NumpyBlock):
+    """An elementwise ufunc (with broadcasting), e.g. numpy.multiply or numpy.exp."""
+    def __init__(self, ufunc, args):
+        super(NumpyElementwiseBlock, self).__init__(args)
+        self.ufunc = ufunc
+        self.first, self.second = _elementwise_derivatives[ufunc]
+
+    def forward(self, *args):
+        return self.ufunc(*args)
+
+    def adjoint(self, args, output, adj_input, pos):
+        return adj_input * self.first[pos](*args, output)
+
+    def tangent(self, args, output, tlms):
+        tlm_output = 0.
+        for pos, tlm in enumerate(tlms):
+            if tlm is not None:
+                tlm_output = tlm_output + self.first[pos](*args, output) * tlm
+        return tlm_output
+
+    def second_order(self, args, output, adj_input, tlms, pos):
+        second_order = None
+        for other, tlm in enumerate(tlms):
+            derivative = self.second.get((min(pos, other), max(pos, other)))
+            if tlm is not None and derivative is not None:
+                term = adj_input * derivative(*args, output) * tlm
+                second_order = term if second_order is None else second_order + term
+        return second_order
+
+    def __str__(self):
+        return "numpy.%s" % self.ufunc.__name__
+
+
+def _expand(value, shape, axis, keepdims):
+    """Broadcasts the result of a reduction over `axis` back to the shape of its operand."""
+    value = numpy.asarray(value)
+    if not keepdims:
+        if axis is None:
+            axis = tuple(range(len(shape)))
+        elif not isinstance(axis, tuple):
+            axis = (axis,)
+        value = numpy.expand_dims(value, tuple(sorted(a % len(shape) for a in axis)))
+    return numpy.broadcast_to(value, shape)
+
+
+class NumpySumBlock(NumpyBlock):
+    """The sum of an array over `axis` (all axes if None)."""
+    def __init__(self, array, axis=None, keepdims=False):
+        super(NumpySumBlock, self).__init__([array])
+        self.axis = axis
+        self.keepdims = keepdims
+
+    def forward(self, array):
+        return numpy.sum(array, axis=self.axis, keepdims=self.keepdims)
+
+    def adjoint(self, args, output, adj_input, pos):
+        return _expand(adj_input, numpy.shape(args[0]), self.axis, self.keepdims)
+
+    def tangent(self, args, output, tlms):
+        return numpy.sum(numpy.broadcast_to(tlms[0], numpy.shape(args[0])), axis=self.axis, keepdims=self.keepdims)
+
+
+def _matmul_adjoint(a, b, adj_input, pos):
+    """Returns the action of the transposed Jacobian of a @ b (for 1-D and 2-D operands)."""
+    a = numpy.asarray(a)
+    b = numpy.asarray(b)
+    a2 = a[numpy.newaxis, :] if a.ndim == 1 else a
+    b2 = b[:, numpy.newaxis] if b.ndim == 1 else b
+    adj_input = numpy.reshape(adj_input, (a2.shape[0], b2.shape[1]))
+    if pos == 0:
+        return numpy.reshape(adj_input @ b2.T, a.shape)
+    return numpy.reshape(a2.T @ adj_input, b.shape)
+
+
+class NumpyMatmulBlock(NumpyBlock):
+    """The matrix product a @ b of 1-D or 2-D arrays (also numpy.dot of such arrays)."""
+    def __init__(self, a, b):
+        super(NumpyMatmulBlock, self).__init__([a, b])
+
+    def forward(self, a, b):
+        return numpy.matmul(a, b)
+
+    def adjoint(self, args, output, adj_input, pos):
+        return _matmul_adjoint(args[0], args[1], adj_input, pos)
+
+    def tangent(self, args, output, tlms):
+        a, b = args
+        tlm_output = 0.
+        if tlms[0] is not None:
+            tlm_output = tlm_output + numpy.matmul(tlms[0], b)
+        if tlms[1] is not None:
+            tlm_output = tlm_output + numpy.matmul(a, tlms[1])
+        return tlm_output
+
+    def second_order(self, args, output, adj_input, tlms, pos):
+        other = 1 - pos
+        if tlms[other] is None:
+            return None
+        args = list(args)
+        args[other] = tlms[other]
+        return _matmul_adjoint(args[0], args[1], adj_input, pos)
+
+
+class NumpyNormBlock(NumpyBlock):
+    """The 2-norm (Frobenius norm for matrices) of an array."""
+    def __init__(self, array):
+        super(NumpyNormBlock, self).__init__([array])
+
+    def forward(self, array):
+        return numpy.linalg.norm(array)
+
+    def adjoint(self, args, output, adj_input, pos):
+        return adj_input * args[0] / output
+
+    def tangent(self, args, output, tlms):
+        return numpy.sum(args[0] * tlms[0]) / output
+
+    def second_order(self, args, output, adj_input, tlms, pos):
+        x, tlm = args[0], tlms[0]
+        if tlm is None:
+            return None
+        return adj_input * (tlm - x * numpy.sum(x * tlm) / output ** 2) / output
+
+
+class NumpyReshapeBlock(NumpyBlock):
+    """A reshape of an array. The output is a copy, not a view of the operand."""
+    def __init__(self, array, shape, order="C"):
+        super(NumpyReshapeBlock, self).__init__([array])
+        self.shape = shape
+        self.order = order
+
+    def forward(self, array):
+        return numpy.array(numpy.reshape(array, self.shape, order=self.order))
+
+    def adjoint(self, args, output, adj_input, pos):
+        return numpy.reshape(adj_input, numpy.shape(args[0]), order=self.order)
+
+    def tangent(self, args, output, tlms):
+        return numpy.reshape(tlms[0], numpy.shape(output), order=self.order)
+
+
+def _matmul_operands(a, b):
+    return 1 <= numpy.ndim(a) <= 2 and 1 <= numpy.ndim(b) <= 2
+
+
+def ufunc_block(ufunc, method, inputs, kwargs):
+    """Returns the block of a ufunc call on overloaded arrays, or None if the call is not supported."""
+    if method == "__call__" and not kwargs:
+        if ufunc in _elementwise_derivatives:
+            return NumpyElementwiseBlock(ufunc, inputs)
+        if ufunc is numpy.matmul and _matmul_operands(*inputs):
+            return NumpyMatmulBlock(*inputs)
+    elif method == "reduce" and ufunc is numpy.add:
+        kwargs = dict(kwargs)
+        axis = kwargs.pop("axis", 0)
+        keepdims = kwargs.pop("keepdims", False)
+        if kwargs.pop("dtype", None) is None and kwargs.pop("where", True) is True and not kwargs:
+            return NumpySumBlock(inputs[0], axis=axis, keepdims=keepdims)
+    return None
+
+
+def _sum(a, axis=None, dtype=None, out=None, keepdims=False, **kwargs):
+    if dtype is None and out is None and not kwargs:
+        return NumpySumBlock(a, axis=axis, keepdims=keepdims)
+
+
+def _dot(a, b, out=None):
+    if out is not None:
+        return None
+    if numpy.ndim(a) == 0 or numpy.ndim(b) == 0:
+        return NumpyElementwiseBlock(numpy.multiply, [a, b])
+    if _matmul_operands(a, b):
+        return NumpyMatmulBlock(a, b)
+
+
+def _norm(x, ord=None, axis=None, keepdims=False):
+    if ord is None and axis is None and not keepdims:
+        return NumpyNormBlock(x)
+
+
+def _reshape(a, shape=None, order="C", newshape=None, copy=None):
+    return NumpyReshapeBlock(a, newshape if shape is None else shape, order=order)
+
+
+def _ravel(a, order="C"):
+    return NumpyReshapeBlock(a, -1, order=order)
+
+
+# The blocks of the NumPy functions that are dispatched through `__array_function__`.
+# Each returns None for arguments that are not supported.
+array_function_blocks = {
+    numpy.sum: _sum,
+    numpy.dot: _dot,
+    numpy.linalg.norm: _norm,
+    numpy.reshape: _reshape,
+    numpy.ravel: _ravel,
+}
+
+
+def _outer(u, v):
+    """Returns u v^T, for vectors or (for several right-hand sides) matrices u and v."""
+    return numpy.outer(u, v) if numpy.ndim(u) == 1 else numpy.matmul(u, numpy.transpose(v))
+
+
+class LinearSolveBlock(NumpyBlock):
+    """The solution x of A x = b, computed with a cached factorization of A.
+
+    The factorization (see :mod:`numpy_adjoint.linalg`) is only recomputed when the values of A
+    change, and is reused for the transposed solves of the adjoint and Hessian, and for the TLM solves.
+    """
+    def __init__(self, A, b, factorization):
+        super(LinearSolveBlock, self).__init__([A, b])
+        self.factorization = factorization
+
+    def forward(self, A, b):
+        self.factorization.update(A)
+        return self.factorization.backsolve(b)
+
+    def prepare_evaluate_adj(self, inputs, adj_inputs, relevant_dependencies):
+        self.factorization.update(self._args(inputs)[0])
+        return self.factorization.backsolve(numpy.asarray(adj_inputs[0]), trans=True)
+
+    def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
+        adj_output = prepared
+        if self.positions[idx] == 0:
+            adj_output = -_outer(prepared, _plain(self.get_outputs()[0].saved_output))
+        return _like(adj_output, inputs[idx])
+
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        A, b = self._args(inputs)
+        tlm_A, tlm_b = self._tlms()
+        self.factorization.update(A)
+        x = _plain(block_variable.saved_output)
+        rhs = numpy.zeros(numpy.shape(x)) if tlm_b is None else numpy.array(tlm_b, dtype=float)
+        if tlm_A is not None:
+            rhs -= numpy.matmul(tlm_A, x)
+        return _like(self.factorization.backsolve(rhs), x)
+
+    def prepare_evaluate_hessian(self, inputs, hessian_inputs, adj_inputs, relevant_dependencies):
+        A, b = self._args(inputs)
+        tlm_A, tlm_b = self._tlms()
+        self.factorization.update(A)
+        rhs = numpy.array(hessian_inputs[0], dtype=float)
+        adj = None
+        if adj_inputs[0] is not None:
+            adj = self.factorization.backsolve(numpy.asarray(adj_inputs[0]), trans=True)
+            if tlm_A is not None:
+                rhs -= numpy.matmul(numpy.transpose(tlm_A), adj)
+        return self.factorization.backsolve(rhs, trans=True), adj
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        hessian_output, adj = prepared
+        if self.positions[idx] == 0:
+            output = self.get_outputs()[0]
+            hessian_output = -_outer(hessian_output, _plain(output.saved_output))
+            if adj is not None and output.tlm_value is not None:
+                hessian_output -= _outer(adj, _plain(output.tlm_value))
+        return _like(hessian_output, inputs[idx])
@@ -0,0 +1,112 @@
+"""Annotated dense and sparse linear solves.
+
+The factorization of the matrix is computed once and reused for the forward solves, the
+transposed solves of the adjoint and Hessian, and the TLM solves. Derivatives are computed with
+respect to the right-hand side and, for dense matrices, the matrix.
+Sparse matrices are treated as constants.
+
+scipy is only imported when a factorization is first computed, so that importing numpy_adjoint
+(and through it fenics_adjoint and firedrake_adjoint) stays cheap.
+"""
+import numpy
+
+from pyadjoint.tape import annotate_tape
+from .blocks import LinearSolveBlock, array_function_blocks, _plain
+
+
+class LUFactorization(object):
+    """The LU factorization of a dense matrix A, as computed by scipy.linalg.lu_factor.
+
+    The factorization is only recomputed when it is updated with different values of A.
+    A factorization of an unknown (constant) matrix is given by the (lu, piv) `factors` instead of A.
+    """
+    def __init__(self, A=None, factors=None):
+        self.A = A
+        self.matrix = None
+        self.factors = factors
+        if A is not None:
+            self.update(A)
+
+    def update(self, A):
+        if A is None:
+            return
+        A = _plain(A)
+        if self.matrix is None or not numpy.array_equal(A, self.matrix):
+            import scipy.linalg
+            self.matrix = numpy.array(A, dtype=float)
+            self.factors = scipy.linalg.lu_factor(self.matrix)
+
+    def solve(self, b):
+        """Solves A x = b. The solve is annotated, as with :func:`lu_solve`."""
+        return _solve(self, b)
+
+    def backsolve(self, b, trans=False):
+        """Solves A x = b, or A^T x = b if `trans`, for a plain array b. The solve is not annotated."""
+        import scipy.linalg
+        return scipy.linalg.lu_solve(self.factors, b, trans=1 if trans else 0)
+
+
+class SparseLUFactorization(object):
+    """The LU factorization of a (constant) sparse matrix A, as computed by scipy.sparse.linalg.splu."""
+    def __init__(self, A):
+        import scipy.sparse
+        import scipy.sparse.linalg
+        self.A = A
+        self.factors = scipy.sparse.linalg.splu(scipy.sparse.csc_matrix(A))
+
+    def update(self, A):
+        pass
+
+    def solve(self, b):
+        """Solves A x = b. The solve is annotated, as with :func:`spsolve`."""
+        return _solve(self, b)
+
+    def backsolve(self, b, trans=False):
+        """Solves A x = b, or A^T x = b if `trans`, for a plain array b. The solve is not annotated."""
+        return self.factors.solve(numpy.asarray(b, dtype=float), trans="T" if trans else "N")
+
+
+def _solve(factorization, b):
+    if annotate_tape():
+        return LinearSolveBlock(factorization.A, b, factorization).record()
+    return factorization.backsolve(_plain(b))
+
+
+def lu_factor(A):
+    """Returns the LU factorization of the dense matrix A, for use with :func:`lu_solve`."""
+    return LUFactorization(A)
+
+
+def lu_solve(lu, b):
+    """Solves A x = b with the factorization `lu` of A (from :func:`lu_factor`, or a (lu, piv) tuple
+    from scipy.linalg.lu_factor for a constant matrix A).
+    """
+    if not isinstance(lu, LUFactorization):
+        lu = LUFactorization(factors=lu)
+    return _solve(lu, b)
+
+
+def solve(A, b):
+    """Solves A x = b for a dense matrix A. numpy.linalg.solve is annotated in the same way."""
+    return _solve(LUFactorization(A), b)
+
+
+def splu(A):
+    """Returns the LU factorization of the sparse matrix A. The factorization has an annotated
+    method `solve(b)`, and can be used with :func:`spsolve`.
+    """
+    return SparseLUFactorization(A)
+
+
+def spsolve(A, b):
+    """Solves A x = b for a sparse matrix A, or with a factorization from :func:`splu`."""
+    factorization = A if isinstance(A, SparseLUFactorization) else SparseLUFactorization(A)
+    return _solve(factorization, b)
+
+
+def _numpy_solve(a, b):
+    if numpy.ndim(a) == 2 and numpy.ndim(b) in (1, 2):
+        return LinearSolveBlock(a, b, LUFactorization(a))
+
+
+array_function_blocks[numpy.linalg.solve] = _numpy_solve
@@ -7,19 +7,49 @@ __license__ = 'LGPL-3'
 __maintainer__ = 'Sebastian Kenji Mitusch'
 __email__ = 'sebastkm@math.uio.no'
 
+from importlib import import_module as _import_module
+
 from .block import Block
 from .tape import (Tape,
                    set_working_tape, get_working_tape, no_annotations,
-                   annotate_tape, stop_annotating, pause_annotation, continue_annotation)
+                   annotate_tape, stop_annotating, pause_annotation, continue_annotation,
+                   derivative_tolerance, get_derivative_tolerance)
 from .adjfloat import AdjFloat
 from .reduced_functional import ReducedFunctional
 from .drivers import compute_gradient, compute_hessian, solve_adjoint
 from .verification import taylor_test, taylor_to_dict
 from .overloaded_type import OverloadedType, create_overloaded_object
 from .control import Control
-from .optimization.optimization import minimize, maximize, print_optimization_methods
-from .optimization.optimization_problem import MinimizationProblem
-from .optimization.ipopt_solver import IPOPTSolver
-from .optimization.rol_solver import ROLSolver
-from .optimization.constraints import InequalityConstraint, EqualityConstraint
-from .optimization.moola_problem import MoolaOptimizationProblem
+from .timeline import Tracer, tracing, start_tracing, stop_tracing
+
+# The optimization backends import numpy and try to import ROL, moola, cyipopt and scipy.
+# They are imported on first use of one of their names, so that `import pyadjoint` stays cheap.
+_lazy_imports = {
+    "minimize": ".optimization.optimization",
+    "maximize": ".optimization.optimization",
+    "print_optimization_methods": ".optimization.optimization",
+    "MinimizationProblem": ".optimization.optimization_problem",
+    "IPOPTSolver": ".optimization.ipopt_solver",
+    "ROLSolver": ".optimization.rol_solver",
+    "InequalityConstraint": ".optimization.constraints",
+    "EqualityConstraint": ".optimization.constraints",
+    "MoolaOptimizationProblem": ".optimization.moola_problem",
+    "ControlVector": ".optimization.control_vector",
+    "OptimizationCheckpoint": ".optimization.checkpointing",
+    "CheckpointedReducedFunctional": ".optimization.checkpointing",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_imports:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(_import_module(_lazy_imports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports))
+
+
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_lazy_imports)
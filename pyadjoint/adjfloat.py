@@ -110,12 +110,12 @@ class AdjFloat(OverloadedType, float):
     def _ad_add(self, other):
         return self + other
 
-    def _ad_dot(self, other):
+    def _ad_dot(self, other, options=None):
         return float.__mul__(self, other)
 
     @staticmethod
     def _ad_assign_numpy(dst, src, offset):
-        dst = float(src[offset:offset + 1])
+        dst = AdjFloat(src[offset])
         offset += 1
         return dst, offset
 
@@ -126,6 +126,9 @@ class AdjFloat(OverloadedType, float):
     def _ad_copy(self):
         return self
 
+    def _ad_dim(self):
+        return 1
+
 
 _min = min
 _max = max
@@ -1,4 +1,5 @@
 from .tape import no_annotations
+from .timeline import event_call
 from html import escape
 
 
@@ -14,6 +15,9 @@ class Block(object):
     """
     __slots__ = ['_dependencies', '_outputs', 'block_helper']
     pop_kwargs_keys = []
+    # The evaluation modes ("adj", "tlm", "hessian") for which the block accepts
+    # :class:`StackedValues` inputs. For other modes stacked inputs are evaluated seed by seed.
+    stacked_modes = ()
 
     def __init__(self):
         self._dependencies = []
@@ -124,14 +128,14 @@ class Block(object):
         if len(relevant_dependencies) <= 0:
             return
 
-        prepared = self.prepare_evaluate_adj(inputs, adj_inputs, relevant_dependencies)
+        # Records the preparation and the components as events, if tracing is on.
+        call = event_call()
+        prepared = call("prepare_evaluate_adj", "adj", None,
+                        self.prepare_evaluate_adj, inputs, adj_inputs, relevant_dependencies)
 
         for idx, dep in relevant_dependencies:
-            adj_output = self.evaluate_adj_component(inputs,
-                                                     adj_inputs,
-                                                     dep,
-                                                     idx,
-                                                     prepared)
+            adj_output = call("evaluate_adj_component", "adj", {"idx": idx},
+                              self.evaluate_adj_component, inputs, adj_inputs, dep, idx, prepared)
             if adj_output is not None:
                 dep.add_adj_output(adj_output)
 
@@ -204,14 +208,13 @@ class Block(object):
         if len(relevant_outputs) <= 0:
             return
 
-        prepared = self.prepare_evaluate_tlm(inputs, tlm_inputs, relevant_outputs)
+        call = event_call()
+        prepared = call("prepare_evaluate_tlm", "tlm", None,
+                        self.prepare_evaluate_tlm, inputs, tlm_inputs, relevant_outputs)
 
         for idx, out in relevant_outputs:
-            tlm_output = self.evaluate_tlm_component(inputs,
-                                                     tlm_inputs,
-                                                     out,
-                                                     idx,
-                                                     prepared)
+            tlm_output = call("evaluate_tlm_component", "tlm", {"idx": idx},
+                              self.evaluate_tlm_component, inputs, tlm_inputs, out, idx, prepared)
             if tlm_output is not None:
                 out.add_tlm_output(tlm_output)
 
@@ -276,16 +279,14 @@ class Block(object):
         if len(relevant_dependencies) <= 0:
             return
 
-        prepared = self.prepare_evaluate_hessian(inputs, hessian_inputs, adj_inputs, relevant_dependencies)
+        call = event_call()
+        prepared = call("prepare_evaluate_hessian", "hessian", None,
+                        self.prepare_evaluate_hessian, inputs, hessian_inputs, adj_inputs, relevant_dependencies)
 
         for idx, dep in relevant_dependencies:
-            hessian_output = self.evaluate_hessian_component(inputs,
-                                                             hessian_inputs,
-                                                             adj_inputs,
-                                                             dep,
-                                                             idx,
-                                                             relevant_dependencies,
-                                                             prepared)
+            hessian_output = call("evaluate_hessian_component", "hessian", {"idx": idx},
+                                  self.evaluate_hessian_component, inputs, hessian_inputs, adj_inputs, dep, idx,
+                                  relevant_dependencies, prepared)
             if hessian_output is not None:
                 dep.add_hessian_output(hessian_output)
 
@@ -343,13 +344,13 @@ class Block(object):
         if len(relevant_outputs) <= 0:
             return
 
-        prepared = self.prepare_recompute_component(inputs, relevant_outputs)
+        call = event_call()
+        prepared = call("prepare_recompute_component", "recompute", None,
+                        self.prepare_recompute_component, inputs, relevant_outputs)
 
         for idx, out in relevant_outputs:
-            output = self.recompute_component(inputs,
-                                              out,
-                                              idx,
-                                              prepared)
+            output = call("recompute_component", "recompute", {"idx": idx},
+                          self.recompute_component, inputs, out, idx, prepared)
             if output is not None:
                 out.checkpoint = output
 
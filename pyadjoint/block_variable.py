@@ -5,6 +5,8 @@ class BlockVariable(object):
     """References a block output variable.
 
     """
+    __slots__ = ("output", "adj_value", "tlm_value", "hessian_value", "_checkpoint", "is_control",
+                 "floating_type", "marked_in_path", "__weakref__")
 
     def __init__(self, output):
         self.output = output
@@ -45,10 +47,13 @@ class BlockVariable(object):
         if "tlm" in types:
             self.tlm_value = None
 
-    @no_annotations
     def save_output(self, overwrite=True):
-        if overwrite or self.checkpoint is None:
-            self._checkpoint = self.output._ad_create_checkpoint()
+        if overwrite or self._checkpoint is None:
+            self._create_checkpoint()
+
+    @no_annotations
+    def _create_checkpoint(self):
+        self._checkpoint = self.output._ad_create_checkpoint()
 
     @property
     def saved_output(self):
@@ -1,4 +1,5 @@
 from .overloaded_type import OverloadedType, create_overloaded_object
+from .stacking import seed_value
 import logging
 
 
@@ -45,11 +46,15 @@ class Control(object):
     def tape_value(self):
         return create_overloaded_object(self.block_variable.saved_output)
 
-    def get_derivative(self, options={}):
-        if self.block_variable.adj_value is None:
+    def get_derivative(self, options={}, seed=None):
+        adj_value = self.block_variable.adj_value
+        if seed is not None:
+            # The adjoint values are stacked, one for each functional.
+            adj_value = seed_value(adj_value, seed)
+        if adj_value is None:
             logging.warning("Adjoint value is None, is the functional independent of the control variable?")
             return self.control._ad_convert_type(0., options=options)
-        return self.control._ad_convert_type(self.block_variable.adj_value, options=options)
+        return self.control._ad_convert_type(adj_value, options=options)
 
     def get_hessian(self, options={}):
         if self.block_variable.adj_value is None:
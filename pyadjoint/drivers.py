@@ -1,30 +1,43 @@
 from .enlisting import Enlist
-from .tape import get_working_tape, stop_annotating
+from .stacking import StackedValues
+from .tape import get_working_tape, stop_annotating, derivative_tolerance
+from .timeline import traced
 
 
-def compute_gradient(J, m, options=None, tape=None, adj_value=1.0):
+@traced("driver")
+def compute_gradient(J, m, options=None, tape=None, adj_value=1.0, tol=None):
     """
     Compute the gradient of J with respect to the initialisation value of m,
     that is the value of m at its creation.
 
+    If J is a list of functionals, the gradients of all of them are computed in
+    a single reverse sweep of the tape, with one adjoint seed per functional.
+
     Args:
-        J (AdjFloat):  The objective functional.
+        J (AdjFloat or list of AdjFloat):  The objective functional(s).
         m (list or instance of Control): The (list of) controls.
         options (dict): A dictionary of options. To find a list of available options
             have a look at the specific control type.
         tape: The tape to use. Default is the current tape.
+        adj_value: The adjoint seed of J. If J is a list, this can also be a list of one seed per functional.
+        tol (float): The accuracy target of the gradient. If given, iterative adjoint solves may use
+            relative tolerances up to `tol`. Default is to solve the adjoint equations to full accuracy.
 
     Returns:
         OverloadedType: The derivative with respect to the control. Should be an instance of the same type as
-            the control.
+            the control. If J is a list, a list with the derivative of each functional is returned.
     """
     options = options or {}
     tape = tape or get_working_tape()
     tape.reset_variables()
-    J.adj_value = adj_value
     m = Enlist(m)
 
-    with stop_annotating():
+    if isinstance(J, (list, tuple)):
+        return _compute_gradients(J, m, options, tape, adj_value, tol)
+
+    J.adj_value = adj_value
+
+    with stop_annotating(), derivative_tolerance(tol):
         with tape.marked_nodes(m):
             tape.evaluate_adj(markings=True)
 
@@ -32,7 +45,29 @@ def compute_gradient(J, m, options=None, tape=None, adj_value=1.0):
     return m.delist(grads)
 
 
-def compute_hessian(J, m, m_dot, options=None, tape=None):
+def _compute_gradients(functionals, m, options, tape, adj_value, tol):
+    num_seeds = len(functionals)
+    adj_values = Enlist(adj_value)
+    if not adj_values.listed:
+        adj_values = adj_values * num_seeds
+    elif len(adj_values) != num_seeds:
+        raise ValueError("adj_value should be a list of the same length as J.")
+
+    for seed, (J, value) in enumerate(zip(functionals, adj_values)):
+        seeds = StackedValues([None] * num_seeds)
+        seeds[seed] = value
+        J.block_variable.add_adj_output(seeds)
+
+    with stop_annotating(), derivative_tolerance(tol):
+        with tape.marked_nodes(m):
+            tape.evaluate_adj(markings=True, stacked=True)
+
+    return [m.delist([c.get_derivative(options=options, seed=seed) for c in m])
+            for seed in range(num_seeds)]
+
+
+@traced("driver")
+def compute_hessian(J, m, m_dot, options=None, tape=None, tol=None):
     """
     Compute the Hessian of J in a direction m_dot at the current value of m
 
@@ -43,6 +78,8 @@ def compute_hessian(J, m, m_dot, options=None, tape=None):
         options (dict): A dictionary of options. To find a list of available options
             have a look at the specific control type.
         tape: The tape to use. Default is the current tape.
+        tol (float): The accuracy target of the Hessian action. If given, iterative tlm and
+            second-order adjoint solves may use relative tolerances up to `tol`.
 
     Returns:
         OverloadedType: The second derivative with respect to the control in direction m_dot. Should be an instance of
@@ -59,11 +96,11 @@ def compute_hessian(J, m, m_dot, options=None, tape=None):
     for i, value in enumerate(m_dot):
         m[i].tlm_value = m_dot[i]
 
-    with stop_annotating():
+    with stop_annotating(), derivative_tolerance(tol):
         tape.evaluate_tlm()
 
     J.block_variable.hessian_value = 0.0
-    with stop_annotating():
+    with stop_annotating(), derivative_tolerance(tol):
         with tape.marked_nodes(m):
             tape.evaluate_hessian(markings=True)
 
@@ -71,6 +108,7 @@ def compute_hessian(J, m, m_dot, options=None, tape=None):
     return m.delist(r)
 
 
+@traced("driver")
 def solve_adjoint(J, tape=None, adj_value=1.0):
     """
     Solve the adjoint problem for a functional J.
@@ -0,0 +1,159 @@
+"""Vectorized elementwise functions and reductions.
+
+Optimization libraries such as ROL apply elementwise functions (e.g. bound projections)
+and reductions to the controls through the `_applyUnary`, `_applyBinary` and `_reduce`
+methods of the overloaded types. Calling the function once per entry is slow for large
+controls, so the functions are recognised here and replaced with NumPy operations on whole arrays.
+Functions that are not recognised are applied with :func:`numpy.vectorize`.
+
+"""
+import functools
+import math
+import operator
+
+import numpy
+
+
+class ElementwiseFunction(object):
+    """An elementwise function that is applied to whole NumPy arrays at once.
+
+    Args:
+        vectorized (function): Takes one or two arrays (or scalars) and returns the result array.
+
+    """
+    def __init__(self, vectorized):
+        self.vectorized = vectorized
+
+    def __call__(self, *args):
+        return self.vectorized(*args)
+
+
+def fill(value):
+    """Returns the elementwise function that sets every entry to `value`."""
+    return ElementwiseFunction(lambda x: numpy.full_like(x, value, dtype=float))
+
+
+def _scale(alpha):
+    return lambda x: alpha * x
+
+
+def _shift(shift):
+    return lambda x: x + shift
+
+
+def _power(exponent):
+    return lambda x: numpy.power(x, exponent)
+
+
+def _threshold(f):
+    # ROL's thresholds compute either max(x, t) or min(x, t).
+    return functools.partial(numpy.clip, a_min=f(-math.inf), a_max=f(math.inf))
+
+
+def _axpy(f):
+    alpha = f(0.0, 1.0)
+    return lambda x, y: x + alpha * y
+
+
+# The elementwise functions of ROL (ROL::Elementwise), by class name.
+# Parameterized functions are recognised by evaluating them at a few points.
+_rol_unary_functions = {
+    "AbsoluteValue": lambda f: numpy.abs,
+    "Reciprocal": lambda f: numpy.reciprocal,
+    "Sign": lambda f: numpy.sign,
+    "Fill": lambda f: fill(f(0.0)).vectorized,
+    "Scale": lambda f: _scale(f(1.0)),
+    "Shift": lambda f: _shift(f(0.0)),
+    "Power": lambda f: _power(math.log2(f(2.0))),
+    "ThresholdUpper": _threshold,
+    "ThresholdLower": _threshold,
+}
+
+_rol_binary_functions = {
+    "Plus": lambda f: numpy.add,
+    "Multiply": lambda f: numpy.multiply,
+    "Divide": lambda f: numpy.divide,
+    "Min": lambda f: numpy.minimum,
+    "Max": lambda f: numpy.maximum,
+    "Set": lambda f: lambda x, y: numpy.array(y, dtype=float),
+    "Axpy": _axpy,
+}
+
+_rol_reductions = {
+    "ReductionSum": numpy.sum,
+    "ReductionMin": numpy.min,
+    "ReductionMax": numpy.max,
+}
+
+_python_unary_functions = {
+    abs: numpy.abs,
+    operator.neg: numpy.negative,
+    math.sqrt: numpy.sqrt,
+    math.exp: numpy.exp,
+}
+
+_python_binary_functions = {
+    operator.add: numpy.add,
+    operator.sub: numpy.subtract,
+    operator.mul: numpy.multiply,
+    operator.truediv: numpy.divide,
+    min: numpy.minimum,
+    max: numpy.maximum,
+}
+
+_python_reductions = {
+    operator.add: numpy.sum,
+    min: numpy.min,
+    max: numpy.max,
+}
+
+
+def _vectorize(f, known_functions, rol_functions):
+    if isinstance(f, ElementwiseFunction):
+        return f.vectorized
+    if isinstance(f, numpy.ufunc):
+        return f
+    try:
+        if f in known_functions:
+            return known_functions[f]
+    except TypeError:
+        # Unhashable callable.
+        pass
+    name = type(f).__name__
+    if name in rol_functions:
+        return rol_functions[name](f)
+    return numpy.vectorize(f, otypes=[float])
+
+
+def unary(f):
+    """Returns a function that applies the scalar function `f` to every entry of an array."""
+    return _vectorize(f, _python_unary_functions, _rol_unary_functions)
+
+
+def binary(f):
+    """Returns a function that applies the scalar function `f` to the entries of two arrays pairwise."""
+    return _vectorize(f, _python_binary_functions, _rol_binary_functions)
+
+
+def reduction(r):
+    """Returns a function `reduce(array, r0)` equivalent to folding `r` over the entries of the array,
+    starting from `r0`.
+
+    Reductions that are recognised must be associative, so that the entries are reduced
+    with NumPy and the result is combined with `r0` in a single call to `r`.
+    """
+    reduce_array = None
+    try:
+        reduce_array = _python_reductions.get(r)
+    except TypeError:
+        pass
+    if reduce_array is None:
+        reduce_array = _rol_reductions.get(type(r).__name__)
+    if reduce_array is None:
+        return lambda array, r0: functools.reduce(r, array, r0)
+
+    def reduce(array, r0):
+        if len(array) <= 0:
+            return r0
+        return r(float(reduce_array(array)), r0)
+    return reduce
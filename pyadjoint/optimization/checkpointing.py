@@ -0,0 +1,186 @@
+import glob
+import hashlib
+import os
+
+import numpy
+
+from ..adjfloat import AdjFloat
+from ..enlisting import Enlist
+from ..reduced_functional import ReducedFunctional
+from ..tape import no_annotations
+
+
+def _is_root():
+    try:
+        from mpi4py import MPI
+    except ImportError:
+        return True
+    return MPI.COMM_WORLD.rank == 0
+
+
+def _save(path, arrays):
+    """Writes the arrays to `path` atomically, so that a crash never leaves a partially written file."""
+    if not _is_root():
+        return
+    tmp = path + ".tmp.npz"
+    numpy.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return None
+    with numpy.load(path) as data:
+        return dict(data)
+
+
+def to_array(controls, values):
+    """Returns the values of the controls as a single (global) array."""
+    values = Enlist(values)
+    if len(values) <= 0:
+        return numpy.zeros(0)
+    return numpy.concatenate([numpy.asarray(control.fetch_numpy(value), dtype=float)
+                              for control, value in zip(controls, values)])
+
+
+def from_array(controls, array):
+    """Returns copies of the control values, set to the entries of `array`."""
+    values = []
+    offset = 0
+    for control in controls:
+        value, offset = control.assign_numpy(control.copy_data(), array, offset)
+        values.append(value)
+    return values
+
+
+class OptimizationCheckpoint(object):
+    """Stores the state of an optimization in a directory, so that it can be restarted after a crash.
+
+    The directory holds an evaluation database with the functional values and derivatives
+    that are computed, keyed by a hash of the control values, and the state of the optimizer
+    (e.g. the iterate and the L-BFGS pairs). All data are stored as NumPy binary (.npz) files,
+    which are replaced atomically.
+
+    Args:
+        directory (str): The directory of the checkpoint files.
+        restart (bool): If True, the stored evaluations and optimizer state are used.
+            Otherwise, previously stored data in `directory` are removed.
+
+    """
+    def __init__(self, directory, restart=False):
+        self.directory = directory
+        self.evaluations_directory = os.path.join(directory, "evaluations")
+        self.state_file = os.path.join(directory, "state.npz")
+        self.restart = restart
+        if _is_root():
+            os.makedirs(self.evaluations_directory, exist_ok=True)
+            if not restart:
+                for path in glob.glob(os.path.join(self.evaluations_directory, "*.npz")) + [self.state_file]:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    @staticmethod
+    def key(array, scale=1.0):
+        """Returns the key of an evaluation at the control values `array`."""
+        h = hashlib.sha1(numpy.ascontiguousarray(array, dtype=float).tobytes())
+        h.update(repr(float(scale)).encode())
+        return h.hexdigest()
+
+    def _evaluation_file(self, key, kind):
+        return os.path.join(self.evaluations_directory, "%s-%s.npz" % (key, kind))
+
+    def save_evaluation(self, key, kind, value):
+        _save(self._evaluation_file(key, kind), {"value": numpy.asarray(value, dtype=float)})
+
+    def load_evaluation(self, key, kind):
+        """Returns the stored evaluation of `kind` (e.g. "value") at `key`, or None."""
+        data = _load(self._evaluation_file(key, kind))
+        return None if data is None else data["value"]
+
+    def save_state(self, **arrays):
+        """Stores the state of the optimizer. The state is a set of named arrays (or numbers)."""
+        _save(self.state_file, {name: numpy.asarray(value) for name, value in arrays.items()})
+
+    def load_state(self):
+        """Returns the stored optimizer state as a dict, or None if there is none or this is not a restart."""
+        if not self.restart:
+            return None
+        return _load(self.state_file)
+
+
+class CheckpointedReducedFunctional(ReducedFunctional):
+    """A reduced functional that stores all evaluations in an :class:`OptimizationCheckpoint`.
+
+    Evaluations that are found in the checkpoint are replayed instead of recomputed. The tape
+    is only evaluated at such control values when it is needed for a derivative that is not stored.
+
+    Args:
+        rf (ReducedFunctional): The reduced functional.
+        checkpoint (OptimizationCheckpoint): The checkpoint.
+
+    """
+    def __init__(self, rf, checkpoint):
+        super().__init__(rf.functional, rf.controls, scale=rf.scale, tape=rf.tape,
+                         eval_cb_pre=rf.eval_cb_pre, eval_cb_post=rf.eval_cb_post,
+                         derivative_cb_pre=rf.derivative_cb_pre, derivative_cb_post=rf.derivative_cb_post,
+                         hessian_cb_pre=rf.hessian_cb_pre, hessian_cb_post=rf.hessian_cb_post)
+        self.checkpoint = checkpoint
+        # The key of the control values of the latest evaluation.
+        self.current_key = None
+        # The control values of the latest evaluation, if the tape is not evaluated at them.
+        self.pending_values = None
+        # The key of the control values the adjoint solution on the tape belongs to.
+        self.adjoint_key = None
+
+    def _key(self, values):
+        return self.checkpoint.key(to_array(self.controls, values), self.scale)
+
+    @no_annotations
+    def __call__(self, values):
+        values = Enlist(values)
+        key = self._key(values)
+        stored = self.checkpoint.load_evaluation(key, "value")
+        self.current_key = key
+        if stored is not None:
+            self.pending_values = [v._ad_copy() for v in values]
+            # The controls hold the latest values, as after an evaluation of the tape.
+            for control, value in zip(self.controls, self.pending_values):
+                control.update(value)
+            return AdjFloat(float(stored))
+
+        self.pending_values = None
+        self.adjoint_key = None
+        value = super().__call__(values)
+        self.checkpoint.save_evaluation(key, "value", float(value))
+        return value
+
+    def _evaluate_tape(self):
+        if self.pending_values is not None:
+            super().__call__(self.pending_values)
+            self.pending_values = None
+            self.adjoint_key = None
+
+    def derivative(self, options={}, tol=None):
+        representation = options.get("riesz_representation", "l2")
+        kind = "derivative-%s" % representation
+        cacheable = self.current_key is not None and isinstance(representation, str)
+        if cacheable:
+            # Only exact derivatives are stored, so they satisfy any accuracy target.
+            stored = self.checkpoint.load_evaluation(self.current_key, kind)
+            if stored is not None:
+                return self.controls.delist(from_array(self.controls, stored))
+
+        self._evaluate_tape()
+        derivatives = super().derivative(options=options, tol=tol)
+        self.adjoint_key = self.current_key
+        if cacheable and tol is None:
+            self.checkpoint.save_evaluation(self.current_key, kind, to_array(self.controls, derivatives))
+        return derivatives
+
+    def hessian(self, m_dot, options={}, tol=None):
+        self._evaluate_tape()
+        if self.adjoint_key != self.current_key:
+            # The derivative was replayed, but the Hessian needs the adjoint solution on the tape.
+            super().derivative(tol=tol)
+            self.adjoint_key = self.current_key
+        return super().hessian(m_dot, options=options, tol=tol)
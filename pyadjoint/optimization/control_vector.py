@@ -0,0 +1,128 @@
+import numpy
+
+from .. import elementwise
+from ..tape import no_annotations
+
+
+class ControlVector(object):
+    """A vector in the space of the controls, that keeps every control value distributed.
+
+    The vector is a list with one value for each control (e.g. a Function or an AdjFloat),
+    and all operations are implemented with the interface of the overloaded types
+    (`_ad_add`, `_ad_mul`, `_ad_dot`, `_ad_convert_type`, `_applyUnary`, ...).
+    These act on the process-local parts of the values, and only reduce scalars over MPI
+    (e.g. in the inner products), so that no global array of the controls is ever formed.
+
+    Args:
+        dat (list): The values, one for each control.
+        riesz_representation (str): The inner product of the control space, e.g. "l2", "L2" or "H1".
+            It is used by :meth:`dot` and :meth:`riesz_map`.
+
+    """
+    def __init__(self, dat, riesz_representation="l2"):
+        self.dat = list(dat)
+        self.riesz_representation = riesz_representation
+
+    @classmethod
+    def from_controls(cls, controls, riesz_representation="l2"):
+        """Returns a copy of the current values of `controls` as a ControlVector."""
+        return cls([control.copy_data() for control in controls], riesz_representation=riesz_representation)
+
+    def _new(self, dat):
+        return ControlVector(dat, riesz_representation=self.riesz_representation)
+
+    @property
+    def options(self):
+        return {"riesz_representation": self.riesz_representation}
+
+    def __len__(self):
+        return len(self.dat)
+
+    def __iter__(self):
+        return iter(self.dat)
+
+    @no_annotations
+    def copy(self):
+        return self._new([x._ad_copy() for x in self.dat])
+
+    @no_annotations
+    def __add__(self, other):
+        return self._new([x._ad_add(y) for x, y in zip(self.dat, other.dat)])
+
+    @no_annotations
+    def __sub__(self, other):
+        return self._new([x._ad_add(y._ad_mul(-1.0)) for x, y in zip(self.dat, other.dat)])
+
+    @no_annotations
+    def __mul__(self, alpha):
+        return self._new([x._ad_mul(alpha) for x in self.dat])
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1.0
+
+    @no_annotations
+    def axpy(self, alpha, other):
+        """Adds `alpha` times `other` to the vector."""
+        self.dat = [x._ad_add(y._ad_mul(alpha)) for x, y in zip(self.dat, other.dat)]
+
+    @no_annotations
+    def dot(self, other):
+        """Returns the inner product with `other`, in the Riesz representation of the vector."""
+        if self.riesz_representation == "l2":
+            return sum(x._ad_dot(y) for x, y in zip(self.dat, other.dat))
+        return sum(x._ad_dot(y, options=self.options) for x, y in zip(self.dat, other.dat))
+
+    def norm(self):
+        return self.dot(self) ** 0.5
+
+    @no_annotations
+    def riesz_map(self, derivatives):
+        """Returns the gradient that represents `derivatives` in the inner product of the vector.
+
+        Args:
+            derivatives (list): The derivatives of a functional with respect to the controls,
+                as returned by :meth:`ReducedFunctional.derivative` with the "l2" representation.
+
+        Returns:
+            ControlVector: The gradient.
+
+        """
+        return self._new([x._ad_convert_type(d, options=self.options) for x, d in zip(self.dat, derivatives)])
+
+    @no_annotations
+    def project(self, bounds):
+        """Returns the projection of the vector onto the bounds.
+
+        Args:
+            bounds (list): A (lower, upper) pair for each control. A bound is either None,
+                a number or a value of the same type as the control.
+
+        Returns:
+            ControlVector: The projected vector.
+
+        """
+        return self._new([_clip(x, lb, ub) for x, (lb, ub) in zip(self.dat, bounds)])
+
+
+def _clip(x, lb, ub):
+    if isinstance(x, float):
+        value = float(x)
+        if lb is not None:
+            value = max(value, float(lb))
+        if ub is not None:
+            value = min(value, float(ub))
+        return x._ad_convert_type(value)
+    if isinstance(x, numpy.ndarray):
+        return numpy.clip(x, lb, ub)
+
+    x = x._ad_copy()
+    for bound, f in ((lb, numpy.maximum), (ub, numpy.minimum)):
+        if bound is None:
+            continue
+        if isinstance(bound, (int, float)):
+            x._applyUnary(elementwise.ElementwiseFunction(lambda a, f=f, bound=bound: f(a, bound)))
+        else:
+            x._applyBinary(f, bound)
+    return x
@@ -25,8 +25,8 @@ class IPOPTSolver(OptimizationSolver):
 
     The cyipopt Problem instance is accessible as solver.ipopt_problem."""
 
-    def __init__(self, problem, parameters=None):
-        OptimizationSolver.__init__(self, problem, parameters)
+    def __init__(self, problem, parameters=None, checkpoint_dir=None, restart=False):
+        OptimizationSolver.__init__(self, problem, parameters, checkpoint_dir=checkpoint_dir, restart=restart)
 
         self.__build_ipopt_problem()
         self.__set_parameters()
@@ -0,0 +1,198 @@
+from __future__ import print_function
+
+from ..enlisting import Enlist
+from ..tape import no_annotations
+from .checkpointing import to_array, from_array
+from .control_vector import ControlVector
+from .line_search import TrialStepPool
+
+
+class LBFGSMemory(object):
+    """The pairs of control and gradient differences of the limited-memory BFGS method.
+
+    Args:
+        memory (int): The maximal number of pairs that are kept.
+
+    """
+    def __init__(self, memory=10):
+        self.memory = memory
+        self.pairs = []
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def update(self, s, y):
+        """Adds the pair (s, y), unless it violates the curvature condition.
+
+        Returns:
+            bool: True if the pair is added.
+
+        """
+        sy = s.dot(y)
+        if sy <= 1e-12 * s.norm() * y.norm():
+            return False
+        self.pairs.append((s, y, 1.0 / sy))
+        if len(self.pairs) > self.memory:
+            self.pairs.pop(0)
+        return True
+
+    def reset(self):
+        self.pairs = []
+
+    def apply(self, g):
+        """Returns the action of the inverse Hessian approximation on `g` (two-loop recursion).
+
+        All inner products are taken in the Riesz representation of the vectors,
+        so the approximation is independent of the discretisation of the controls.
+        """
+        q = g.copy()
+        alphas = []
+        for s, y, rho in reversed(self.pairs):
+            alpha = rho * s.dot(q)
+            q.axpy(-alpha, y)
+            alphas.append(alpha)
+
+        if len(self.pairs) > 0:
+            s, y, rho = self.pairs[-1]
+            q = q * (1.0 / (rho * y.dot(y)))
+
+        for (s, y, rho), alpha in zip(self.pairs, reversed(alphas)):
+            beta = rho * y.dot(q)
+            q.axpy(alpha - beta, s)
+        return q
+
+
+def _bounds_per_control(bounds, num_controls):
+    if bounds is None:
+        return None
+    lower, upper = bounds
+    if not isinstance(lower, (list, tuple)):
+        lower = [lower] * num_controls
+    if not isinstance(upper, (list, tuple)):
+        upper = [upper] * num_controls
+    return list(zip(lower, upper))
+
+
+@no_annotations
+def minimize_lbfgs(rf_np, bounds=None, riesz_representation="l2", options=None, callback=None, checkpoint=None):
+    """Minimizes the reduced functional with a projected limited-memory BFGS method.
+
+    The method works directly on the controls (see :class:`ControlVector`), so the
+    controls are never gathered into global arrays. The gradient and all inner products are
+    taken in `riesz_representation`. With the L2 or H1 representation of a discretised
+    function, the number of iterations does not grow with mesh refinement, as it does
+    with the l2 (Euclidean) inner product of scipy's L-BFGS-B.
+
+    Bounds are handled by projecting each trial point onto the feasible set, and the
+    step length is chosen with an Armijo line search along the projected path.
+    With the option "line_search_processes" > 1, that many step lengths (1, 1/2, 1/4, ...)
+    are tried concurrently in forked processes (see :class:`TrialStepPool`), and the largest
+    one with sufficient decrease is accepted. The iterates are the same as with the sequential
+    line search.
+
+    Args:
+        rf_np (ReducedFunctionalNumPy): The reduced functional. A ReducedFunctional is accepted as well.
+        bounds (tuple): (lower, upper) bounds as for :func:`minimize`, or None.
+        riesz_representation (str): The inner product of the control space, "l2", "L2" or "H1".
+        options (dict): The options of the method, with the default values:
+
+            - "maxiter" (100): The maximal number of iterations.
+            - "gtol" (1e-8): Stop when the norm of the projected gradient is below gtol.
+            - "ftol" (0): Stop when the relative decrease of the functional is below ftol.
+            - "memory" (10): The number of L-BFGS pairs.
+            - "c1" (1e-4): The sufficient decrease parameter of the line search.
+            - "max_backtracks" (20): The maximal number of step length reductions per iteration.
+            - "line_search_processes" (1): The number of trial steps evaluated concurrently.
+            - "disp" (False): Print progress information.
+
+        callback (function): Called with the list of control values after every iteration.
+        checkpoint (OptimizationCheckpoint): If given, the iterate and the L-BFGS pairs are stored
+            after every iteration, and restored when the checkpoint is a restart.
+
+    Returns:
+        list: The optimal control values.
+
+    """
+    rf = getattr(rf_np, "rf", rf_np)
+    options = {} if options is None else options
+    maxiter = options.get("maxiter", 100)
+    gtol = options.get("gtol", 1e-8)
+    ftol = options.get("ftol", 0.)
+    c1 = options.get("c1", 1e-4)
+    max_backtracks = options.get("max_backtracks", 20)
+    disp = options.get("disp", False)
+
+    bounds = _bounds_per_control(bounds, len(rf.controls))
+
+    def project(v):
+        return v if bounds is None else v.project(bounds)
+
+    def gradient(x):
+        return ControlVector(Enlist(rf.derivative(options=x.options)), riesz_representation=riesz_representation)
+
+    def vector(array):
+        return ControlVector(from_array(rf.controls, array), riesz_representation=riesz_representation)
+
+    x = project(ControlVector.from_controls(rf.controls, riesz_representation=riesz_representation))
+    memory = LBFGSMemory(options.get("memory", 10))
+    start = 0
+    state = None if checkpoint is None else checkpoint.load_state()
+    if state is not None:
+        start = int(state["iteration"])
+        x = vector(state["x"])
+        for s, y in zip(state["s"], state["y"]):
+            memory.update(vector(s), vector(y))
+    J = rf(x.dat)
+    g = gradient(x)
+
+    with TrialStepPool(rf, options.get("line_search_processes", 1)) as pool:
+        for iteration in range(start, maxiter):
+            projected_gradient = x - project(x - g)
+            if disp:
+                print("L-BFGS iteration %d: J = %e, |Pg| = %e" % (iteration, J, projected_gradient.norm()))
+            if projected_gradient.norm() <= gtol:
+                break
+
+            d = -memory.apply(g)
+            if d.dot(g) >= 0:
+                # Not a descent direction, restart with steepest descent.
+                memory.reset()
+                d = -g
+
+            alpha = 1.0 if len(memory) > 0 else min(1.0, 1.0 / g.norm())
+            x_new = None
+            backtracks = 0
+            while x_new is None and backtracks < max_backtracks:
+                n = min(pool.processes, max_backtracks - backtracks)
+                trials = [project(x + (alpha * 0.5 ** k) * d) for k in range(n)]
+                for k, (x_trial, J_trial) in enumerate(zip(trials, pool.evaluate(trials))):
+                    if J_trial <= J + c1 * g.dot(x_trial - x):
+                        x_new, J_new = x_trial, J_trial
+                        if k > 0:
+                            # The tape is evaluated at the first trial point.
+                            rf(x_new.dat)
+                        break
+                alpha *= 0.5 ** n
+                backtracks += n
+            if x_new is None:
+                if disp:
+                    print("L-BFGS: the line search failed.")
+                # Make sure that the tape is evaluated at the returned controls.
+                rf(x.dat)
+                break
+
+            g_new = gradient(x_new)
+            memory.update(x_new - x, g_new - g)
+            decrease = J - J_new
+            x, J, g = x_new, J_new, g_new
+            if checkpoint is not None:
+                checkpoint.save_state(iteration=iteration + 1, x=to_array(rf.controls, x.dat),
+                                      s=[to_array(rf.controls, s.dat) for s, _, _ in memory.pairs],
+                                      y=[to_array(rf.controls, y.dat) for _, y, _ in memory.pairs])
+
+            if callback is not None:
+                callback(x.dat)
+            if decrease <= ftol * max(abs(J), 1.0):
+                break
+
+    return x.dat
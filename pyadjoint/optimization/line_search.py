@@ -0,0 +1,76 @@
+import multiprocessing
+
+from ..timeline import get_tracer
+from .checkpointing import to_array, from_array
+
+
+# The reduced functional of the worker processes. The workers are forked, so each
+# inherits its own copy of the reduced functional and the recorded tape.
+_worker_rf = None
+
+
+def _evaluate_trial(array):
+    value = float(_worker_rf(from_array(_worker_rf.controls, array)))
+    # The trace events of the worker are sent back to the parent with the value.
+    tracer = get_tracer()
+    return value, None if tracer is None else tracer.take_events()
+
+
+class TrialStepPool(object):
+    """Evaluates the reduced functional at several trial points of a line search concurrently.
+
+    The first trial point is evaluated in the calling process, so that the tape is evaluated
+    at it afterwards, and the others in forked worker processes, each with its own copy of
+    the tape. The trial points are sent to the workers as arrays of the control values.
+
+    Since the workers are forked, the pool can only be used with a start method "fork"
+    (e.g. on Linux), and not in MPI parallel runs. If tracing is on (see :class:`tracing`),
+    the events of the workers are added to the trace of the calling process.
+
+    Args:
+        rf (ReducedFunctional): The reduced functional.
+        processes (int): The number of trial points evaluated concurrently.
+            With processes <= 1 no worker processes are started.
+
+    """
+    def __init__(self, rf, processes=1):
+        global _worker_rf
+        self.rf = rf
+        self.processes = max(int(processes), 1)
+        self.pool = None
+        if self.processes > 1:
+            if "fork" not in multiprocessing.get_all_start_methods():
+                raise ValueError("A parallel line search needs the 'fork' start method of multiprocessing.")
+            _worker_rf = rf
+            self.pool = multiprocessing.get_context("fork").Pool(self.processes - 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        global _worker_rf
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            _worker_rf = None
+
+    def evaluate(self, trials):
+        """Returns the functional values at the trial points (a list of :class:`ControlVector`)."""
+        pending = None
+        if len(trials) > 1:
+            if self.pool is None:
+                raise ValueError("Only one trial point can be evaluated without worker processes.")
+            arrays = [to_array(self.rf.controls, x.dat) for x in trials[1:]]
+            pending = self.pool.map_async(_evaluate_trial, arrays)
+        values = [self.rf(trials[0].dat)]
+        if pending is not None:
+            tracer = get_tracer()
+            for value, events in pending.get():
+                values.append(value)
+                if tracer is not None and events is not None:
+                    tracer.add_events(events)
+        return values
@@ -0,0 +1,194 @@
+from __future__ import print_function
+
+import math
+
+import numpy
+
+from ..enlisting import Enlist
+from ..tape import no_annotations
+from .checkpointing import to_array, from_array
+from .control_vector import ControlVector
+
+
+def _to_boundary(p, d, radius):
+    """Returns tau >= 0 such that |p + tau d| = radius."""
+    dd = d.dot(d)
+    pd = p.dot(d)
+    pp = p.dot(p)
+    return (-pd + math.sqrt(max(pd ** 2 - dd * (pp - radius ** 2), 0.))) / dd
+
+
+def steihaug_cg(g, hessian_action, radius, tolerance, preconditioner=None, maxiter=100):
+    """Approximately minimizes the quadratic model g.p + 1/2 p.Hp subject to |p| <= radius
+    with the truncated conjugate gradient method of Steihaug.
+
+    Args:
+        g (ControlVector): The gradient.
+        hessian_action (function): Returns the (Riesz represented) action of the Hessian on a ControlVector.
+        radius (float): The trust-region radius.
+        tolerance (float): The relative residual norm at which the iteration stops.
+        preconditioner (function): Returns the action of an approximate inverse Hessian on a ControlVector.
+        maxiter (int): The maximal number of iterations.
+
+    Returns:
+        tuple: The step p, the Hessian action Hp and the number of Hessian actions.
+
+    """
+    p = g * 0.
+    Hp = g * 0.
+    r = g.copy()
+    z = r if preconditioner is None else preconditioner(r)
+    d = -z
+    rz = r.dot(z)
+    stop = tolerance * g.norm()
+
+    for i in range(maxiter):
+        Hd = hessian_action(d)
+        dHd = d.dot(Hd)
+        if dHd <= 0:
+            # Negative curvature: follow d to the boundary.
+            tau = _to_boundary(p, d, radius)
+            return p + tau * d, Hp + tau * Hd, i + 1
+
+        alpha = rz / dHd
+        p_next = p + alpha * d
+        if p_next.norm() >= radius:
+            tau = _to_boundary(p, d, radius)
+            return p + tau * d, Hp + tau * Hd, i + 1
+
+        p = p_next
+        Hp.axpy(alpha, Hd)
+        r.axpy(alpha, Hd)
+        if r.norm() <= stop:
+            return p, Hp, i + 1
+
+        z = r if preconditioner is None else preconditioner(r)
+        rz_next = r.dot(z)
+        d = d * (rz_next / rz) - z
+        rz = rz_next
+
+    return p, Hp, maxiter
+
+
+def _forcing_term(g_norm, g_norm_old, eta_old, eta_max, gamma=0.9, exponent=2.):
+    """The forcing term of Eisenstat and Walker (choice 2), with their safeguard."""
+    eta = gamma * (g_norm / g_norm_old) ** exponent
+    safeguard = gamma * eta_old ** exponent
+    if safeguard > 0.1:
+        eta = max(eta, safeguard)
+    return min(eta, eta_max)
+
+
+@no_annotations
+def minimize_trust_region_newton_cg(rf_np, bounds=None, riesz_representation="l2", preconditioner=None,
+                                    options=None, callback=None, checkpoint=None):
+    """Minimizes the reduced functional with an inexact trust-region Newton-CG method.
+
+    Each iteration evaluates the functional and its gradient once, and then solves the
+    trust-region subproblem with the Steihaug-CG method (:func:`steihaug_cg`).
+    All Hessian actions of the inner iterations reuse the adjoint solution of the gradient,
+    so each action costs one tangent linear and one second-order adjoint sweep.
+    The inner iterations stop at the relative residual given by the forcing terms of
+    Eisenstat and Walker, so that the first iterations are cheap and convergence is
+    superlinear (quadratic with "eta_max" tending to 0) near the optimum.
+
+    Args:
+        rf_np (ReducedFunctionalNumPy): The reduced functional. A ReducedFunctional is accepted as well.
+        bounds: Bounds are not supported by this method, and must be None.
+        riesz_representation (str): The inner product of the control space, "l2", "L2" or "H1".
+        preconditioner (function): Returns an approximation of the inverse Hessian applied to
+            a :class:`ControlVector` (in the Riesz representation).
+        options (dict): The options of the method, with the default values:
+
+            - "maxiter" (50): The maximal number of Newton iterations.
+            - "gtol" (1e-8): Stop when the norm of the gradient is below gtol.
+            - "radius" (1.0): The initial trust-region radius.
+            - "max_radius" (1e4): The maximal trust-region radius.
+            - "eta" (1e-4): Steps with a smaller ratio of actual to predicted reduction are rejected.
+            - "eta_max" (0.9): The maximal forcing term.
+            - "max_cg_iterations" (100): The maximal number of CG iterations per Newton iteration.
+            - "disp" (False): Print progress information.
+
+        callback (function): Called with the list of control values after every iteration.
+        checkpoint (OptimizationCheckpoint): If given, the iterate and the trust-region state are
+            stored after every iteration, and restored when the checkpoint is a restart.
+
+    Returns:
+        list: The optimal control values.
+
+    """
+    if bounds is not None:
+        raise ValueError("The trust-region Newton-CG method does not support bounds.")
+
+    rf = getattr(rf_np, "rf", rf_np)
+    options = {} if options is None else options
+    maxiter = options.get("maxiter", 50)
+    gtol = options.get("gtol", 1e-8)
+    radius = options.get("radius", 1.0)
+    max_radius = options.get("max_radius", 1e4)
+    eta_accept = options.get("eta", 1e-4)
+    eta_max = options.get("eta_max", 0.9)
+    max_cg_iterations = options.get("max_cg_iterations", 100)
+    disp = options.get("disp", False)
+
+    def gradient(x):
+        return ControlVector(Enlist(rf.derivative(options=x.options)), riesz_representation=riesz_representation)
+
+    def hessian_action(d):
+        return ControlVector(Enlist(rf.hessian(d.dat, options=d.options)), riesz_representation=riesz_representation)
+
+    x = ControlVector.from_controls(rf.controls, riesz_representation=riesz_representation)
+    g_norm_old = None
+    forcing = eta_max
+    start = 0
+    state = None if checkpoint is None else checkpoint.load_state()
+    if state is not None:
+        start = int(state["iteration"])
+        x = ControlVector(from_array(rf.controls, state["x"]), riesz_representation=riesz_representation)
+        radius = float(state["radius"])
+        forcing = float(state["forcing"])
+        g_norm_old = None if numpy.isnan(state["g_norm_old"]) else float(state["g_norm_old"])
+    J = rf(x.dat)
+    g = gradient(x)
+    g_norm = g.norm()
+
+    for iteration in range(start, maxiter):
+        if disp:
+            print("Newton-CG iteration %d: J = %e, |g| = %e, radius = %e" % (iteration, J, g_norm, radius))
+        if g_norm <= gtol:
+            break
+
+        if g_norm_old is not None:
+            forcing = _forcing_term(g_norm, g_norm_old, forcing, eta_max)
+        p, Hp, cg_iterations = steihaug_cg(g, hessian_action, radius, forcing,
+                                           preconditioner=preconditioner, maxiter=max_cg_iterations)
+
+        predicted = -(g.dot(p) + 0.5 * p.dot(Hp))
+        x_new = x + p
+        J_new = rf(x_new.dat)
+        rho = (J - J_new) / predicted if predicted > 0 else -1.
+
+        p_norm = p.norm()
+        if rho < 0.25:
+            radius = 0.25 * p_norm
+        elif rho > 0.75 and p_norm >= 0.99 * radius:
+            radius = min(2 * radius, max_radius)
+
+        if rho > eta_accept:
+            x, J = x_new, J_new
+            g_norm_old = g_norm
+            g = gradient(x)
+            g_norm = g.norm()
+            if callback is not None:
+                callback(x.dat)
+        else:
+            # The tape was evaluated at the rejected step, and the Hessian actions of the
+            # next subproblem need the forward and adjoint solutions at x.
+            rf(x.dat)
+            g = gradient(x)
+
+        if checkpoint is not None:
+            checkpoint.save_state(iteration=iteration + 1, x=to_array(rf.controls, x.dat), radius=radius,
+                                  forcing=forcing, g_norm_old=numpy.nan if g_norm_old is None else g_norm_old)
+
+    return x.dat
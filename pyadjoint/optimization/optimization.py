@@ -4,6 +4,9 @@ import six
 from ..reduced_functional import ReducedFunctional
 from ..reduced_functional_numpy import ReducedFunctionalNumPy, gather
 from ..tape import no_annotations
+from .checkpointing import OptimizationCheckpoint, CheckpointedReducedFunctional
+from .lbfgs import minimize_lbfgs
+from .newton_cg import minimize_trust_region_newton_cg
 
 
 def serialise_bounds(rf_np, bounds):
@@ -22,7 +25,8 @@ def serialise_bounds(rf_np, bounds):
         for j in range(len(bounds[i])):
             bound = bounds[i][j]
             if type(bound) in [int, float, np.int32, np.int64, np.float32, np.float64]:
-                bound_len = len(rf_np.get_global(rf_np.controls[j]))
+                # The size of the control, without gathering its values.
+                bound_len = rf_np.controls[j].control._ad_dim()
                 const_bound = bound * np.ones(bound_len)
 
                 bounds_arr[i] += const_bound.tolist()
@@ -188,7 +192,11 @@ optimization_algorithms_dict = {'L-BFGS-B': ('The L-BFGS-B implementation in sci
                                 'basinhopping': ('Global basin hopping method', minimize_scipy_generic),
                                 'COBYLA': ('Gradient-free constrained optimization by linear approxition method',
                                            minimize_scipy_generic),
-                                'Custom': ('User-provided optimization algorithm', minimize_custom)
+                                'Custom': ('User-provided optimization algorithm', minimize_custom),
+                                'LBFGS': ('The projected L-BFGS implementation in pyadjoint, which works in the '
+                                          'inner product of the control space.', minimize_lbfgs),
+                                'TR-Newton-CG': ('The inexact trust-region Newton-CG (Steihaug) implementation '
+                                                 'in pyadjoint.', minimize_trust_region_newton_cg)
                                 }
 
 
@@ -201,7 +209,7 @@ def print_optimization_methods():
 
 
 @no_annotations
-def minimize(rf, method='L-BFGS-B', scale=1.0, **kwargs):
+def minimize(rf, method='L-BFGS-B', scale=1.0, checkpoint_dir=None, restart=False, **kwargs):
     """Solves the minimisation problem with PDE constraint:
 
            min_m func(u, m)
@@ -222,6 +230,10 @@ def minimize(rf, method='L-BFGS-B', scale=1.0, **kwargs):
         * 'scale' is a factor to scale to problem (default: 1.0).
         * 'bounds' is an optional keyword parameter to support control constraints: bounds = (lb, ub).
             lb and ub must be of the same type than the parameters m.
+        * 'checkpoint_dir' is an optional directory in which all evaluations of the functional and its
+            derivative, and the state of the pyadjoint optimizers, are stored.
+        * 'restart' resumes an optimization from the data in 'checkpoint_dir', replaying the stored
+            evaluations instead of recomputing them.
 
         Additional arguments specific for the optimization algorithms can be added to the minimize functions
         (e.g. iprint = 2). These arguments will be passed to the underlying optimization algorithm.
@@ -230,6 +242,14 @@ def minimize(rf, method='L-BFGS-B', scale=1.0, **kwargs):
 
     """
     rf.scale = scale
+    checkpoint = None
+    if checkpoint_dir is not None:
+        checkpoint = OptimizationCheckpoint(checkpoint_dir, restart=restart)
+        if isinstance(rf, ReducedFunctionalNumPy):
+            rf = ReducedFunctionalNumPy(CheckpointedReducedFunctional(rf.rf, checkpoint))
+        else:
+            rf = CheckpointedReducedFunctional(rf, checkpoint)
+
     if isinstance(rf, ReducedFunctionalNumPy):
         rf_np = rf
     elif isinstance(rf, ReducedFunctional):
@@ -250,6 +270,8 @@ def minimize(rf, method='L-BFGS-B', scale=1.0, **kwargs):
     if algorithm == minimize_scipy_generic:
         # For scipy's generic inteface we need to pass the optimisation method as a parameter.
         kwargs["method"] = method
+    if algorithm in (minimize_lbfgs, minimize_trust_region_newton_cg):
+        kwargs["checkpoint"] = checkpoint
 
     opt = algorithm(rf_np, **kwargs)
 
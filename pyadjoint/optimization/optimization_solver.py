@@ -1,11 +1,27 @@
+import copy
+
 from . import optimization_problem
+from .checkpointing import OptimizationCheckpoint, CheckpointedReducedFunctional
 
 
 class OptimizationSolver(object):
-    """An abstract base class that represents an optimization solver."""
-    def __init__(self, problem, parameters=None):
+    """An abstract base class that represents an optimization solver.
+
+    If `checkpoint_dir` is given, all evaluations of the reduced functional and its
+    derivative are stored in that directory (see :class:`OptimizationCheckpoint`).
+    With `restart=True`, a killed optimization is resumed by replaying the stored evaluations.
+    """
+    def __init__(self, problem, parameters=None, checkpoint_dir=None, restart=False):
         self.__check_arguments(problem, parameters)
 
+        #: checkpoint: the OptimizationCheckpoint, or None.
+        self.checkpoint = None
+        if checkpoint_dir is not None:
+            self.checkpoint = OptimizationCheckpoint(checkpoint_dir, restart=restart)
+            problem = copy.copy(problem)
+            problem.reduced_functional = CheckpointedReducedFunctional(problem.reduced_functional,
+                                                                       self.checkpoint)
+
         #: problem: an OptimizationProblem instance.
         self.problem = problem
 
@@ -1,35 +1,72 @@
 from __future__ import print_function
 
+import copy
+
 from .optimization_solver import OptimizationSolver
+from .. import elementwise
 from ..enlisting import Enlist
 from ..overloaded_type import OverloadedType
 from ..tape import no_annotations
 
+
+def _fingerprint(x):
+    """Returns a digest of the values of the ROLVector x."""
+    return tuple(d._ad_fingerprint() for d in x.dat)
+
+
 try:
     import ROL
 
     class ROLObjective(ROL.Objective):
+        """The reduced functional as a ROL objective.
+
+        ROL calls `update` whenever it might have changed the iterate, and evaluates the
+        value, gradient and Hessian actions at iterates it has visited before.
+        The objective keeps a fingerprint of the iterate that the tape was last
+        evaluated at, so that every distinct iterate costs one forward and one adjoint sweep.
+        """
         def __init__(self, rf, scale=1.):
             super(ROLObjective, self).__init__()
             self.rf = rf
             self.scale = scale
+            self.x_fingerprint = None
+            self.val = None
+            self.deriv = None
+            self.deriv_tol = None
+
+        def _forward(self, x):
+            """Evaluates the reduced functional at x, unless the tape is already evaluated at x."""
+            fingerprint = _fingerprint(x)
+            if fingerprint != self.x_fingerprint:
+                self.val = self.rf(x.dat)
+                self.x_fingerprint = fingerprint
+                self.deriv = None
+
+        def _derivative(self, x, tol):
+            """Returns the derivative at x, unless it is already computed to an accuracy of at least `tol`."""
+            self._forward(x)
+            if self.deriv is None or (self.deriv_tol is not None and (tol is None or tol < self.deriv_tol)):
+                self.deriv = self.rf.derivative(tol=tol)
+                self.deriv_tol = tol
+            return self.deriv
 
         def value(self, x, tol):
-            # FIXME: should check if we have evaluated here before
+            self._forward(x)
             return self.val
 
         def gradient(self, g, x, tol):
-            # self.rf(x.dat)
-            self.deriv = self.rf.derivative()  # forget=False, project=False)
-            g.dat = g.riesz_map(self.deriv)
+            g.dat = g.riesz_map(self._derivative(x, tol))
 
         def hessVec(self, hv, v, x, tol):
-            hessian_action = self.rf.hessian(v.dat)
+            # The second-order adjoint equations need the adjoint solution at x.
+            self._derivative(x, tol)
+            hessian_action = self.rf.hessian(v.dat, tol=tol)
             hv.dat = hv.riesz_map(hessian_action)
 
         def update(self, x, flag, iteration):
-            self.val = self.rf(x.dat)
-            # pass
+            # A False flag means that x is not changed.
+            if flag is not False:
+                self._forward(x)
 
     class ROLVector(ROL.Vector):
         def __init__(self, dat, inner_product="L2"):
@@ -93,8 +130,16 @@ try:
             ROL.Constraint.__init__(self)
             self.con = con
 
+            self.x_fingerprint = None
+            self.val = None
+
         def value(self, cvec, x, tol):
-            cvec.dat = self.con.function(x.dat)
+            fingerprint = _fingerprint(x)
+            if fingerprint != self.x_fingerprint:
+                self.val = self.con.function(x.dat)
+                self.x_fingerprint = fingerprint
+            # ROL may modify cvec, so the cached value is copied.
+            cvec.dat = copy.deepcopy(self.val)
 
         def applyJacobian(self, jv, v, x, tol):
             self.con.jacobian_action(x.dat, v.dat[0], jv.dat)
@@ -112,17 +157,17 @@ try:
         Use ROL to solve the given optimisation problem.
         """
 
-        def __init__(self, problem, parameters, inner_product="L2"):
+        def __init__(self, problem, parameters, inner_product="L2", checkpoint_dir=None, restart=False):
             """
             Create a new ROLSolver.
 
             The argument inner_product specifies the inner product to be used for
-            the control space.
+            the control space. See :class:`OptimizationSolver` for checkpoint_dir and restart.
 
             """
 
-            OptimizationSolver.__init__(self, problem, parameters)
-            self.rolobjective = ROLObjective(problem.reduced_functional)
+            OptimizationSolver.__init__(self, problem, parameters, checkpoint_dir=checkpoint_dir, restart=restart)
+            self.rolobjective = ROLObjective(self.problem.reduced_functional)
             x = [p.data() for p in self.problem.reduced_functional.controls]
             self.rolvector = ROLVector(x, inner_product=inner_product)
             self.params_dict = parameters
@@ -142,11 +187,11 @@ try:
             for i in range(len(controlvec.dat)):
                 general_lb, general_ub = bounds[i]
                 if isinstance(general_lb, (int, float)):
-                    lowervec.dat[i]._applyUnary(lambda x: general_lb)
+                    lowervec.dat[i]._applyUnary(elementwise.fill(general_lb))
                 else:
                     lowervec.dat[i].assign(general_lb)
                 if isinstance(general_ub, (int, float)):
-                    uppervec.dat[i]._applyUnary(lambda x: general_ub)
+                    uppervec.dat[i]._applyUnary(elementwise.fill(general_ub))
                 else:
                     uppervec.dat[i].assign(general_ub)
 
@@ -74,10 +74,13 @@ class OverloadedType(object):
     Abstract methods:
         :func:`adj_update_value`
 
+    The block variable is created on first access (e.g. when the object is added to a block or
+    used as a control), so that temporaries that never reach the tape do not allocate one.
+
     """
 
     def __init__(self, *args, **kwargs):
-        self.original_block_variable = self.create_block_variable()
+        pass
 
     @classmethod
     def _ad_init_object(cls, obj):
@@ -97,8 +100,32 @@ class OverloadedType(object):
 
     def create_block_variable(self):
         self.block_variable = BlockVariable(self)
+        if "_ad_original_block_variable" not in self.__dict__:
+            self._ad_original_block_variable = self.block_variable
         return self.block_variable
 
+    @property
+    def block_variable(self):
+        try:
+            return self.__dict__["_ad_block_variable"]
+        except KeyError:
+            return self.create_block_variable()
+
+    @block_variable.setter
+    def block_variable(self, value):
+        self.__dict__["_ad_block_variable"] = value
+
+    @property
+    def original_block_variable(self):
+        try:
+            return self.__dict__["_ad_original_block_variable"]
+        except KeyError:
+            return self.create_block_variable()
+
+    @original_block_variable.setter
+    def original_block_variable(self, value):
+        self.__dict__["_ad_original_block_variable"] = value
+
     @property
     def adj_value(self):
         return self.original_block_variable.adj_value
@@ -315,6 +342,21 @@ class OverloadedType(object):
         """
         raise NotImplementedError
 
+    def _ad_fingerprint(self):
+        """Returns a digest of the values of this object.
+
+        The digest must be the same on all processes. The default hashes the
+        output of :meth:`_ad_to_list`; types with distributed data should
+        override this to hash their local data and combine the digests.
+
+        Returns:
+            str: The hexadecimal digest.
+
+        """
+        import hashlib
+        import numpy
+        return hashlib.sha1(numpy.asarray(self._ad_to_list(self), dtype=float).tobytes()).hexdigest()
+
     def _ad_copy(self):
         """This method must be overridden.
 
@@ -1,6 +1,7 @@
 from .drivers import compute_gradient, compute_hessian
 from .enlisting import Enlist
 from .tape import get_working_tape, stop_annotating, no_annotations
+from .timeline import sweep, traced
 
 
 class ReducedFunctional(object):
@@ -38,7 +39,8 @@ class ReducedFunctional(object):
         self.hessian_cb_pre = hessian_cb_pre
         self.hessian_cb_post = hessian_cb_post
 
-    def derivative(self, options={}):
+    @traced("driver")
+    def derivative(self, options={}, tol=None):
         """Returns the derivative of the functional w.r.t. the control.
 
         Using the adjoint method, the derivative of the functional with
@@ -48,6 +50,7 @@ class ReducedFunctional(object):
         Args:
             options (dict): A dictionary of options. To find a list of available options
                 have a look at the specific control type.
+            tol (float): The accuracy target of the derivative, see :func:`compute_gradient`.
 
         Returns:
             OverloadedType: The derivative with respect to the control.
@@ -62,7 +65,8 @@ class ReducedFunctional(object):
                                        self.controls,
                                        options=options,
                                        tape=self.tape,
-                                       adj_value=self.scale)
+                                       adj_value=self.scale,
+                                       tol=tol)
 
         # Call callback
         self.derivative_cb_post(self.functional.block_variable.checkpoint,
@@ -71,8 +75,9 @@ class ReducedFunctional(object):
 
         return self.controls.delist(derivatives)
 
+    @traced("driver")
     @no_annotations
-    def hessian(self, m_dot, options={}):
+    def hessian(self, m_dot, options={}, tol=None):
         """Returns the action of the Hessian of the functional w.r.t. the control on a vector m_dot.
 
         Using the second-order adjoint method, the action of the Hessian of the
@@ -84,6 +89,7 @@ class ReducedFunctional(object):
                 action of the Hessian.
             options (dict): A dictionary of options. To find a list of
                 available options have a look at the specific control type.
+            tol (float): The accuracy target of the Hessian action, see :func:`compute_hessian`.
 
         Returns:
             OverloadedType: The action of the Hessian in the direction m_dot.
@@ -93,7 +99,7 @@ class ReducedFunctional(object):
         values = [c.data() for c in self.controls]
         self.hessian_cb_pre(self.controls.delist(values))
 
-        r = compute_hessian(self.functional, self.controls, m_dot, options=options, tape=self.tape)
+        r = compute_hessian(self.functional, self.controls, m_dot, options=options, tape=self.tape, tol=tol)
 
         # Call callback
         self.hessian_cb_post(self.functional.block_variable.checkpoint,
@@ -102,6 +108,7 @@ class ReducedFunctional(object):
 
         return self.controls.delist(r)
 
+    @traced("driver")
     @no_annotations
     def __call__(self, values):
         """Computes the reduced functional with supplied control value.
@@ -131,8 +138,7 @@ class ReducedFunctional(object):
         blocks = self.tape.get_blocks()
         with self.marked_controls():
             with stop_annotating():
-                for i in range(len(blocks)):
-                    blocks[i].recompute()
+                sweep(blocks, range(len(blocks)), "recompute", lambda block: block.recompute())
 
         func_value = self.scale * self.functional.block_variable.checkpoint
 
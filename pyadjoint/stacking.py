@@ -0,0 +1,117 @@
+from .tape import no_annotations
+
+
+class StackedValues(list):
+    """A list of values, one entry per seed, that are propagated together through a tape sweep.
+
+    Stacked values are stored in the `adj_value`, `tlm_value` and `hessian_value` attributes
+    of a :class:`BlockVariable` when several adjoint seeds (multiple functionals) or
+    several tangent linear directions are evaluated in a single sweep.
+    An entry is None if the corresponding seed does not reach the variable.
+
+    """
+    def __iadd__(self, other):
+        for i, value in enumerate(other):
+            if value is None:
+                continue
+            if self[i] is None:
+                self[i] = value
+            else:
+                self[i] += value
+        return self
+
+    def __repr__(self):
+        return "StackedValues({})".format(list.__repr__(self))
+
+
+def is_stacked(value):
+    return isinstance(value, StackedValues)
+
+
+def seed_value(value, seed):
+    """Returns the entry of `value` that corresponds to `seed`.
+
+    Values that are not stacked are shared between all seeds.
+    """
+    if isinstance(value, StackedValues):
+        return value[seed]
+    return value
+
+
+def unstack(value, num_seeds):
+    """Returns a list with the entry of `value` for each of the `num_seeds` seeds."""
+    return [seed_value(value, seed) for seed in range(num_seeds)]
+
+
+# For each evaluation mode, the BlockVariable attributes read by a block
+# and the attribute of the written block variables.
+_modes = {
+    "adj": (("adj_value",), "adj_value", "dependencies"),
+    "tlm": (("tlm_value",), "tlm_value", "outputs"),
+    "hessian": (("adj_value", "tlm_value", "hessian_value"), "hessian_value", "dependencies"),
+}
+
+
+def _num_seeds(block_variables, attrs):
+    for bv in block_variables:
+        for attr in attrs:
+            value = getattr(bv, attr)
+            if isinstance(value, StackedValues):
+                return len(value)
+    return 0
+
+
+@no_annotations
+def evaluate_stacked(block, mode, markings=False):
+    """Evaluates the adjoint, tlm or hessian of `block` when the inputs might be stacked.
+
+    If `mode` is listed in `block.stacked_modes`, the block is able to handle stacked values
+    itself and the regular evaluate method is called with the stacked values.
+    Otherwise the block is evaluated once for each seed.
+
+    Args:
+        block (Block): The block to evaluate.
+        mode (str): Either "adj", "tlm" or "hessian".
+        markings (bool): Passed on to the evaluate method of the block.
+
+    """
+    evaluate = getattr(block, "evaluate_" + mode)
+    # Tape.evaluate_tlm does not pass markings, and some blocks do not accept it.
+    kwargs = {} if mode == "tlm" else {"markings": markings}
+    if mode in block.stacked_modes:
+        return evaluate(**kwargs)
+
+    read_attrs, write_attr, written = _modes[mode]
+    deps = list(dict.fromkeys(block.get_dependencies()))
+    outputs = list(dict.fromkeys(block.get_outputs()))
+    targets = deps if written == "dependencies" else outputs
+    block_variables = list(dict.fromkeys(deps + outputs))
+
+    num_seeds = _num_seeds(block_variables, read_attrs)
+    if num_seeds <= 0:
+        return evaluate(**kwargs)
+
+    saved = [{attr: getattr(bv, attr) for attr in read_attrs} for bv in block_variables]
+    accumulated = [getattr(bv, write_attr) for bv in targets]
+    results = [StackedValues([None] * num_seeds) for _ in targets]
+
+    try:
+        for seed in range(num_seeds):
+            for bv, values in zip(block_variables, saved):
+                for attr, value in values.items():
+                    setattr(bv, attr, seed_value(value, seed))
+            for bv in targets:
+                setattr(bv, write_attr, None)
+            evaluate(**kwargs)
+            for bv, result in zip(targets, results):
+                result[seed] = getattr(bv, write_attr)
+    finally:
+        for bv, values in zip(block_variables, saved):
+            for attr, value in values.items():
+                setattr(bv, attr, value)
+        for bv, value in zip(targets, accumulated):
+            setattr(bv, write_attr, value)
+
+    for bv, result in zip(targets, results):
+        if any(value is not None for value in result):
+            getattr(bv, "add_{}_output".format(mode))(result)
@@ -1,32 +1,53 @@
 # Type dependencies
+import contextvars
 import os
 import re
 import threading
 from contextlib import contextmanager
 from functools import wraps
 
-_working_tape = None
-_stop_annotating = 0
+from .timeline import sweep
+
+# The working tape and the annotation state are context variables, so that every thread and
+# every asyncio task has its own. A new thread starts with an empty context, and then works on
+# the tape that was last set in the main thread (see :func:`get_working_tape`).
+_working_tape = contextvars.ContextVar("working_tape", default=None)
+_stop_annotating = contextvars.ContextVar("stop_annotating", default=0)
+_derivative_tolerance = contextvars.ContextVar("derivative_tolerance", default=None)
+_main_thread_tape = None
 
 
 def get_working_tape():
-    return _working_tape
+    """Returns the working tape of the current thread or asyncio task.
+
+    If no tape is set in the current context, the tape set last in the main thread is returned.
+    """
+    tape = _working_tape.get()
+    if tape is None:
+        return _main_thread_tape
+    return tape
 
 
 def set_working_tape(tape):
-    global _working_tape
-    _working_tape = tape
+    """Sets the working tape of the current thread or asyncio task.
+
+    Threads and tasks that set their own working tape can annotate and evaluate
+    independent models concurrently.
+    """
+    global _main_thread_tape
+    _working_tape.set(tape)
+    if threading.current_thread() is threading.main_thread():
+        _main_thread_tape = tape
 
 
 def pause_annotation():
-    global _stop_annotating
-    _stop_annotating += 1
+    _stop_annotating.set(_stop_annotating.get() + 1)
 
 
 def continue_annotation():
-    global _stop_annotating
-    _stop_annotating -= 1
-    return _stop_annotating <= 0
+    count = _stop_annotating.get() - 1
+    _stop_annotating.set(count)
+    return count <= 0
 
 
 class stop_annotating(object):
@@ -40,14 +61,51 @@ class stop_annotating(object):
 def no_annotations(function):
     """Decorator to turn off annotation for the decorated function."""
 
+    # The annotation state is changed inline, as in stop_annotating, since this is called
+    # for every dependency and output of every block that is created.
     @wraps(function)
     def wrapper(*args, **kwargs):
-        with stop_annotating():
+        _stop_annotating.set(_stop_annotating.get() + 1)
+        try:
             return function(*args, **kwargs)
+        finally:
+            _stop_annotating.set(_stop_annotating.get() - 1)
 
     return wrapper
 
 
+def get_derivative_tolerance():
+    """Returns the accuracy target of the current derivative computation.
+
+    None means that the adjoint and tlm equations are solved to the accuracy of the forward solvers.
+    """
+    return _derivative_tolerance.get()
+
+
+class derivative_tolerance(object):
+    """Context manager that sets the accuracy target of the adjoint and tlm solves in its scope.
+
+    Blocks that solve with iterative methods may loosen their relative tolerances up to `tol`,
+    which is cheaper when an optimization algorithm only needs inexact derivatives.
+    If `tol` is None, the current accuracy target is kept.
+
+    Args:
+        tol (float): The accuracy target.
+
+    """
+    def __init__(self, tol):
+        self.tol = tol
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = _derivative_tolerance.get()
+        if self.tol is not None:
+            _derivative_tolerance.set(self.tol)
+
+    def __exit__(self, *args):
+        _derivative_tolerance.set(self.previous)
+
+
 def annotate_tape(kwargs=None):
     """Returns True if annotation flag is on, and False if not.
 
@@ -66,7 +124,7 @@ def annotate_tape(kwargs=None):
 
     # TODO: Consider if there is any scenario where one would want the keyword to have
     # precedence over the global flag.
-    if _stop_annotating > 0:
+    if _stop_annotating.get() > 0:
         return False
 
     return annotate
@@ -114,7 +172,7 @@ class Tape(object):
     def reset_blocks(self):
         """Calls the Block.reset method of all blocks on the tape.
         """
-        for block in self._blocks:
+        for block in self.get_blocks():
             block.reset()
 
     def add_block(self, block):
@@ -135,29 +193,60 @@ class Tape(object):
         """
         return self._blocks
 
-    def evaluate_adj(self, last_block=0, markings=False):
-        for i in range(len(self._blocks) - 1, last_block - 1, -1):
-            self._blocks[i].evaluate_adj(markings=markings)
+    def evaluate_adj(self, last_block=0, markings=False, stacked=False):
+        """Evaluates the adjoint of every block on the tape, in reverse order.
 
-    def evaluate_tlm(self):
-        for i in range(len(self._blocks)):
-            self._blocks[i].evaluate_tlm()
+        Args:
+            last_block (int): The index of the last block to evaluate. Default 0.
+            markings (bool): Passed on to :meth:`Block.evaluate_adj`. Default False.
+            stacked (bool): Set to True if the adjoint values are :class:`StackedValues`,
+                i.e. several adjoint seeds are propagated in the same sweep. Default False.
 
-    def evaluate_hessian(self, markings=False):
-        for i in range(len(self._blocks) - 1, -1, -1):
-            self._blocks[i].evaluate_hessian(markings=markings)
+        """
+        blocks = self.get_blocks()
+        if stacked:
+            from .stacking import evaluate_stacked
+            sweep(blocks, range(len(blocks) - 1, last_block - 1, -1), "adj",
+                  lambda block: evaluate_stacked(block, "adj", markings=markings))
+            return
+
+        sweep(blocks, range(len(blocks) - 1, last_block - 1, -1), "adj",
+              lambda block: block.evaluate_adj(markings=markings))
+
+    def evaluate_tlm(self, stacked=False):
+        blocks = self.get_blocks()
+        if stacked:
+            from .stacking import evaluate_stacked
+            sweep(blocks, range(len(blocks)), "tlm", lambda block: evaluate_stacked(block, "tlm"))
+            return
+
+        sweep(blocks, range(len(blocks)), "tlm", lambda block: block.evaluate_tlm())
+
+    def evaluate_hessian(self, markings=False, stacked=False):
+        blocks = self.get_blocks()
+        if stacked:
+            from .stacking import evaluate_stacked
+            sweep(blocks, range(len(blocks) - 1, -1, -1), "hessian",
+                  lambda block: evaluate_stacked(block, "hessian", markings=markings))
+            return
+
+        sweep(blocks, range(len(blocks) - 1, -1, -1), "hessian",
+              lambda block: block.evaluate_hessian(markings=markings))
 
     def reset_variables(self, types=None):
-        for i in range(len(self._blocks) - 1, -1, -1):
-            self._blocks[i].reset_variables(types)
+        blocks = self.get_blocks()
+        for i in range(len(blocks) - 1, -1, -1):
+            blocks[i].reset_variables(types)
 
     def reset_hessian_values(self):
-        for i in range(len(self._blocks) - 1, -1, -1):
-            self._blocks[i].reset_variables(types=("hessian"))
+        blocks = self.get_blocks()
+        for i in range(len(blocks) - 1, -1, -1):
+            blocks[i].reset_variables(types=("hessian"))
 
     def reset_tlm_values(self):
-        for i in range(len(self._blocks) - 1, -1, -1):
-            self._blocks[i].reset_variables(types=("tlm"))
+        blocks = self.get_blocks()
+        for i in range(len(blocks) - 1, -1, -1):
+            blocks[i].reset_variables(types=("tlm"))
 
     def copy(self):
         """Returns a shallow copy of the tape.
@@ -167,7 +256,7 @@ class Tape(object):
 
         """
         # TODO: Offer deepcopying. But is it feasible memory wise to copy all checkpoints?
-        return Tape(blocks=self._blocks[:])
+        return Tape(blocks=self.get_blocks()[:])
 
     def optimize(self, controls=None, functionals=None):
         if controls is not None:
@@ -366,7 +455,7 @@ class Tape(object):
     def create_graph(self, backend="networkx"):
         import networkx as nx
         G = nx.DiGraph()
-        for i, block in enumerate(self._blocks):
+        for i, block in enumerate(self.get_blocks()):
             block.create_graph(G, pos=i)
         return G
 
@@ -0,0 +1,238 @@
+"""Timelines of tape evaluations in the Chrome Trace Event format.
+
+While tracing is on (see :class:`tracing`), the sweeps of the tape record a begin and an end event
+for every block they evaluate, with the block class, its index on the tape and its numbers of
+dependencies and outputs as arguments. Nested in these are events for the preparation and the
+components of the block, and for the assembly and solves of the backend blocks. The drivers and
+the methods of :class:`ReducedFunctional` record an event for every call.
+
+The events of all threads are recorded in one timeline. Processes forked while tracing start
+with an empty buffer, and their events can be sent to the parent with :meth:`Tracer.take_events`
+and :meth:`Tracer.add_events` (as the workers of :class:`TrialStepPool` do).
+
+The written files can be viewed in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+"""
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+_tracer = None
+
+
+class Tracer(object):
+    """A buffer of trace events.
+
+    Timestamps are taken from the monotonic clock, which is shared by the processes of a machine,
+    so the events of forked worker processes line up with those of the parent.
+    """
+    def __init__(self):
+        self.events = []
+        self._pid = os.getpid()
+        self._threads = set()
+
+    def _thread(self):
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            if not self._threads:
+                self.events.append({"ph": "M", "name": "process_name", "pid": self._pid, "tid": tid,
+                                    "args": {"name": _process_name()}})
+            self.events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                                "args": {"name": threading.current_thread().name}})
+            self._threads.add(tid)
+        return tid
+
+    def begin(self, name, category, args=None):
+        event = {"ph": "B", "name": name, "cat": category, "ts": time.perf_counter_ns() / 1e3,
+                 "pid": self._pid, "tid": self._thread()}
+        if args is not None:
+            event["args"] = args
+        self.events.append(event)
+
+    def end(self, name, category):
+        self.events.append({"ph": "E", "name": name, "cat": category, "ts": time.perf_counter_ns() / 1e3,
+                            "pid": self._pid, "tid": self._thread()})
+
+    def call(self, name, category, args, function, *function_args):
+        """Calls `function` with `function_args`, and records the call as an event."""
+        self.begin(name, category, args)
+        try:
+            return function(*function_args)
+        finally:
+            self.end(name, category)
+
+    def take_events(self):
+        """Returns the recorded events and empties the buffer."""
+        events, self.events = self.events, []
+        return events
+
+    def add_events(self, events):
+        """Adds events recorded by another tracer, e.g. in a worker process."""
+        self.events.extend(events)
+
+    def _after_fork(self):
+        self.events = []
+        self._pid = os.getpid()
+        self._threads = set()
+
+    def write(self, filename):
+        """Writes the events to `filename` as a Chrome trace (JSON object format)."""
+        import json
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+def _process_name():
+    # multiprocessing is not imported just to name the process.
+    multiprocessing = sys.modules.get("multiprocessing")
+    if multiprocessing is None:
+        return "MainProcess"
+    return multiprocessing.current_process().name
+
+
+def _after_fork_in_child():
+    if _tracer is not None:
+        _tracer._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_tracer():
+    """Returns the active :class:`Tracer`, or None if tracing is off."""
+    return _tracer
+
+
+def start_tracing(tracer=None):
+    """Turns tracing on, recording into `tracer` or a new :class:`Tracer`, which is returned."""
+    global _tracer
+    _tracer = Tracer() if tracer is None else tracer
+    return _tracer
+
+
+def stop_tracing():
+    """Turns tracing off, and returns the tracer that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+class tracing(object):
+    """Context manager that traces the tape evaluations in its scope.
+
+    Args:
+        filename (str): If given, the trace is written to this file on exit.
+
+    """
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.tracer = None
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = _tracer
+        self.tracer = start_tracing()
+        return self.tracer
+
+    def __exit__(self, *args):
+        stop_tracing()
+        if self.previous is not None:
+            start_tracing(self.previous)
+        if self.filename is not None:
+            self.tracer.write(self.filename)
+
+
+class _Event(object):
+    __slots__ = ("tracer", "name", "category", "args")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.tracer.begin(self.name, self.category, self.args)
+
+    def __exit__(self, *args):
+        self.tracer.end(self.name, self.category)
+
+
+class _NoEvent(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_no_event = _NoEvent()
+
+
+def trace_event(name, category, args=None):
+    """Returns a context manager that records its scope as an event, if tracing is on."""
+    tracer = _tracer
+    if tracer is None:
+        return _no_event
+    return _Event(tracer, name, category, args)
+
+
+def _untraced_call(name, category, args, function, *function_args):
+    return function(*function_args)
+
+
+def event_call():
+    """Returns :meth:`Tracer.call` of the active tracer, or, if tracing is off, a function
+    with the same arguments that only calls the function.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _untraced_call
+    return tracer.call
+
+
+def traced(category):
+    """Decorator that records every call of the decorated function as an event, if tracing is on."""
+    def decorator(function):
+        name = function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            tracer.begin(name, category)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                tracer.end(name, category)
+
+        return wrapper
+    return decorator
+
+
+def sweep(blocks, indices, mode, evaluate):
+    """Calls `evaluate` with each of the blocks at `indices`, and records each call as an event if tracing is on.
+
+    Args:
+        blocks (list): The blocks of the tape.
+        indices (iterable): The indices of the blocks in the order of evaluation.
+        mode (str): The evaluation, "adj", "tlm", "hessian" or "recompute", used as the event category.
+        evaluate (function): Evaluates the block it is called with.
+
+    """
+    tracer = _tracer
+    if tracer is None:
+        for i in indices:
+            evaluate(blocks[i])
+        return
+
+    for i in indices:
+        block = blocks[i]
+        name = type(block).__name__
+        tracer.call(name, mode, {"block": name, "index": i, "dependencies": len(block.get_dependencies()),
+                                 "outputs": len(block.get_outputs())}, evaluate, block)
@@ -0,0 +1,83 @@
+import pytest
+pytest.importorskip("fenics")
+
+import fenics
+from numpy.testing import assert_allclose
+from fenics import *
+from fenics_adjoint import *
+
+
+def test_interpolate_matches_backend():
+    mesh = UnitSquareMesh(4, 4)
+    V2 = FunctionSpace(mesh, "CG", 2)
+    V1 = FunctionSpace(mesh, "CG", 1)
+    W = VectorFunctionSpace(mesh, "DG", 1)
+    u = project(Expression("sin(x[0])*x[1]", degree=3), V2)
+    w = project(Expression(("x[0]*x[1]", "x[1]*x[1]"), degree=2), VectorFunctionSpace(mesh, "CG", 2))
+
+    assert_allclose(interpolate(u, V1).vector().get_local(),
+                    fenics.interpolate(u, V1).vector().get_local(), atol=1e-12)
+    assert_allclose(interpolate(w, W).vector().get_local(),
+                    fenics.interpolate(w, W).vector().get_local(), atol=1e-12)
+
+    other_mesh = UnitSquareMesh(3, 5)
+    V_other = FunctionSpace(other_mesh, "CG", 1)
+    assert_allclose(interpolate(u, V_other).vector().get_local(),
+                    fenics.interpolate(u, V_other).vector().get_local(), atol=1e-12)
+
+
+def test_interpolate_after_mesh_movement():
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 2)
+    u = project(Expression("sin(x[0])*x[1]", degree=3), V)
+    other_mesh = UnitSquareMesh(3, 5)
+    V_other = FunctionSpace(other_mesh, "CG", 1)
+    interpolate(u, V_other)
+
+    displacement = interpolate(Expression(("-0.2*x[0]", "0.1*x[1]*(1 - x[1])"), degree=2),
+                               VectorFunctionSpace(other_mesh, "CG", 1))
+    ALE.move(other_mesh, displacement)
+    assert_allclose(interpolate(u, V_other).vector().get_local(),
+                    fenics.interpolate(u, V_other).vector().get_local(), atol=1e-12)
+
+
+def test_interpolate_taylor():
+    tape = Tape()
+    set_working_tape(tape)
+
+    mesh = UnitSquareMesh(6, 6)
+    V = FunctionSpace(mesh, "CG", 2)
+    V1 = FunctionSpace(mesh, "CG", 1)
+    f = interpolate(Expression("x[0]*x[1]", degree=2), V)
+
+    u = Function(V)
+    v = TestFunction(V)
+    bc = DirichletBC(V, 0, "on_boundary")
+    solve(inner(grad(u), grad(v))*dx - f*v*dx == 0, u, bc)
+
+    u1 = interpolate(u, V1)
+    J = assemble(u1**4*dx)
+    Jhat = ReducedFunctional(J, Control(f))
+
+    h = Function(V)
+    h.vector()[:] = 1
+    assert taylor_test(Jhat, f, h) > 1.9
+
+    dJdm = Jhat.derivative()._ad_dot(h)
+    Hm = compute_hessian(J, Control(f), h)._ad_dot(h)
+    assert taylor_test(Jhat, f, h, dJdm=dJdm, Hm=Hm) > 2.9
+
+
+def test_interpolate_without_annotation():
+    tape = Tape()
+    set_working_tape(tape)
+    mesh = UnitSquareMesh(4, 4)
+    u = project(Expression("sin(x[0])*x[1]", degree=3), FunctionSpace(mesh, "CG", 2), annotate=False)
+    V1 = FunctionSpace(mesh, "CG", 1)
+
+    u1 = interpolate(u, V1, annotate=False)
+    with stop_annotating():
+        u2 = interpolate(u, V1)
+    assert len(tape.get_blocks()) == 0
+    assert_allclose(u1.vector().get_local(), fenics.interpolate(u, V1).vector().get_local(), atol=1e-12)
+    assert_allclose(u2.vector().get_local(), u1.vector().get_local(), atol=1e-12)
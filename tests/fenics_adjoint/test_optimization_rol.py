@@ -315,3 +315,34 @@ def test_ufl_constraint_works_sensibly(contype):
         assert(assemble(sol1**2 * dx) < vol + 1e-5)
     else:
         raise NotImplementedError
+
+
+def test_reuses_evaluations_at_same_iterate():
+    rf, params, w, alpha = setup(n=5)
+    forward = []
+    adjoint = []
+    rf.eval_cb_pre = lambda m: forward.append(m)
+    rf.derivative_cb_pre = lambda m: adjoint.append(m)
+
+    problem = MinimizationProblem(rf)
+    solver = ROLSolver(problem, params, inner_product="L2")
+    objective = solver.rolobjective
+    x = solver.rolvector
+    g = x.clone()
+
+    objective.update(x, True, 0)
+    objective.value(x, 0.0)
+    objective.gradient(g, x, 0.0)
+    objective.update(x, True, 0)
+    objective.value(x, 0.0)
+    objective.gradient(g, x, 0.0)
+    objective.hessVec(g.clone(), g, x, 0.0)
+    assert len(forward) == 1
+    assert len(adjoint) == 1
+
+    y = x.clone()
+    y.plus(g)
+    objective.update(y, True, 1)
+    objective.gradient(g, y, 0.0)
+    assert len(forward) == 2
+    assert len(adjoint) == 2
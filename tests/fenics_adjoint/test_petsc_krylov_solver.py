@@ -77,3 +77,40 @@ def test_petsc_options():
     h.vector()[:] = rand(V.dim())
     assert taylor_test(Jhat, f, h) > 1.7
 
+
+
+def test_inexact_adjoint_solve():
+    mesh = UnitSquareMesh(10, 10)
+    V = FunctionSpace(mesh, "CG", 1)
+
+    u = TrialFunction(V)
+    v = TestFunction(V)
+
+    f = Function(V)
+    f.vector()[:] = 1
+    a = inner(grad(u), grad(v))*dx
+    L = inner(f, v)*dx
+
+    A = assemble(a)
+    b = assemble(L)
+
+    bc = DirichletBC(V, 1, "on_boundary")
+    bc.apply(A, b)
+
+    solver = PETScKrylovSolver("cg", "none")
+    solver.parameters["relative_tolerance"] = 1e-12
+    solver.set_operator(A)
+
+    sol = Function(V)
+    solver.solve(sol.vector(), b)
+
+    J = assemble(inner(sol, sol)*dx)
+    Jhat = ReducedFunctional(J, Control(f))
+
+    exact = Jhat.derivative()
+    inexact = Jhat.derivative(tol=1e-2)
+    error = errornorm(exact, inexact, degree_rise=0)
+    assert 0 < error < 1e-1 * norm(exact)
+
+    # The loosened tolerance is not kept by the reused adjoint solver.
+    assert errornorm(exact, Jhat.derivative(), degree_rise=0) < 1e-10 * norm(exact)
@@ -0,0 +1,82 @@
+import pytest
+pytest.importorskip("fenics")
+
+from fenics import *
+from fenics_adjoint import *
+
+import numpy
+from numpy.random import rand
+
+
+def test_point_evaluation():
+    mesh = UnitSquareMesh(10, 10)
+    V = FunctionSpace(mesh, "CG", 2)
+    f = interpolate(Expression("sin(x[0]) * x[1]", degree=2), V)
+
+    u = Function(V)
+    v = TestFunction(V)
+    bc = DirichletBC(V, Constant(0), "on_boundary")
+    solve(inner(grad(u), grad(v)) * dx + u**3 * v * dx - f * v * dx == 0, u, bc)
+
+    point = numpy.array([0.3, 0.4])
+    J = u(point)**2
+    assert abs(J - u(point, annotate=False)**2) < 1e-14
+
+    Jhat = ReducedFunctional(J, Control(f))
+    h = Function(V)
+    h.vector()[:] = rand(V.dim())
+    assert taylor_test(Jhat, f, h) > 1.9
+
+
+def test_batched_point_evaluation():
+    mesh = UnitSquareMesh(10, 10)
+    V = VectorFunctionSpace(mesh, "CG", 1)
+    f = interpolate(Expression(("x[0] * x[1]", "x[0] + x[1]"), degree=2), V)
+
+    u = Function(V)
+    v = TestFunction(V)
+    solve(inner(grad(u), grad(v)) * dx + inner(u, v) * dx - inner(f, v) * dx == 0, u)
+
+    points = rand(40, 2)
+    observations = u(points)
+    assert observations.shape == (40, 2)
+    expected = numpy.array([u(p, annotate=False) for p in points])
+    assert numpy.allclose(observations, expected)
+
+    J = sum(observations[i, j]**2 for i in range(len(points)) for j in range(2))
+    Jhat = ReducedFunctional(J, Control(f))
+    dJdf = Jhat.derivative()
+
+    u_ref = Function(V)
+    solve(inner(grad(u_ref), grad(v)) * dx + inner(u_ref, v) * dx - inner(f, v) * dx == 0, u_ref)
+    J_ref = 0
+    for p in points:
+        value = u_ref(p)
+        J_ref += value[0]**2 + value[1]**2
+    expected = compute_gradient(J_ref, Control(f))
+    assert errornorm(expected, dJdf, degree_rise=0) < 1e-12
+
+    h = Function(V)
+    h.vector()[:] = rand(V.dim())
+    assert taylor_test(Jhat, f, h) > 1.9
+
+
+def test_point_outside_mesh():
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = interpolate(Constant(1.0), V)
+    with pytest.raises(ValueError):
+        u(numpy.array([[0.5, 0.5], [2.0, 0.5]]))
+
+
+def test_point_evaluation_after_mesh_movement():
+    mesh = UnitSquareMesh(10, 10)
+    V = FunctionSpace(mesh, "CG", 1)
+    f = interpolate(Expression("x[0] + 2 * x[1]", degree=1), V)
+    point = numpy.array([0.3, 0.4])
+    J = f(point)
+    Jhat = ReducedFunctional(J, Control(f))
+
+    displacement = interpolate(Expression(("0.1 * x[0]", "0"), degree=1), VectorFunctionSpace(mesh, "CG", 1))
+    ALE.move(mesh, displacement)
+    assert abs(Jhat(f) - f(point, annotate=False)) < 1e-12
@@ -1,8 +1,10 @@
 import pytest
 pytest.importorskip("fenics")
 
+import fenics
 from fenics import *
 from fenics_adjoint import *
+from fenics_adjoint.riesz import riesz_map
 
 def test_projection():
     tape = Tape()
@@ -85,3 +87,34 @@ def test_multiple_meshes():
     assert min(results["R0"]["Rate"]) > 0.9
     assert min(results["R1"]["Rate"]) > 1.9
     assert min(results["R2"]["Rate"]) > 2.9
+
+
+def test_projection_riesz_map_cache():
+    tape = Tape()
+    set_working_tape(tape)
+
+    mesh = UnitSquareMesh(5, 5)
+    V = FunctionSpace(mesh, "CG", 1)
+    M = riesz_map(V)
+    assert riesz_map(V) is M
+    assert riesz_map(V, "H1") is not M
+
+    f = Function(V)
+    f.vector()[:] = 2
+    u = project(f**2, V)
+    assert abs(u.vector().get_local() - fenics.project(f**2, V).vector().get_local()).max() < 1e-12
+    J = assemble(u**2*dx)
+    Jhat = ReducedFunctional(J, Control(f))
+
+    h = Function(V)
+    h.vector()[:] = 1
+    assert taylor_test(Jhat, f, h) > 1.9
+
+    dJdm = Jhat.derivative(options={"riesz_representation": "L2"})
+    assert abs(dJdm._ad_dot(h, options={"riesz_representation": "L2"}) - Jhat.derivative()._ad_dot(h)) < 1e-12
+
+    # Moving the mesh invalidates the cached operators.
+    M = riesz_map(V)
+    displacement = interpolate(Constant((0.5, 0.5)), VectorFunctionSpace(mesh, "CG", 1))
+    ALE.move(mesh, displacement)
+    assert riesz_map(V) is not M
@@ -4,6 +4,7 @@ pytest.importorskip("fenics")
 
 from fenics import *
 from fenics_adjoint import *
+from pyadjoint import derivative_tolerance
 
 def test_linear_problem():
     mesh = IntervalMesh(10, 0, 1)
@@ -561,3 +562,125 @@ def test_solver_ident_zeros():
     assert(min(results["R0"]["Rate"]) > 0.95)
     assert(min(results["R1"]["Rate"]) > 1.95)
     assert(min(results["R2"]["Rate"]) > 2.95)
+
+
+def test_gradient_of_multiple_functionals():
+    mesh = UnitSquareMesh(10, 10)
+    V = FunctionSpace(mesh, "CG", 1)
+
+    f = Function(V)
+    f.vector()[:] = 1
+    c = Constant(2.0)
+
+    u = TrialFunction(V)
+    u_ = Function(V)
+    v = TestFunction(V)
+    bc = DirichletBC(V, Constant(1), "on_boundary")
+
+    a = inner(grad(u), grad(v)) * dx
+    L = c * f * v * dx
+    solve(a == L, u_, bc)
+
+    J1 = assemble(u_**2 * dx)
+    J2 = assemble(f * u_ * dx)
+    J3 = assemble(c * u_**3 * dx)
+
+    controls = [Control(f), Control(c)]
+    grads = compute_gradient([J1, J2, J3], controls)
+    assert len(grads) == 3
+    for J, grad_J in zip([J1, J2, J3], grads):
+        expected = compute_gradient(J, controls)
+        assert errornorm(expected[0], grad_J[0]) < 1e-12
+        assert abs(float(expected[1]) - float(grad_J[1])) < 1e-12
+
+
+@pytest.mark.parametrize("preconditioned", [False, True])
+def test_matrix_free_adjoint(preconditioned):
+    mesh = UnitSquareMesh(10, 10)
+    V = FunctionSpace(mesh, "CG", 1)
+
+    f = Function(V)
+    f.vector()[:] = 1
+
+    u = Function(V)
+    v = TestFunction(V)
+    bc = DirichletBC(V, Constant(1), "on_boundary")
+    F = (1 + u**2) * inner(grad(u), grad(v)) * dx - f * v * dx
+
+    kwargs = {"matrix_free": True,
+              "solver_parameters": {"newton_solver": {"linear_solver": "gmres",
+                                                      "krylov_solver": {"relative_tolerance": 1e-14,
+                                                                        "absolute_tolerance": 1e-16}}}}
+    if preconditioned:
+        kwargs["matrix_free_pc"] = inner(grad(TrialFunction(V)), grad(v)) * dx
+    solve(F == 0, u, bc, **kwargs)
+    J = assemble(u**2 * dx)
+    Jhat = ReducedFunctional(J, Control(f))
+
+    u_ref = Function(V)
+    solve(replace(F, {u: u_ref}) == 0, u_ref, bc, annotate=False, **kwargs)
+    assert errornorm(u_ref, u) < 1e-12
+    u_ref = Function(V)
+    solve(replace(F, {u: u_ref}) == 0, u_ref, bc)
+    J_ref = assemble(u_ref**2 * dx)
+    expected = compute_gradient(J_ref, Control(f))
+
+    dJdf = Jhat.derivative()
+    assert errornorm(expected, dJdf) < 1e-9
+
+    h = Function(V)
+    h.vector()[:] = 0.1
+    assert taylor_test(Jhat, f, h) > 1.9
+
+
+def test_fused_dependency_derivatives():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 1)
+    W = FunctionSpace(mesh, "DG", 0)
+    Q = VectorFunctionSpace(mesh, "CG", 2)
+
+    f = interpolate(Expression("1 + x[0]", degree=1), V)
+    g = interpolate(Expression("x[1]", degree=1), W)
+    b = interpolate(Expression(("x[1]", "x[0]"), degree=2), Q)
+
+    u = Function(V)
+    v = TestFunction(V)
+    bc = DirichletBC(V, Constant(0), "on_boundary")
+    F = (1 + f**2) * inner(grad(u), grad(v)) * dx + inner(b, grad(u)) * v * dx + u**2 * v * dx - g * f * v * dx
+    solve(F == 0, u, bc)
+    J = assemble((u**2 + f * g * u + inner(b, b)) * dx)
+
+    controls = [Control(f), Control(g), Control(b)]
+    Jhat = ReducedFunctional(J, controls)
+    grads = Jhat.derivative()
+    for control, grad_J in zip(controls, grads):
+        # With a single control the derivatives are assembled one by one.
+        expected = ReducedFunctional(J, control).derivative()
+        assert errornorm(expected, grad_J, degree_rise=0) < 1e-10 * norm(expected)
+
+    directions = [interpolate(Constant(0.1), V), interpolate(Constant(0.2), W),
+                  interpolate(Constant((0.1, 0.3)), Q)]
+    hessians = Jhat.hessian(directions)
+    dJdm = sum(grad_J.vector().inner(d.vector()) for grad_J, d in zip(grads, directions))
+    Hm = sum(hessian.vector().inner(d.vector()) for hessian, d in zip(hessians, directions))
+    assert taylor_test(Jhat, [f, g, b], directions, dJdm=dJdm, Hm=Hm) > 2.9
+
+
+def test_inexact_tolerance_is_never_tightened():
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    f = Function(V)
+    solve(inner(grad(u), grad(v)) * dx - f * v * dx == 0, u, DirichletBC(V, 0, "on_boundary"),
+          solver_parameters={"linear_solver": "cg", "krylov_solver": {"relative_tolerance": 1e-6}})
+    block = get_working_tape().get_blocks()[-1]
+
+    assert block._inexact_relative_tolerance() is None
+    with derivative_tolerance(1e-8):
+        assert block._inexact_relative_tolerance() == 1e-6
+    with derivative_tolerance(1e-3):
+        assert block._inexact_relative_tolerance() == 1e-3
+    block.adj_kwargs = {}
+    with derivative_tolerance(1e-8):
+        assert block._inexact_relative_tolerance() == block.default_relative_tolerance
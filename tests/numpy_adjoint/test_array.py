@@ -0,0 +1,100 @@
+import numpy
+from numpy.testing import assert_allclose
+from pyadjoint import *
+from numpy_adjoint import *
+
+
+def array(values):
+    return create_overloaded_object(numpy.array(values, dtype=float))
+
+
+def test_whole_array_blocks():
+    x = array(numpy.linspace(0.1, 1., 10 ** 5))
+    J = numpy.sum(numpy.exp(x) * x ** 2)
+
+    tape = get_working_tape()
+    assert len(tape.get_blocks()) == 4
+
+    rf = ReducedFunctional(J, Control(x))
+    dJ = rf.derivative()
+    xv = numpy.asarray(x)
+    assert_allclose(dJ, numpy.exp(xv) * (xv ** 2 + 2 * xv))
+
+
+def test_broadcast_and_reduce():
+    x = array([[1., 2., 3.], [4., 5., 6.]])
+    a = AdjFloat(2.0)
+    row = array([1., -1., 0.5])
+    J = numpy.sum(numpy.sum(x * row, axis=0) ** 2) * a
+    rf = ReducedFunctional(J, [Control(x), Control(row), Control(a)])
+    dx, drow, da = rf.derivative()
+
+    s = (numpy.asarray(x) * numpy.asarray(row)).sum(axis=0)
+    assert_allclose(dx, 2 * a * numpy.broadcast_to(s * numpy.asarray(row), (2, 3)))
+    assert_allclose(drow, 2 * a * s * numpy.asarray(x).sum(axis=0))
+    assert_allclose(da, numpy.sum(s ** 2))
+
+
+def test_taylor_hessian():
+    x = array([1., 2., 3.])
+    a = AdjFloat(0.7)
+    A = numpy.array([[1., 2., 0.], [0., 1., 3.]])
+    z = numpy.exp(A @ x / 10) * a
+    J = (numpy.sum(numpy.sin(x) * x ** 2) + numpy.linalg.norm(x.reshape(3, 1))
+         + numpy.dot(z, z) + numpy.sum(numpy.tanh(x) ** a / x))
+    rf = ReducedFunctional(J, [Control(x), Control(a)])
+
+    results = taylor_to_dict(rf, [array([1., 2., 3.]), AdjFloat(0.7)], [array([0.1, 0.2, -0.3]), AdjFloat(0.1)])
+    assert min(results["R0"]["Rate"]) > 0.9
+    assert min(results["R1"]["Rate"]) > 1.9
+    assert min(results["R2"]["Rate"]) > 2.9
+
+
+def test_slice_adjoint():
+    n = 2000
+    x = array(numpy.linspace(0.1, 1., n))
+    J = x[0] * 0.
+    for i in range(n):
+        J += x[i] ** 2
+    J += numpy.sum(x[[0, 0, 1]])
+    rf = ReducedFunctional(J, Control(x))
+
+    expected = 2 * numpy.asarray(x)
+    expected[0] += 2.
+    expected[1] += 1.
+    assert_allclose(rf.derivative(), expected)
+    assert_allclose(rf.derivative(), expected)
+    assert_allclose(rf.hessian(array(numpy.ones(n))), 2 * numpy.ones(n))
+
+
+def test_stacked_slice_adjoint(monkeypatch):
+    import numpy_adjoint.array
+    from pyadjoint.stacking import StackedValues
+
+    n = 200
+    x = array(numpy.linspace(0.1, 1., n))
+    J1 = x[0] * 0.
+    J2 = x[0] * 0.
+    for i in range(n):
+        J1 += x[i] ** 2
+        J2 += x[i]
+
+    allocations = []
+    own = numpy_adjoint.array._own
+
+    def counting_own(owned, value):
+        allocations.append(value)
+        return own(owned, value)
+    monkeypatch.setattr(numpy_adjoint.array, "_own", counting_own)
+
+    tape = get_working_tape()
+    tape.reset_variables()
+    J1.block_variable.adj_value = StackedValues([1.0, None])
+    J2.block_variable.adj_value = StackedValues([None, 1.0])
+    tape.evaluate_adj(stacked=True)
+
+    dJdx = x.block_variable.adj_value
+    assert_allclose(dJdx[0], 2 * numpy.asarray(x))
+    assert_allclose(dJdx[1], numpy.ones(n))
+    # One stack, and one dense buffer per seed, for all n slices.
+    assert len(allocations) == 3
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+
+import numpy
+import scipy.linalg
+import scipy.sparse
+from numpy.testing import assert_allclose
+from pyadjoint import *
+from numpy_adjoint import *
+
+
+def array(values):
+    return create_overloaded_object(numpy.array(values, dtype=float))
+
+
+def test_solve_taylor():
+    A = array([[4., 1., 0.], [1., 3., 1.], [0., 1., 2.]])
+    b = array([1., 2., 3.])
+    x = numpy.linalg.solve(A, b)
+    y = linalg.lu_solve(linalg.lu_factor(A), x * x)
+    S = scipy.sparse.csr_matrix(numpy.array([[2., 1., 0.], [0., 3., 0.], [1., 0., 4.]]))
+    z = linalg.spsolve(S, y)
+    J = numpy.sum(z ** 3) + numpy.dot(x, y)
+    rf = ReducedFunctional(J, [Control(A), Control(b)])
+
+    h = [array(numpy.random.rand(3, 3)), array(numpy.random.rand(3))]
+    results = taylor_to_dict(rf, [array(numpy.asarray(A)), array(numpy.asarray(b))], h)
+    assert min(results["R0"]["Rate"]) > 0.9
+    assert min(results["R1"]["Rate"]) > 1.9
+    assert min(results["R2"]["Rate"]) > 2.9
+
+
+def test_factorization_reuse(monkeypatch):
+    factorizations = []
+    original = scipy.linalg.lu_factor
+
+    def lu_factor(A):
+        factorizations.append(1)
+        return original(A)
+
+    monkeypatch.setattr(scipy.linalg, "lu_factor", lu_factor)
+    A = array([[4., 1.], [1., 3.]])
+    b = array([1., 2.])
+    lu = linalg.lu_factor(A)
+    x = linalg.lu_solve(lu, b)
+    x = linalg.lu_solve(lu, x)
+    J = numpy.sum(x ** 2)
+    rf = ReducedFunctional(J, [Control(A), Control(b)])
+
+    rf.derivative()
+    rf.hessian([array([[0.1, 0.], [0., 0.1]]), array([1., 0.])])
+    assert len(factorizations) == 1
+
+    rf([array([[5., 1.], [1., 3.]]), array([1., 2.])])
+    rf.derivative()
+    assert len(factorizations) == 2
+
+    M = numpy.linalg.inv(numpy.array([[5., 1.], [1., 3.]]))
+    x = M @ M @ numpy.array([1., 2.])
+    assert_allclose(rf.derivative()[1], 2 * M.T @ M.T @ x)
+
+
+def test_splu_solve_is_annotated():
+    S = scipy.sparse.csr_matrix(numpy.array([[2., 1., 0.], [0., 3., 0.], [1., 0., 4.]]))
+    lu = linalg.splu(S)
+    b = array([1., 2., 3.])
+    x = lu.solve(b)
+    J = numpy.sum(x ** 2)
+    rf = ReducedFunctional(J, Control(b))
+
+    Sinv = numpy.linalg.inv(S.toarray())
+    assert_allclose(rf.derivative(), 2 * Sinv.T @ Sinv @ numpy.array([1., 2., 3.]))
+
+
+def test_import_does_not_load_scipy():
+    code = "import sys, numpy_adjoint; print('scipy' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", code], env={"PYTHONPATH": ":".join(p for p in sys.path if p)})
+    assert output.decode().strip() == "False"
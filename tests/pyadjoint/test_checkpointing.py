@@ -0,0 +1,35 @@
+from numpy.testing import assert_allclose
+from pyadjoint import *
+
+
+def rosenbrock(counter):
+    def count(*args):
+        counter.append(1)
+
+    a = AdjFloat(-1.2)
+    b = AdjFloat(1.0)
+    J = (1 - a) ** 2 + 100 * (b - a ** 2) ** 2
+    return ReducedFunctional(J, [Control(a), Control(b)], eval_cb_pre=count)
+
+
+def test_restart_replays_evaluations(tmp_path):
+    for method in ["LBFGS", "L-BFGS-B"]:
+        directory = str(tmp_path / method)
+        counter = []
+        opt = minimize(rosenbrock(counter), method=method, checkpoint_dir=directory)
+        assert len(counter) > 0
+
+        counter = []
+        restarted = minimize(rosenbrock(counter), method=method, checkpoint_dir=directory, restart=True)
+        assert len(counter) == 0
+        assert_allclose([float(v) for v in restarted], [float(v) for v in opt])
+
+
+def test_lbfgs_resume(tmp_path):
+    directory = str(tmp_path)
+    options = {"maxiter": 200, "gtol": 1e-10}
+    opt = minimize(rosenbrock([]), method="LBFGS", options=options)
+
+    minimize(rosenbrock([]), method="LBFGS", options={"maxiter": 10}, checkpoint_dir=directory)
+    resumed = minimize(rosenbrock([]), method="LBFGS", options=options, checkpoint_dir=directory, restart=True)
+    assert_allclose([float(v) for v in resumed], [float(v) for v in opt])
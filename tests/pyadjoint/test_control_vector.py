@@ -0,0 +1,38 @@
+from numpy.testing import assert_approx_equal
+from pyadjoint import *
+
+
+def test_control_vector_arithmetic():
+    a = AdjFloat(2.0)
+    b = AdjFloat(-3.0)
+    x = ControlVector.from_controls([Control(a), Control(b)])
+    y = ControlVector([AdjFloat(1.0), AdjFloat(4.0)])
+
+    z = x + 2.0 * y
+    assert_approx_equal(z.dat[0], 4.0)
+    assert_approx_equal(z.dat[1], 5.0)
+    assert_approx_equal((x - y).dot(y), 1.0 - 28.0)
+    assert_approx_equal(y.norm(), 17.0 ** 0.5)
+
+    x.axpy(-1.0, y)
+    assert_approx_equal(x.dat[0], 1.0)
+    assert_approx_equal(x.dat[1], -7.0)
+    # The controls are not modified.
+    assert a == 2.0 and b == -3.0
+
+
+def test_control_vector_projection():
+    x = ControlVector([AdjFloat(2.0), AdjFloat(-3.0), AdjFloat(0.5)])
+    p = x.project([(None, 1.0), (-1.0, None), (0.0, 1.0)])
+    assert [float(v) for v in p] == [1.0, -1.0, 0.5]
+
+
+def test_control_vector_gradient():
+    a = AdjFloat(2.0)
+    b = AdjFloat(3.0)
+    J = a ** 2 * b
+    rf = ReducedFunctional(J, [Control(a), Control(b)])
+    x = ControlVector.from_controls(rf.controls)
+    g = x.riesz_map(rf.derivative())
+    assert_approx_equal(g.dat[0], 12.0)
+    assert_approx_equal(g.dat[1], 4.0)
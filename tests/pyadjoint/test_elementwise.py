@@ -0,0 +1,58 @@
+import operator
+
+import numpy
+from numpy.testing import assert_allclose
+from pyadjoint import elementwise
+
+
+class Scale(object):
+    """Mimics ROL::Elementwise::Scale."""
+    def __init__(self, alpha):
+        self.alpha = alpha
+
+    def __call__(self, x):
+        return self.alpha * x
+
+
+class ThresholdUpper(object):
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def __call__(self, x):
+        return max(self.threshold, x)
+
+
+class Axpy(object):
+    def __init__(self, alpha):
+        self.alpha = alpha
+
+    def __call__(self, x, y):
+        return x + self.alpha * y
+
+
+class ReductionMax(object):
+    def __call__(self, x, y):
+        return max(x, y)
+
+
+def test_unary():
+    x = numpy.linspace(-2., 3., 11)
+    for f in [Scale(3.), ThresholdUpper(0.5), abs, lambda v: v ** 3 - 1, elementwise.fill(4.)]:
+        assert_allclose(elementwise.unary(f)(x), [f(v) for v in x])
+
+
+def test_binary():
+    x = numpy.linspace(-2., 3., 11)
+    y = numpy.cos(x)
+    for f in [Axpy(-2.), operator.add, max, lambda a, b: a * b + 1]:
+        assert_allclose(elementwise.binary(f)(x, y), [f(a, b) for a, b in zip(x, y)])
+
+
+def test_reduction():
+    x = numpy.cos(numpy.linspace(-2., 3., 11))
+    for r, r0 in [(ReductionMax(), -numpy.inf), (ReductionMax(), 2.), (operator.add, 1.), (lambda a, b: a * b, 1.)]:
+        expected = r0
+        for v in x:
+            expected = r(v, expected)
+        assert_allclose(elementwise.reduction(r)(x, r0), expected)
+    assert elementwise.reduction(operator.add)(numpy.zeros(0), 3.) == 3.
@@ -243,3 +243,31 @@ def test_min_max():
     assert b == 0.
     assert a2 == oa2 + h[0]*ob2/h[1]
     assert b2 == 0.
+
+
+def test_lazy_block_variable():
+    a = AdjFloat(2.0)
+    with stop_annotating():
+        b = a * a
+    assert "_ad_block_variable" not in b.__dict__
+
+    c = a * a
+    J = ReducedFunctional(c, Control(a))
+    assert J(AdjFloat(3.0)) == 9.0
+    assert "_ad_block_variable" in c.__dict__
+    assert c.original_block_variable is c.block_variable
+
+
+def test_control_on_intermediate_value():
+    a = AdjFloat(2.0)
+    c = a * 3
+    J = c ** 2
+    Jhat = ReducedFunctional(J, Control(c))
+    assert Jhat(AdjFloat(5.0)) == 25.0
+    assert Jhat.derivative() == 10.0
+
+
+def test_fingerprint():
+    a = AdjFloat(2.0)
+    assert a._ad_fingerprint() == AdjFloat(2.0)._ad_fingerprint()
+    assert a._ad_fingerprint() != AdjFloat(3.0)._ad_fingerprint()
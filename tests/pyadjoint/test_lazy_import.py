@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+import pyadjoint
+
+
+def test_import_does_not_load_optimization():
+    code = "import sys, pyadjoint; print(any(m.startswith('pyadjoint.optimization.') for m in sys.modules))"
+    output = subprocess.check_output([sys.executable, "-c", code], env={"PYTHONPATH": ":".join(p for p in sys.path if p)})
+    assert output.decode().strip() == "False"
+
+
+def test_lazy_names():
+    from pyadjoint.optimization.optimization import minimize
+    assert pyadjoint.minimize is minimize
+    assert "ROLSolver" in dir(pyadjoint)
+    assert "ROLSolver" in pyadjoint.__all__
+
+    namespace = {}
+    exec("from pyadjoint import *", namespace)
+    assert namespace["MinimizationProblem"] is pyadjoint.MinimizationProblem
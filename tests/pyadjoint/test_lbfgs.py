@@ -0,0 +1,36 @@
+from numpy.testing import assert_allclose
+from pyadjoint import *
+
+
+def test_lbfgs_rosenbrock():
+    a = AdjFloat(-1.2)
+    b = AdjFloat(1.0)
+    J = (1 - a) ** 2 + 100 * (b - a ** 2) ** 2
+    rf = ReducedFunctional(J, [Control(a), Control(b)])
+
+    opt = minimize(rf, method="LBFGS", options={"maxiter": 200, "gtol": 1e-10})
+    assert_allclose([float(v) for v in opt], [1.0, 1.0], rtol=1e-6)
+
+
+def test_lbfgs_bounds():
+    a = AdjFloat(0.0)
+    b = AdjFloat(0.0)
+    J = (a - 2) ** 2 + (b + 3) ** 2 + a * b
+    rf = ReducedFunctional(J, [Control(a), Control(b)])
+
+    opt = minimize(rf, method="LBFGS", bounds=[[-1.0, -1.0], [1.0, 1.0]])
+    assert_allclose([float(v) for v in opt], [1.0, -1.0], rtol=1e-8)
+
+
+def test_lbfgs_parallel_line_search():
+    def rosenbrock():
+        a = AdjFloat(-1.2)
+        b = AdjFloat(1.0)
+        J = (1 - a) ** 2 + 100 * (b - a ** 2) ** 2
+        return ReducedFunctional(J, [Control(a), Control(b)])
+
+    options = {"maxiter": 200, "gtol": 1e-10}
+    opt = minimize(rosenbrock(), method="LBFGS", options=options)
+    options["line_search_processes"] = 3
+    parallel = minimize(rosenbrock(), method="LBFGS", options=options)
+    assert_allclose([float(v) for v in parallel], [float(v) for v in opt])
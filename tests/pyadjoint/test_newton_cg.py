@@ -0,0 +1,25 @@
+from numpy.testing import assert_allclose
+from pyadjoint import *
+
+
+def test_newton_cg_rosenbrock():
+    a = AdjFloat(-1.2)
+    b = AdjFloat(1.0)
+    J = (1 - a) ** 2 + 100 * (b - a ** 2) ** 2
+    rf = ReducedFunctional(J, [Control(a), Control(b)])
+
+    opt = minimize(rf, method="TR-Newton-CG", options={"gtol": 1e-10})
+    assert_allclose([float(v) for v in opt], [1.0, 1.0], rtol=1e-8)
+
+
+def test_newton_cg_quadratic_adjoint_reuse():
+    a = AdjFloat(0.0)
+    b = AdjFloat(0.0)
+    J = (a - 2) ** 2 + 3 * (b + 1) ** 2 + a * b
+    derivatives = []
+    rf = ReducedFunctional(J, [Control(a), Control(b)], derivative_cb_pre=lambda m: derivatives.append(m))
+
+    opt = minimize(rf, method="TR-Newton-CG", options={"radius": 10.0, "eta_max": 1e-12})
+    # The minimum of the quadratic is found with a single Newton step.
+    assert_allclose([float(v) for v in opt], [30. / 11., -16. / 11.], rtol=1e-10)
+    assert len(derivatives) == 2
@@ -30,3 +30,14 @@ def test_simple():
     assert Jhat.derivative() == 0.5 * 2.0 * 6
     assert Jhat(5.0) == 5.0 * 15
     assert Jhat.derivative() == 15
+
+
+def test_earlier_blocks_keep_dependency():
+    a = AdjFloat(2.0)
+    b = a * a
+    p = Placeholder(a)
+    c = b * a
+    p.set_value(c)
+
+    Jhat = ReducedFunctional(c, Control(a))
+    assert Jhat.derivative() == 2 * 2.0
@@ -0,0 +1,84 @@
+from numpy.testing import assert_approx_equal
+from pyadjoint import *
+from pyadjoint.stacking import StackedValues
+
+
+def test_stacked_adjoint():
+    a = AdjFloat(2.0)
+    b = AdjFloat(3.0)
+    c = a * b
+    J1 = c ** 2
+    J2 = c + a
+
+    tape = get_working_tape()
+    tape.reset_variables()
+    J1.block_variable.adj_value = StackedValues([1.0, None])
+    J2.block_variable.adj_value = StackedValues([None, 1.0])
+    tape.evaluate_adj(stacked=True)
+
+    dJda = a.block_variable.adj_value
+    dJdb = b.block_variable.adj_value
+    assert_approx_equal(dJda[0], 2 * 6.0 * 3.0)
+    assert_approx_equal(dJda[1], 3.0 + 1.0)
+    assert_approx_equal(dJdb[0], 2 * 6.0 * 2.0)
+    assert_approx_equal(dJdb[1], 2.0)
+
+
+def test_stacked_tlm():
+    a = AdjFloat(2.0)
+    b = AdjFloat(3.0)
+    c = a * b - a
+
+    tape = get_working_tape()
+    tape.reset_tlm_values()
+    a.block_variable.tlm_value = StackedValues([1.0, 0.0])
+    b.block_variable.tlm_value = StackedValues([0.0, 1.0])
+    tape.evaluate_tlm(stacked=True)
+
+    dc = c.block_variable.tlm_value
+    assert_approx_equal(dc[0], 3.0 - 1.0)
+    assert_approx_equal(dc[1], 2.0)
+
+
+def test_stacked_hessian():
+    a = AdjFloat(2.0)
+    b = AdjFloat(3.0)
+    J = a ** 2 * b
+
+    tape = get_working_tape()
+    compute_gradient(J, [Control(a), Control(b)])
+
+    tape.reset_tlm_values()
+    tape.reset_hessian_values()
+    a.block_variable.tlm_value = StackedValues([1.0, 0.0])
+    b.block_variable.tlm_value = StackedValues([0.0, 1.0])
+    tape.evaluate_tlm(stacked=True)
+    J.block_variable.hessian_value = StackedValues([0.0, 0.0])
+    tape.evaluate_hessian(stacked=True)
+
+    # The Hessian of a**2 * b is [[2b, 2a], [2a, 0]].
+    assert_approx_equal(a.block_variable.hessian_value[0], 6.0)
+    assert_approx_equal(a.block_variable.hessian_value[1], 4.0)
+    assert_approx_equal(b.block_variable.hessian_value[0], 4.0)
+    assert b.block_variable.hessian_value[1] == 0.0
+
+
+def test_gradient_of_multiple_functionals():
+    a = AdjFloat(2.0)
+    b = AdjFloat(3.0)
+    c = a * b
+    J1 = c ** 2
+    J2 = c + a
+    J3 = b / a
+
+    controls = [Control(a), Control(b)]
+    grads = compute_gradient([J1, J2, J3], controls)
+    assert len(grads) == 3
+    for J, grad in zip([J1, J2, J3], grads):
+        expected = compute_gradient(J, controls)
+        for g, e in zip(grad, expected):
+            assert_approx_equal(g, e)
+
+    grads = compute_gradient([J1, J1], controls[0], adj_value=[1.0, 2.0])
+    assert_approx_equal(grads[0], 36.0)
+    assert_approx_equal(grads[1], 72.0)
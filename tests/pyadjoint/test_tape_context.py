@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pyadjoint import *
+
+
+def annotate_and_evaluate(value):
+    tape = Tape()
+    set_working_tape(tape)
+    x = AdjFloat(value)
+    y = x
+    for i in range(200):
+        y = y * x / value
+    rf = ReducedFunctional(y, Control(x))
+    assert get_working_tape() is tape
+    return len(tape.get_blocks()), rf.derivative(), rf(AdjFloat(2 * value))
+
+
+def test_threads_annotate_separate_tapes():
+    tape = get_working_tape()
+    values = [1.0 + i for i in range(8)]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(annotate_and_evaluate, values))
+
+    for value, (num_blocks, dJdx, J) in zip(values, results):
+        assert num_blocks == 400
+        assert abs(float(dJdx) - 201.) < 1e-10
+        assert abs(float(J) - 2 ** 201 * value) < 1e-10 * 2 ** 201 * value
+    assert get_working_tape() is tape
+    assert len(tape.get_blocks()) == 0
+
+
+def test_thread_without_tape_uses_main_tape():
+    tape = Tape()
+    set_working_tape(tape)
+    x = AdjFloat(3.0)
+    thread = threading.Thread(target=lambda: x * x)
+    thread.start()
+    thread.join()
+    assert len(tape.get_blocks()) == 1
+
+
+def test_annotation_paused_per_thread():
+    paused = []
+
+    def annotate():
+        paused.append(not annotate_tape())
+
+    with stop_annotating():
+        thread = threading.Thread(target=annotate)
+        thread.start()
+        thread.join()
+        assert not annotate_tape()
+    assert paused == [False]
+    assert annotate_tape()
+
+
+def test_asyncio_tasks_annotate_separate_tapes():
+    async def model(value):
+        tape = Tape()
+        set_working_tape(tape)
+        x = AdjFloat(value)
+        await asyncio.sleep(0)
+        y = x * x
+        await asyncio.sleep(0)
+        assert get_working_tape() is tape
+        return ReducedFunctional(y, Control(x)).derivative()
+
+    async def main():
+        return await asyncio.gather(*(model(v) for v in (1.0, 2.0, 3.0)))
+
+    assert asyncio.run(main()) == [2.0, 4.0, 6.0]
@@ -0,0 +1,118 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from pyadjoint import *
+
+
+def check_balanced(events):
+    stacks = {}
+    for event in events:
+        stack = stacks.setdefault((event["pid"], event["tid"]), [])
+        if event["ph"] == "B":
+            stack.append(event)
+        elif event["ph"] == "E":
+            begin = stack.pop()
+            assert begin["name"] == event["name"]
+            assert begin["ts"] <= event["ts"]
+    assert all(len(stack) == 0 for stack in stacks.values())
+
+
+def test_trace_derivative_and_hessian():
+    x = AdjFloat(2.0)
+    J = x * x * x
+    rf = ReducedFunctional(J, Control(x))
+
+    with tracing() as tracer:
+        rf.derivative()
+        rf.hessian(AdjFloat(1.0))
+        rf(AdjFloat(3.0))
+    events = tracer.events
+    check_balanced(events)
+
+    names = {(event["cat"], event["name"]) for event in events if event["ph"] == "B"}
+    assert ("driver", "ReducedFunctional.derivative") in names
+    assert ("driver", "compute_gradient") in names
+    assert ("driver", "ReducedFunctional.hessian") in names
+    assert ("driver", "ReducedFunctional.__call__") in names
+    for mode in ("adj", "tlm", "hessian", "recompute"):
+        assert (mode, "MulBlock") in names
+    assert ("adj", "evaluate_adj_component") in names
+
+    sweeps = [event for event in events if event["ph"] == "B" and event["cat"] == "adj"
+              and event["name"] == "MulBlock"]
+    assert [event["args"]["index"] for event in sweeps] == [1, 0]
+    assert sweeps[0]["args"] == {"block": "MulBlock", "index": 1, "dependencies": 2, "outputs": 1}
+
+    # Nothing is recorded when tracing is off.
+    num_events = len(events)
+    rf.derivative()
+    assert len(tracer.events) == num_events
+
+
+def test_trace_balanced_after_error():
+    class FailingBlock(Block):
+        def recompute_component(self, inputs, block_variable, idx, prepared):
+            raise RuntimeError("recompute failed")
+
+    x = AdjFloat(2.0)
+    y = x * x
+    block = FailingBlock()
+    block.add_dependency(y)
+    z = AdjFloat(0.0)
+    block.add_output(z.create_block_variable())
+    get_working_tape().add_block(block)
+    rf = ReducedFunctional(y, Control(x))
+
+    with tracing() as tracer:
+        try:
+            rf(AdjFloat(3.0))
+        except RuntimeError:
+            pass
+        else:
+            assert False
+        # The events of the failed evaluation are closed before the tracer is written out.
+        check_balanced(tracer.events)
+    assert any(event["name"] == "FailingBlock" and event["ph"] == "E" for event in tracer.events)
+
+
+def test_trace_threads():
+    def evaluate(value):
+        tape = Tape()
+        set_working_tape(tape)
+        x = AdjFloat(value)
+        return float(compute_gradient(x * x, Control(x)))
+
+    with tracing() as tracer:
+        with ThreadPoolExecutor(2) as pool:
+            assert list(pool.map(evaluate, [1.0, 2.0, 3.0, 4.0])) == [2.0, 4.0, 6.0, 8.0]
+    check_balanced(tracer.events)
+    thread_names = [event for event in tracer.events if event["name"] == "thread_name"]
+    assert len({event["tid"] for event in tracer.events}) == len(thread_names) >= 1
+
+
+def test_trace_parallel_line_search():
+    a = AdjFloat(-1.2)
+    b = AdjFloat(1.0)
+    J = (1 - a) ** 2 + 100 * (b - a ** 2) ** 2
+    rf = ReducedFunctional(J, [Control(a), Control(b)])
+
+    with tracing() as tracer:
+        minimize(rf, method="LBFGS", options={"maxiter": 5, "line_search_processes": 3})
+    check_balanced(tracer.events)
+    pids = {event["pid"] for event in tracer.events}
+    assert os.getpid() in pids
+    assert len(pids) > 1
+
+
+def test_write_trace(tmp_path):
+    x = AdjFloat(2.0)
+    J = x * x
+    filename = str(tmp_path / "trace.json")
+    with tracing(filename):
+        compute_gradient(J, Control(x))
+
+    with open(filename) as f:
+        trace = json.load(f)
+    check_balanced(trace["traceEvents"])
+    assert any(event["name"] == "compute_gradient" for event in trace["traceEvents"])
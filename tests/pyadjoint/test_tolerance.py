@@ -0,0 +1,58 @@
+from pyadjoint import *
+
+
+class ToleranceBlock(Block):
+    """Identity block that records the derivative tolerance it is evaluated with."""
+    def __init__(self, x):
+        super(ToleranceBlock, self).__init__()
+        self.add_dependency(x)
+        self.tolerances = []
+
+    def evaluate_adj_component(self, inputs, adj_inputs, block_variable, idx, prepared=None):
+        self.tolerances.append(get_derivative_tolerance())
+        return adj_inputs[0]
+
+    def evaluate_tlm_component(self, inputs, tlm_inputs, block_variable, idx, prepared=None):
+        self.tolerances.append(get_derivative_tolerance())
+        return tlm_inputs[0]
+
+    def evaluate_hessian_component(self, inputs, hessian_inputs, adj_inputs, block_variable, idx,
+                                   relevant_dependencies, prepared=None):
+        self.tolerances.append(get_derivative_tolerance())
+        return hessian_inputs[0]
+
+    def recompute_component(self, inputs, block_variable, idx, prepared):
+        return AdjFloat(inputs[0])
+
+
+def identity(x):
+    block = ToleranceBlock(x)
+    y = AdjFloat(float(x))
+    block.add_output(y.block_variable)
+    get_working_tape().add_block(block)
+    return block, y
+
+
+def test_derivative_tolerance():
+    assert get_derivative_tolerance() is None
+    with derivative_tolerance(1e-3):
+        assert get_derivative_tolerance() == 1e-3
+        with derivative_tolerance(None):
+            assert get_derivative_tolerance() == 1e-3
+        with derivative_tolerance(1e-6):
+            assert get_derivative_tolerance() == 1e-6
+        assert get_derivative_tolerance() == 1e-3
+    assert get_derivative_tolerance() is None
+
+
+def test_tolerance_passed_to_blocks():
+    x = AdjFloat(3.0)
+    block, y = identity(x)
+    J = y * y
+    Jhat = ReducedFunctional(J, Control(x))
+
+    Jhat.derivative()
+    Jhat.derivative(tol=1e-2)
+    Jhat.hessian(AdjFloat(1.0), tol=1e-4)
+    assert block.tolerances == [None, 1e-2, 1e-4, 1e-4]
+    assert get_derivative_tolerance() is None